@@ -20,5 +20,8 @@ def stop(context):
         # This will run the start function in each of your commands as defined in commands/__init__.py
         commands.stop()
 
+        # Write out any queued log messages and stop the log writer thread
+        futil.stop_log_writer()
+
     except:
         futil.handle_error('stop')
\ No newline at end of file
@@ -0,0 +1,315 @@
+"""
+Asyncio backend client for CADZERO.
+Runs its own event loop on a background thread so auxiliary backend requests
+(health, auth status, chat) can run concurrently without blocking Fusion's
+main thread or the palette workers. Standard library only.
+"""
+
+import asyncio
+import json
+import ssl
+import threading
+import time
+import urllib.error
+import urllib.parse
+import zlib
+from concurrent.futures import Future
+from . import config
+from . import auth
+from .http_pool import GZIP_WBITS
+
+
+# Errors a request can end in: connection failures, timeouts, a body cut short,
+# a malformed status line or JSON body and a corrupt gzip body
+REQUEST_ERRORS = (
+    urllib.error.URLError,
+    OSError,
+    asyncio.TimeoutError,
+    asyncio.IncompleteReadError,
+    ValueError,
+    zlib.error,
+)
+
+
+class AsyncResponse:
+    """A fully read HTTP response"""
+
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers  # lower-cased header name -> value
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8')) if self.body else None
+
+
+class AsyncBackendClient:
+    """
+    HTTP/1.1 client on a dedicated asyncio event loop thread.
+
+    Coroutines (request, get_json, post_json, chat, health, auth_status,
+    backend_status) must run on the client's loop. From any other thread use
+    submit(), which returns a concurrent.futures.Future and can call a callback
+    with the result, e.g. to push it to the palette.
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    # Event loop thread
+
+    def start(self):
+        """Start the event loop thread (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, args=(self._loop, ready), name='cadzero-async', daemon=True)
+            self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout=2):
+        """Cancel outstanding requests and stop the event loop thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(self._cancel_all, loop)
+        thread.join(timeout)
+
+    def _run_loop(self, loop, ready):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _cancel_all(self, loop):
+        tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+
+        async def finish():
+            await asyncio.gather(*tasks, return_exceptions=True)
+            loop.stop()
+
+        loop.create_task(finish())
+
+    def submit(self, coro, callback=None):
+        """
+        Run a coroutine on the client's loop from any thread. Returns a concurrent.futures.Future.
+
+        callback(result, error) is called once it finishes (on the loop thread), with
+        error set to the exception if it failed.
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+        if callback is not None:
+            def on_done(done_future: Future):
+                if done_future.cancelled():
+                    callback(None, asyncio.CancelledError())
+                elif done_future.exception() is not None:
+                    callback(None, done_future.exception())
+                else:
+                    callback(done_future.result(), None)
+            future.add_done_callback(on_done)
+
+        return future
+
+    # HTTP
+
+    async def request(self, method, url, body=None, headers=None, timeout=None):
+        """Send a request and read the whole response. Returns an AsyncResponse"""
+        return await asyncio.wait_for(self._request(method, url, body, headers or {}), timeout or self.timeout)
+
+    async def _request(self, method, url, body, headers):
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        host = parsed.hostname
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f'{path}?{parsed.query}'
+
+        try:
+            reader, writer = await asyncio.open_connection(
+                host, port,
+                ssl=self._get_ssl_context() if scheme == 'https' else None,
+                server_hostname=host if scheme == 'https' else None
+            )
+        except OSError as e:
+            raise urllib.error.URLError(e)
+
+        try:
+            request_headers = {
+                'Host': host if port in (80, 443) else f'{host}:{port}',
+                'Accept': 'application/json',
+                'Accept-Encoding': 'gzip',
+                'Connection': 'close'
+            }
+            request_headers.update(headers)
+            if body is not None:
+                request_headers['Content-Length'] = str(len(body))
+
+            head = f'{method} {path} HTTP/1.1\r\n'
+            head += ''.join(f'{name}: {value}\r\n' for name, value in request_headers.items())
+            writer.write((head + '\r\n').encode('latin-1'))
+            if body:
+                writer.write(body)
+            await writer.drain()
+
+            return await self._read_response(reader, method)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+    async def _read_response(self, reader, method):
+        status_line = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+        parts = status_line.split(' ', 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/'):
+            raise urllib.error.URLError(f'Bad status line: {status_line!r}')
+        status = int(parts[1])
+        reason = parts[2] if len(parts) > 2 else ''
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked(reader)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+
+        if headers.get('content-encoding', '').lower() == 'gzip' and body:
+            body = zlib.decompress(body, GZIP_WBITS)
+
+        return AsyncResponse(status, reason, headers, body)
+
+    async def _read_chunked(self, reader):
+        chunks = []
+        while True:
+            size_line = (await reader.readline()).split(b';', 1)[0].strip()
+            size = int(size_line, 16)
+            if size == 0:
+                # Skip trailers
+                while (await reader.readline()).strip():
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+
+    def _get_ssl_context(self):
+        if self._ssl_context is None:
+            self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+    async def get_json(self, url, headers=None, timeout=None):
+        """GET a JSON resource. Raises urllib.error.HTTPError for 4xx/5xx"""
+        response = await self.request('GET', url, headers=headers, timeout=timeout)
+        return self._json_or_raise(url, response)
+
+    async def post_json(self, url, data, headers=None, timeout=None):
+        """POST data as JSON and return the decoded response. Raises urllib.error.HTTPError for 4xx/5xx"""
+        request_headers = {'Content-Type': 'application/json'}
+        request_headers.update(headers or {})
+        body = json.dumps(data).encode('utf-8')
+        response = await self.request('POST', url, body=body, headers=request_headers, timeout=timeout)
+        return self._json_or_raise(url, response)
+
+    def _json_or_raise(self, url, response):
+        if response.status >= 400:
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+        return response.json()
+
+    # Backend APIs
+
+    async def chat(self, message, history=None, timeout=None):
+        """Send a chat message (non-streaming) and return the decoded response"""
+        data = {
+            'provider': 'openai',
+            'message': message,
+            'tool_choice': 'auto',
+            'max_tool_calls': 5
+        }
+        if history:
+            data['history'] = history
+
+        url = f'{config.current_endpoint}/llm/chat-with-tools'
+        return await self.post_json(url, data, headers=auth.get_auth_headers(), timeout=timeout or config.HTTP_REQUEST_TIMEOUT)
+
+    async def health(self, timeout=5):
+        """Check whether the current endpoint is reachable. Never raises"""
+        url = f'{config.current_endpoint}{config.HEALTH_PATH}'
+        start = time.perf_counter()
+        try:
+            response = await self.request('GET', url, timeout=timeout)
+            return {
+                'ok': response.status < 400,
+                'status': response.status,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 3)
+            }
+        except REQUEST_ERRORS as e:
+            return {
+                'ok': False,
+                'error': str(e) or type(e).__name__,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 3)
+            }
+
+    async def auth_status(self, timeout=5):
+        """Ask the backend whether the current token is accepted. Never raises"""
+        headers = auth.get_auth_headers()
+        if not headers:
+            return {'authenticated': False, 'reason': 'No valid token'}
+
+        url = f'{config.current_endpoint}{config.AUTH_STATUS_PATH}'
+        try:
+            response = await self.request('GET', url, headers=headers, timeout=timeout)
+            return {'authenticated': response.status < 400, 'status': response.status}
+        except REQUEST_ERRORS as e:
+            return {'authenticated': None, 'error': str(e) or type(e).__name__}
+
+    async def backend_status(self):
+        """Run the health and auth checks concurrently"""
+        health, auth_status = await asyncio.gather(self.health(), self.auth_status())
+        return {
+            'endpoint': config.current_endpoint,
+            'health': health,
+            'auth': auth_status
+        }
+
+
+# Global async client, started on first use
+client = AsyncBackendClient(timeout=config.ASYNC_CLIENT_TIMEOUT)
+
+
+def submit(coro, callback=None):
+    """Run a coroutine on the shared async client's loop (see AsyncBackendClient.submit)"""
+    return client.submit(coro, callback)
+
+
+def stop():
+    """Stop the shared async client's loop (called when the add-in stops)"""
+    client.stop()
@@ -3,19 +3,34 @@ Authentication module for CADZERO using Clerk.
 Handles user authentication and token management.
 """
 
+import base64
 import json
 import os
+import tempfile
+import threading
 import webbrowser
 import http.server
 import socketserver
+import urllib.error
 import urllib.parse
 import time
 from threading import Thread
 from . import config
+from . import http_pool
+from . import telemetry
+
+
+class ReauthRequired(Exception):
+    """Raised when the session can't be refreshed and the user has to sign in again"""
 
 
 class AuthToken:
-    """Stores and manages authentication tokens"""
+    """
+    Stores and manages authentication tokens.
+
+    The JWT is decoded once whenever the token changes and the Authorization header
+    is precomputed, so get_auth_header() on the request path is a lock-protected read.
+    """
     
     def __init__(self):
         self.token = None
@@ -24,52 +39,72 @@ class AuthToken:
         self.user_name = None
         self.session_id = None  # Store session ID for token refresh
         self.token_expiry = None  # Track when token expires
+        self.claims = {}  # Decoded JWT payload of the current token
+        self._auth_header = {}
+        self._expiry_reported = False
+        self._lock = threading.RLock()
+        self.token_changed = threading.Event()  # Set whenever the token is replaced or cleared
         self._token_file = os.path.join(
             os.path.dirname(__file__), 
             '.auth_token.json'
         )
         self.load_token()
     
+    def _set_token(self, token, user_id, user_email, user_name, session_id, token_expiry):
+        """Replace the cached token state. Lock must be held"""
+        self.token = token
+        self.user_id = user_id
+        self.user_email = user_email
+        self.user_name = user_name
+        self.session_id = session_id
+        self.token_expiry = token_expiry
+        self._auth_header = {'Authorization': f'Bearer {token}'} if token else {}
+        self._expiry_reported = False
+        self.token_changed.set()
+    
     def load_token(self):
         """Load token from file if it exists"""
         try:
             if os.path.exists(self._token_file):
                 with open(self._token_file, 'r') as f:
                     data = json.load(f)
-                    self.token = data.get('token')
-                    self.user_id = data.get('user_id')
-                    self.user_email = data.get('user_email')
-                    self.user_name = data.get('user_name')
-                    self.session_id = data.get('session_id')
-                    
-                    # Always decode JWT to get real expiry (in case token was saved with wrong expiry)
-                    if self.token:
-                        decoded_expiry = self._decode_jwt_expiry(self.token)
-                        if decoded_expiry:
-                            self.token_expiry = decoded_expiry
-                            remaining_minutes = int((decoded_expiry - time.time()) / 60)
-                            if remaining_minutes > 0:
-                                print(f"[AUTH] Token loaded, expires in ~{remaining_minutes} minutes")
-                            else:
-                                print(f"[AUTH] Token loaded but already expired")
-                        else:
-                            # Fallback to saved expiry if we can't decode
-                            self.token_expiry = data.get('token_expiry')
+                
+                token = data.get('token')
+                
+                # Always decode JWT to get real expiry (in case token was saved with wrong expiry)
+                claims = self._decode_jwt_claims(token) if token else {}
+                token_expiry = self._expiry_from_claims(claims) or data.get('token_expiry')
+                
+                with self._lock:
+                    self.claims = claims
+                    self._set_token(
+                        token,
+                        data.get('user_id'),
+                        data.get('user_email'),
+                        data.get('user_name'),
+                        data.get('session_id'),
+                        token_expiry
+                    )
+                
+                if token and token_expiry:
+                    remaining_minutes = int((token_expiry - time.time()) / 60)
+                    if remaining_minutes > 0:
+                        print(f"[AUTH] Token loaded, expires in ~{remaining_minutes} minutes")
                     else:
-                        self.token_expiry = data.get('token_expiry')
+                        print(f"[AUTH] Token loaded but already expired")
         except Exception as e:
             print(f"Error loading auth token: {e}")
     
-    def _decode_jwt_expiry(self, token):
+    def _decode_jwt_claims(self, token):
         """
-        Extract the expiry time from a JWT token without verification.
-        Returns the expiry timestamp or None if unable to decode.
+        Decode the payload of a JWT token without verification.
+        Returns the claims dict, or an empty dict if unable to decode.
         """
         try:
             # JWT tokens have 3 parts separated by dots: header.payload.signature
             parts = token.split('.')
             if len(parts) != 3:
-                return None
+                return {}
             
             # Decode the payload (second part)
             # Add padding if needed (JWT base64 encoding might not have padding)
@@ -78,44 +113,38 @@ class AuthToken:
             if padding != 4:
                 payload += '=' * padding
             
-            # Decode from base64
-            import base64
-            decoded_bytes = base64.urlsafe_b64decode(payload)
-            payload_data = json.loads(decoded_bytes)
-            
-            # Get the 'exp' claim (expiration time as Unix timestamp)
-            exp = payload_data.get('exp')
-            if exp:
-                # Subtract 30 seconds as a buffer to refresh before actual expiry
-                return exp - 30
-            
-            return None
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return claims if isinstance(claims, dict) else {}
         except Exception as e:
-            print(f"[AUTH] Unable to decode JWT expiry: {e}")
-            return None
+            print(f"[AUTH] Unable to decode JWT claims: {e}")
+            return {}
+    
+    def _expiry_from_claims(self, claims):
+        """
+        Get the expiry timestamp from decoded JWT claims, or None if there is no 'exp' claim.
+        """
+        # Get the 'exp' claim (expiration time as Unix timestamp)
+        exp = claims.get('exp')
+        if exp:
+            # Subtract 30 seconds as a buffer to refresh before actual expiry
+            return exp - 30
+        return None
     
     def save_token(self, token, user_id=None, user_email=None, user_name=None, session_id=None, token_expiry=None):
         """Save token to file"""
         try:
-            self.token = token
-            self.user_id = user_id
-            self.user_email = user_email
-            self.user_name = user_name
-            self.session_id = session_id
+            claims = self._decode_jwt_claims(token) if token else {}
             
             # If token_expiry not provided, try to decode it from the JWT token
             if token_expiry is None and token:
-                decoded_expiry = self._decode_jwt_expiry(token)
-                if decoded_expiry:
-                    self.token_expiry = decoded_expiry
-                    expiry_minutes = int((decoded_expiry - time.time()) / 60)
+                token_expiry = self._expiry_from_claims(claims)
+                if token_expiry:
+                    expiry_minutes = int((token_expiry - time.time()) / 60)
                     print(f"[AUTH] Token will expire in ~{expiry_minutes} minutes")
                 else:
                     # Fallback: assume 15 minutes (if Clerk Dashboard is configured correctly)
-                    self.token_expiry = time.time() + (15 * 60) - 30  # 15 min minus 30 sec buffer
+                    token_expiry = time.time() + (15 * 60) - 30  # 15 min minus 30 sec buffer
                     print(f"[AUTH] Using default 15-minute token expiry")
-            else:
-                self.token_expiry = token_expiry
             
             data = {
                 'token': token,
@@ -123,97 +152,297 @@ class AuthToken:
                 'user_email': user_email,
                 'user_name': user_name,
                 'session_id': session_id,
-                'token_expiry': self.token_expiry
+                'token_expiry': token_expiry
             }
             
-            with open(self._token_file, 'w') as f:
-                json.dump(data, f)
+            # Update memory and file together so concurrent saves can't leave them out of step
+            with self._lock:
+                self.claims = claims
+                self._set_token(token, user_id, user_email, user_name, session_id, token_expiry)
+                self._write_token_file(data)
         except Exception as e:
             print(f"Error saving auth token: {e}")
     
+    def _write_token_file(self, data):
+        """
+        Write the token file atomically: write a temp file in the same directory,
+        then rename it over the old one, so readers never see a half-written file.
+        """
+        directory = os.path.dirname(self._token_file)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.auth_token.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._token_file)
+        except Exception:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    
     def clear_token(self):
         """Clear the stored token"""
-        self.token = None
-        self.user_id = None
-        self.user_email = None
-        self.user_name = None
-        self.session_id = None
-        self.token_expiry = None
-        
-        try:
-            if os.path.exists(self._token_file):
-                os.remove(self._token_file)
-        except Exception as e:
-            print(f"Error clearing auth token: {e}")
+        with self._lock:
+            self.claims = {}
+            self._set_token(None, None, None, None, None, None)
+            
+            try:
+                if os.path.exists(self._token_file):
+                    os.remove(self._token_file)
+            except Exception as e:
+                print(f"Error clearing auth token: {e}")
     
     def is_token_expired(self):
         """Check if the current token is expired or about to expire"""
-        if self.token_expiry is None:
+        token_expiry = self.token_expiry
+        if token_expiry is None:
             return True
-        return time.time() >= self.token_expiry
+        return time.time() >= token_expiry
     
     def refresh_token(self):
         """
-        Refresh the session token using the session ID.
+        Refresh the session token using the session ID, against config.get_token_refresh_url().
         
-        NOTE: Automatic token refresh is currently disabled. 
-        With the extended token lifetime (15 minutes) configured in Clerk Dashboard,
-        users should not need to refresh tokens during normal usage.
-        If the token expires, users will need to re-authenticate.
+        Returns True if a new token was stored and False on a transient failure
+        (network error, 5xx, unusable response) worth retrying.
+        Raises ReauthRequired if there is no session ID or the backend rejects the session.
         """
-        if not self.session_id:
-            print("[AUTH] No session ID available for token refresh")
-            return False
+        with self._lock:
+            session_id = self.session_id
+            token = self.token
         
-        print("[AUTH] Token refresh requested but automatic refresh is disabled.")
-        print("[AUTH] Please extend token lifetime in Clerk Dashboard (recommended: 15 minutes)")
-        print("[AUTH] User will need to re-authenticate through the web flow.")
-        return False
-    
-    def is_authenticated(self):
-        """Check if user is authenticated"""
-        if self.token is None:
+        if not session_id:
+            raise ReauthRequired('No session ID available for token refresh')
+        
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        body = json.dumps({'session_id': session_id}).encode('utf-8')
+        
+        start = time.perf_counter()
+        try:
+            with http_pool.request('POST', config.get_token_refresh_url(), body=body, headers=headers) as response:
+                data = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            telemetry.record_event('auth', action='refresh', success=False, endpoint=config.current_endpoint, status=e.code)
+            if e.code in (401, 403):
+                raise ReauthRequired(f'Session rejected by the backend (HTTP {e.code})')
+            print(f"[AUTH] Token refresh failed: HTTP {e.code}")
+            return False
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            telemetry.record_event('auth', action='refresh', success=False, endpoint=config.current_endpoint, error=str(e))
+            print(f"[AUTH] Token refresh failed: {e}")
             return False
         
-        # Check if token is expired
-        # NOTE: We don't automatically refresh here anymore to avoid breaking the add-in
-        # With extended token lifetime (15 min), this should rarely be an issue
-        if self.is_token_expired():
-            print("[AUTH] Token expired. Please re-authenticate.")
-            print("[AUTH] Tip: Increase token lifetime in Clerk Dashboard to reduce re-authentication frequency")
+        new_token = data.get('token') if isinstance(data, dict) else None
+        if not new_token:
+            telemetry.record_event('auth', action='refresh', success=False, endpoint=config.current_endpoint, error='no token in response')
+            print("[AUTH] Token refresh response did not contain a token")
             return False
         
+        with self._lock:
+            # Signed out or in again while the request was in flight; keep the newer state
+            if self.session_id != session_id:
+                return False
+            self.save_token(
+                token=new_token,
+                user_id=self.user_id,
+                user_email=self.user_email,
+                user_name=self.user_name,
+                session_id=data.get('session_id') or session_id,
+                token_expiry=data.get('token_expiry')
+            )
+        
+        telemetry.record_event('auth', action='refresh', success=True, endpoint=config.current_endpoint,
+                               latency_ms=round((time.perf_counter() - start) * 1000, 3))
         return True
     
+    def is_authenticated(self):
+        """Check if user is authenticated"""
+        with self._lock:
+            if self.token is None:
+                return False
+            
+            # Check if token is expired
+            # NOTE: Never refresh here; this runs on the request path. The TokenRefreshScheduler
+            # renews the token in the background before it expires.
+            if self.is_token_expired():
+                # Report an expired token once, not on every request
+                if not self._expiry_reported:
+                    self._expiry_reported = True
+                    print("[AUTH] Token expired. Please re-authenticate.")
+                return False
+            
+            return True
+    
     def get_auth_header(self):
         """Get the Authorization header for API requests"""
         # Ensure token is valid before returning
-        if self.is_authenticated():
-            return {'Authorization': f'Bearer {self.token}'}
+        with self._lock:
+            if self.is_authenticated():
+                return dict(self._auth_header)
         return {}
 
 
+class TokenRefreshScheduler:
+    """
+    Background thread that renews the session token before it expires.
+
+    The refresh is scheduled lead_time seconds before token_expiry (or halfway
+    through a shorter remaining lifetime). Transient failures are retried with
+    exponential backoff, also once the token has expired. on_reauth_required(reason)
+    is called when the backend rejected the session or there is no session and the
+    token has expired, and once when retries failed until the token expired; in that
+    case retrying goes on, so the session recovers when the backend is reachable again.
+    """
+    
+    def __init__(self, token, lead_time=120, retry_base=5, retry_max=300):
+        self.token = token
+        self.lead_time = lead_time
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.on_reauth_required = None
+        self._stopping = threading.Event()
+        self._thread = None
+        
+        # Metrics
+        self.refreshes = 0
+        self.failures = 0
+    
+    def start(self, on_reauth_required=None):
+        """Start the scheduler thread (no-op if already running)"""
+        self.on_reauth_required = on_reauth_required
+        if self._thread is not None and self._thread.is_alive():
+            return
+        
+        self._stopping.clear()
+        self._thread = Thread(target=self._run, name='cadzero-token-refresh', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=2):
+        """Stop the scheduler thread"""
+        self._stopping.set()
+        self.token.token_changed.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+    
+    def _wait(self, delay):
+        """Sleep up to delay seconds (None = until woken). Returns True if woken by a token change or stop"""
+        woken = self.token.token_changed.wait(delay)
+        return woken or self._stopping.is_set()
+    
+    def _next_refresh_delay(self, token_expiry):
+        remaining = token_expiry - time.time()
+        if remaining <= 0:
+            return 0
+        return max(remaining - self.lead_time, remaining / 2, 1)
+    
+    def _wait_for_expiry(self):
+        """Wait until the current token expires. Returns True if woken first"""
+        token_expiry = self.token.token_expiry
+        remaining = token_expiry - time.time() if token_expiry else 0
+        return remaining > 0 and self._wait(remaining)
+    
+    def _reauth_required(self, reason):
+        print(f"[AUTH] Re-authentication required: {reason}")
+        telemetry.record_event('auth', action='reauth_required', endpoint=config.current_endpoint, reason=reason)
+        if self.on_reauth_required:
+            try:
+                self.on_reauth_required(reason)
+            except Exception as e:
+                print(f"[AUTH] Error signalling re-authentication: {e}")
+    
+    def _run(self):
+        failures = 0
+        expiry_reported = False
+        while not self._stopping.is_set():
+            # Clear before reading so a change made after this point wakes the wait below
+            self.token.token_changed.clear()
+            with self.token._lock:
+                has_token = self.token.token is not None
+                token_expiry = self.token.token_expiry
+            
+            if not has_token:
+                failures = 0
+                expiry_reported = False
+                self._wait(None)
+                continue
+            
+            if failures:
+                delay = min(self.retry_base * 2 ** (failures - 1), self.retry_max)
+            else:
+                delay = self._next_refresh_delay(token_expiry or 0)
+            
+            if self._wait(delay):
+                # Token replaced (sign-in, sign-out, refresh) or stopping: reschedule from scratch
+                failures = 0
+                expiry_reported = False
+                continue
+            
+            try:
+                refreshed = self.token.refresh_token()
+            except ReauthRequired as e:
+                self.failures += 1
+                # The current token is still usable until it expires
+                if not self._wait_for_expiry():
+                    self._reauth_required(str(e))
+                    self._wait(None)
+                failures = 0
+                continue
+            
+            if refreshed:
+                self.refreshes += 1
+                failures = 0
+                expiry_reported = False
+                continue
+            
+            self.failures += 1
+            failures += 1
+            if self.token.is_token_expired() and not expiry_reported:
+                # Chat requests fail until a refresh succeeds; keep retrying with backoff meanwhile
+                self._reauth_required('Session token expired and could not be refreshed')
+                expiry_reported = True
+
+
 # Global auth token instance
 auth_token = AuthToken()
 
+# Global token refresh scheduler, started by the palette command
+token_refresher = TokenRefreshScheduler(
+    auth_token,
+    lead_time=config.TOKEN_REFRESH_LEAD_TIME,
+    retry_base=config.TOKEN_REFRESH_RETRY_BASE,
+    retry_max=config.TOKEN_REFRESH_RETRY_MAX
+)
+
 
 class CallbackHandler(http.server.SimpleHTTPRequestHandler):
     """HTTP server handler to receive OAuth callback"""
     
-    callback_data = {}
-    
     def do_GET(self):
         """Handle GET request from OAuth callback"""
         # Parse the query parameters
         parsed_path = urllib.parse.urlparse(self.path)
         params = urllib.parse.parse_qs(parsed_path.query)
         
+        # Browsers may ask for a favicon; that is not the callback
+        if parsed_path.path == '/favicon.ico':
+            self.send_error(404)
+            return
+        
         # Debug logging
-        print(f"[AUTH] Callback received on path: {self.path}")
+        print(f"[AUTH] Callback received on path: {parsed_path.path}")
         print(f"[AUTH] Parsed params: token={bool(params.get('token'))}, user_id={params.get('user_id', [None])[0]}")
         
         # Store the callback data
-        CallbackHandler.callback_data = {
+        callback_data = {
             'token': params.get('token', [None])[0],
             'user_id': params.get('user_id', [None])[0],
             'user_email': params.get('user_email', [None])[0],
@@ -222,7 +451,7 @@ class CallbackHandler(http.server.SimpleHTTPRequestHandler):
         }
         
         # Debug log the token
-        token = CallbackHandler.callback_data.get('token')
+        token = callback_data.get('token')
         if token:
             print(f"[AUTH] Token received: {token[:20]}... (length: {len(token)})")
         else:
@@ -318,56 +547,133 @@ class CallbackHandler(http.server.SimpleHTTPRequestHandler):
         """
         
         self.wfile.write(success_html.encode())
+        
+        # Wake the waiting sign-in flow only after the browser has its page
+        self.server.complete(callback_data)
     
     def log_message(self, format, *args):
         """Suppress server logs"""
         pass
 
 
+class AuthCallbackServer(socketserver.TCPServer):
+    """
+    One-shot local server that receives the sign-in callback.
+
+    The socket is bound in the constructor, so the browser can be opened right
+    away. If the preferred port is busy an ephemeral port is used instead; the
+    actual port is in self.port. received is set when the callback arrives or the
+    sign-in is cancelled.
+    """
+    
+    # Rebind straight after a previous sign-in (TIME_WAIT). Not on Windows, where
+    # SO_REUSEADDR would let us share a port that is genuinely in use.
+    allow_reuse_address = os.name != 'nt'
+    
+    def __init__(self, port=8765):
+        try:
+            super().__init__(("", port), CallbackHandler)
+        except OSError:
+            print(f"[AUTH] Port {port} is busy, using an ephemeral port for the callback")
+            super().__init__(("", 0), CallbackHandler)
+        
+        self.port = self.server_address[1]
+        self.callback_data = {}
+        self.cancelled = False
+        self.received = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Serve callback requests on a background thread"""
+        self._thread = Thread(target=self.serve_forever, kwargs={'poll_interval': 0.1}, daemon=True)
+        self._thread.start()
+    
+    def complete(self, callback_data):
+        """Record the callback data and wake the waiter (called by CallbackHandler)"""
+        if not self.received.is_set():
+            self.callback_data = callback_data
+            self.received.set()
+    
+    def cancel(self):
+        """Give up waiting for the callback"""
+        self.cancelled = True
+        self.received.set()
+    
+    def wait(self, timeout=None):
+        """Block until the callback arrives, the sign-in is cancelled or timeout passes. Returns the callback data"""
+        self.received.wait(timeout)
+        return {} if self.cancelled else self.callback_data
+    
+    def close(self):
+        """Stop serving and release the port. Safe to call more than once"""
+        if self._thread is not None:
+            self.shutdown()
+            self._thread = None
+        self.server_close()
+
+
+_active_signin = None
+_active_signin_lock = threading.Lock()
+
+
 def start_auth_server(port=8765):
-    """Start a local HTTP server to receive OAuth callback"""
-    handler = CallbackHandler
-    with socketserver.TCPServer(("", port), handler) as httpd:
-        # Handle only one request
-        httpd.handle_request()
-        return CallbackHandler.callback_data
+    """Bind and start a local HTTP server to receive the OAuth callback. Returns the AuthCallbackServer"""
+    server = AuthCallbackServer(port)
+    server.start()
+    print(f"[AUTH] Callback server listening on port {server.port}")
+    return server
 
 
-def initiate_clerk_signin():
+def begin_clerk_signin():
     """
-    Initiate the Clerk sign-in flow.
-    Opens a browser window for authentication and waits for callback.
+    Start the Clerk sign-in flow: bind the callback server, then open the browser.
+    Any sign-in already in progress is cancelled. Returns the AuthCallbackServer;
+    pass it to complete_clerk_signin() to wait for the result.
     """
+    global _active_signin
     print("[AUTH] Starting Clerk sign-in flow...")
     
-    # Get the authentication URL from config
-    auth_url = config.get_auth_url()
-    print(f"[AUTH] Auth URL: {auth_url}")
-    
-    # Start callback server in a thread
-    callback_port = 8765
-    callback_data = {}
+    # Release the previous sign-in's port first; the redirect URI registered with
+    # Clerk only matches the configured callback port
+    with _active_signin_lock:
+        previous = _active_signin
+        _active_signin = None
+    if previous is not None:
+        previous.cancel()
+        previous.close()
     
-    def run_server():
-        nonlocal callback_data
-        print(f"[AUTH] Starting callback server on port {callback_port}...")
-        callback_data = start_auth_server(callback_port)
-        print(f"[AUTH] Callback server received data: token={bool(callback_data.get('token'))}")
+    server = start_auth_server(config.AUTH_CALLBACK_PORT)
+    server.auth_url = config.get_auth_url(server.port)
+    print(f"[AUTH] Auth URL: {server.auth_url}")
     
-    server_thread = Thread(target=run_server, daemon=True)
-    server_thread.start()
+    with _active_signin_lock:
+        _active_signin = server
     
-    # Small delay to ensure server is ready
-    import time
-    time.sleep(0.5)
-    
-    # Open browser for authentication
+    # The server is already listening, so the browser can be opened right away
     print("[AUTH] Opening browser...")
-    webbrowser.open(auth_url)
+    webbrowser.open(server.auth_url)
+    return server
+
+
+def complete_clerk_signin(server, timeout=None):
+    """
+    Wait for the callback of a sign-in started with begin_clerk_signin() and store the token.
+    Returns True if the user signed in, False on cancellation, timeout or a callback without a token.
+    """
+    global _active_signin
     
-    # Wait for server thread to complete (with timeout)
     print("[AUTH] Waiting for authentication callback...")
-    server_thread.join(timeout=300)  # 5 minute timeout
+    try:
+        callback_data = server.wait(timeout if timeout is not None else config.AUTH_SIGNIN_TIMEOUT)
+    finally:
+        server.close()
+        with _active_signin_lock:
+            if _active_signin is server:
+                _active_signin = None
+    
+    if server.cancelled:
+        print("[AUTH] Sign-in cancelled")
+        return False
     
     # Process callback data
     if callback_data.get('token'):
@@ -386,6 +692,26 @@ def initiate_clerk_signin():
         return False
 
 
+def initiate_clerk_signin(timeout=None):
+    """
+    Initiate the Clerk sign-in flow.
+    Opens a browser window for authentication and waits for callback.
+    """
+    return complete_clerk_signin(begin_clerk_signin(), timeout)
+
+
+def cancel_signin():
+    """Cancel the sign-in in progress, if any. Returns True if one was cancelled"""
+    with _active_signin_lock:
+        server = _active_signin
+    
+    if server is None:
+        return False
+    
+    server.cancel()
+    return True
+
+
 def sign_out():
     """Sign out the current user"""
     auth_token.clear_token()
@@ -0,0 +1,96 @@
+"""
+Streaming support for the CADZERO chat endpoint.
+Parses NDJSON and Server-Sent Events response bodies into chat events.
+
+Every event is a JSON object with a 'type' key:
+    {"type": "text_delta", "delta": "..."}
+    {"type": "tool_call", "tool_call": {...}, "tool_output": {...}}   (tool_output optional)
+    {"type": "tool_output", "tool_output": {...}}
+    {"type": "done", "success": true, "response": "..."}
+    {"type": "error", "error": "..."}
+"""
+
+from . import message_codec
+
+
+# Accept header sent when streaming is enabled; servers that don't stream answer with plain JSON
+STREAM_ACCEPT_HEADER = 'application/x-ndjson, text/event-stream;q=0.9, application/json;q=0.8'
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+SSE_CONTENT_TYPE = 'text/event-stream'
+
+
+def get_stream_format(content_type):
+    """Get 'ndjson', 'sse' or None (single JSON body) for a Content-Type header value"""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+
+    if media_type in NDJSON_CONTENT_TYPES:
+        return 'ndjson'
+    if media_type == SSE_CONTENT_TYPE:
+        return 'sse'
+    return None
+
+
+def iter_ndjson_events(stream):
+    """Yield one event per non-empty line of a newline-delimited JSON stream"""
+    for raw_line in stream:
+        line = raw_line.strip()
+        if line:
+            yield message_codec.loads(line)
+
+
+def iter_sse_events(stream):
+    """
+    Yield one event per Server-Sent Events message.
+    The SSE 'event' field is used as the event type when the payload has none.
+    """
+    data_lines = []
+    event_name = None
+
+    for raw_line in stream:
+        line = raw_line.decode('utf-8').rstrip('\r\n')
+
+        # A blank line dispatches the buffered message
+        if not line:
+            if data_lines:
+                data = '\n'.join(data_lines)
+                if data.strip() == '[DONE]':
+                    return
+
+                event = message_codec.loads(data)
+                if event_name and isinstance(event, dict):
+                    event.setdefault('type', event_name)
+                yield event
+
+            data_lines = []
+            event_name = None
+            continue
+
+        # Comment / keep-alive line
+        if line.startswith(':'):
+            continue
+
+        field, _, value = line.partition(':')
+        if value.startswith(' '):
+            value = value[1:]
+
+        if field == 'data':
+            data_lines.append(value)
+        elif field == 'event':
+            event_name = value
+
+    # Stream ended without a trailing blank line
+    if data_lines:
+        data = '\n'.join(data_lines)
+        if data.strip() != '[DONE]':
+            event = message_codec.loads(data)
+            if event_name and isinstance(event, dict):
+                event.setdefault('type', event_name)
+            yield event
+
+
+def iter_stream_events(stream, stream_format):
+    """Yield chat events from a streamed response body in the given format"""
+    if stream_format == 'sse':
+        return iter_sse_events(stream)
+    return iter_ndjson_events(stream)
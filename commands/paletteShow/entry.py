@@ -1,14 +1,27 @@
 import json
+import hashlib
 import adsk.core
 import adsk.fusion
 import os
-import urllib.request
+import urllib.error
 import urllib.parse
 import threading
 import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from ...lib import fusionAddInUtils as futil
 from ... import config
 from ... import auth
+from ... import chat_stream
+from ... import http_pool
+from ... import history
+from ... import message_codec
+from ... import async_client
+from ... import telemetry
+from ...execution_registry import ExecutionRegistry, ExecutionCancelled
+from ...palette_executor import PaletteExecutor, PaletteQueueFull
+from ...turn_queue import TurnQueue
 from datetime import datetime
 
 app = adsk.core.Application.get()
@@ -61,20 +74,311 @@ local_handlers = []
 # Custom event for executing Python code in the main thread
 CUSTOM_EVENT_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_ExecutePythonCode'
 custom_event = None
-python_execution_results = {}
-python_execution_lock = threading.Lock()
-python_execution_counter = 0
+execution_registry = ExecutionRegistry(
+    max_pending=config.EXECUTION_MAX_PENDING,
+    late_result_ttl=config.EXECUTION_LATE_RESULT_TTL
+)
+
+# Deferral held open over the separately dispatched tool calls of a streamed turn; main thread only
+stream_deferred_compute = None
+
+# Worker pool for chat turns and sign-in, and the queue of chat turns on top of it; created in start()
+palette_executor = None
+turn_queue = None
+
+CANCELLED_RESULT = {
+    'success': False,
+    'message': 'Execution cancelled',
+    'result': 'Execution cancelled',
+    'error': None,
+    'cancelled': True
+}
+
+TIMED_OUT_RESULT = {
+    'success': False,
+    'message': 'Execution timed out',
+    'result': 'Execution timed out',
+    'error': None,
+    'timed_out': True
+}
+
+
+class CompiledCodeCache:
+    """LRU cache of compiled code objects for generated tool Python, keyed by a hash of the source."""
+    
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, python_code):
+        """Return the compiled code object for python_code, compiling it on a miss."""
+        key = hashlib.sha1(python_code.encode('utf-8')).hexdigest()
+        
+        with self._lock:
+            code = self._entries.get(key)
+            if code is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return code
+            self.misses += 1
+        
+        # Compile outside the lock; SyntaxError propagates to the caller
+        code = compile(python_code, '<cadzero_tool>', 'exec')
+        
+        with self._lock:
+            self._entries[key] = code
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        
+        return code
+    
+    def clear(self):
+        """Drop all cached code objects and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Get the cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+compiled_code_cache = CompiledCodeCache(config.COMPILED_CODE_CACHE_SIZE)
+
+
+class ConstructionCache:
+    """Construction geometry reused by the primitive commands, per component.
+
+    Objects are created on first use and handed out again while they are still
+    valid, so repeated primitive commands don't keep adding construction planes.
+    Only used on the main thread.
+    """
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # (document creationId, component entityToken) -> {key: object}
+    
+    def get(self, component, key, create):
+        """Return the object cached under key for component, calling create() if it is missing or was deleted."""
+        component_key = (component.parentDesign.parentDocument.creationId, component.entityToken)
+        entries = self._entries.setdefault(component_key, {})
+        
+        cached = entries.get(key)
+        if cached is not None and cached.isValid:
+            self.hits += 1
+            return cached
+        
+        self.misses += 1
+        entries[key] = created = create()
+        return created
+    
+    def clear(self):
+        """Forget all cached objects (they stay in their designs) and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        """Get the number of cached objects and hit/miss counters"""
+        return {
+            'components': len(self._entries),
+            'objects': sum(len(entries) for entries in self._entries.values()),
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+construction_cache = ConstructionCache()
+
+
+class SandboxHelpers:
+    """Geometry shortcuts available to generated code as `cadzero`, bound to one component."""
+    
+    def __init__(self, component):
+        self.component = component
+    
+    @staticmethod
+    def point(x=0, y=0, z=0):
+        return adsk.core.Point3D.create(x, y, z)
+    
+    @staticmethod
+    def vector(x=0, y=0, z=0):
+        return adsk.core.Vector3D.create(x, y, z)
+    
+    @staticmethod
+    def value(value):
+        """ValueInput for a number in internal units (cm, radians) or an expression string such as '5 mm'"""
+        if isinstance(value, str):
+            return adsk.core.ValueInput.createByString(value)
+        return adsk.core.ValueInput.createByReal(value)
+    
+    @staticmethod
+    def collection(items):
+        collection = adsk.core.ObjectCollection.create()
+        for item in items:
+            collection.add(item)
+        return collection
+    
+    def plane(self, z=0):
+        """The X-Y plane, or a plane offset from it by z (reused across calls)"""
+        return get_offset_xy_plane(self.component, z)
+    
+    def sketch(self, plane=None):
+        """Add a sketch on plane (default: the X-Y plane)"""
+        return self.component.sketches.add(plane or self.component.xYConstructionPlane)
+    
+    def extrude(self, profiles, distance, operation=None):
+        """Extrude one profile or a list of profiles by distance with a single feature"""
+        extrudes = self.component.features.extrudeFeatures
+        if isinstance(profiles, (list, tuple)):
+            profiles = self.collection(profiles)
+        ext_input = extrudes.createInput(profiles, operation or adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+        ext_input.setDistanceExtent(False, self.value(distance))
+        return extrudes.add(ext_input)
+    
+    def revolve(self, profile, axis=None, angle='360 deg', operation=None):
+        """Revolve a profile about axis (default: the component's Y axis)"""
+        revolves = self.component.features.revolveFeatures
+        rev_input = revolves.createInput(
+            profile,
+            axis or self.component.yConstructionAxis,
+            operation or adsk.fusion.FeatureOperations.NewBodyFeatureOperation
+        )
+        rev_input.setAngleExtent(False, self.value(angle))
+        return revolves.add(rev_input)
+    
+    def primitives(self, specs, mode='parametric'):
+        """Create primitives in bulk, like the createPrimitives command; returns per-item results"""
+        if mode == 'direct':
+            return create_primitives_direct(self.component, {'primitives': specs})
+        return create_primitives(self.component, {'primitives': specs})
+
+
+class ExecSandbox:
+    """Prebuilt exec namespaces for generated tool code, one per open document.
+
+    A namespace holds the handles tool code otherwise looks up on every run
+    (design, root component, units manager, common collections, built-in planes
+    and axes) plus the `cadzero` helpers and a `cadzero_state` dict snippets can
+    use to keep values between tool calls. Each run gets a shallow copy, so a
+    snippet can't clobber the shared handles. A namespace is rebuilt when it was
+    built without a design, or its design is no longer valid or no longer the
+    active product; switching documents switches namespaces. Only used on the
+    main thread.
+    """
+    
+    def __init__(self, max_documents=8):
+        self.max_documents = max_documents
+        self.builds = 0
+        self.hits = 0
+        self._namespaces = OrderedDict()  # document creationId -> namespace
+    
+    def namespace(self):
+        """Get the globals for one exec, based on the active document's namespace."""
+        document = app.activeDocument
+        key = document.creationId if document else None
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        
+        base = self._namespaces.get(key)
+        if base is not None and design is not None and base['design'] == design and design.isValid:
+            self.hits += 1
+            self._namespaces.move_to_end(key)
+        else:
+            # No namespace yet, no design when it was built, or the design was deleted or replaced
+            base = self._namespaces[key] = self._build(design)
+            self.builds += 1
+            while len(self._namespaces) > self.max_documents:
+                self._namespaces.popitem(last=False)
+        
+        return dict(base)
+    
+    def reset(self):
+        """Drop every namespace, including the values snippets kept in cadzero_state, and reset the counters."""
+        self._namespaces.clear()
+        self.builds = 0
+        self.hits = 0
+    
+    def stats(self):
+        """Get the number of namespaces and build/hit counters"""
+        return {
+            'documents': len(self._namespaces),
+            'builds': self.builds,
+            'hits': self.hits
+        }
+    
+    def _build(self, design):
+        root = design.rootComponent if design else None
+        
+        namespace = {
+            'adsk': adsk,
+            'app': app,
+            'ui': ui,
+            '__name__': '__main__',
+            'Point3D': adsk.core.Point3D,
+            'Vector3D': adsk.core.Vector3D,
+            'ValueInput': adsk.core.ValueInput,
+            'ObjectCollection': adsk.core.ObjectCollection,
+            'FeatureOperations': adsk.fusion.FeatureOperations,
+            'design': design,
+            'root': root,
+            'units_manager': design.fusionUnitsManager if design else None,
+            'cadzero': SandboxHelpers(root) if root else None,
+            'cadzero_state': {}
+        }
+        
+        if root:
+            features = root.features
+            namespace.update({
+                'sketches': root.sketches,
+                'features': features,
+                'extrudes': features.extrudeFeatures,
+                'revolves': features.revolveFeatures,
+                'bodies': root.bRepBodies,
+                'occurrences': root.occurrences,
+                'construction_planes': root.constructionPlanes,
+                'xy_plane': root.xYConstructionPlane,
+                'xz_plane': root.xZConstructionPlane,
+                'yz_plane': root.yZConstructionPlane,
+                'x_axis': root.xConstructionAxis,
+                'y_axis': root.yConstructionAxis,
+                'z_axis': root.zConstructionAxis
+            })
+        
+        return namespace
+
+
+exec_sandbox = ExecSandbox()
 
 
 # Executed when add-in is run.
 def start():
-    global custom_event
+    global custom_event, palette_executor, turn_queue
+    
+    # Worker pool for palette requests; all chat turns run one at a time on a single lane
+    palette_executor = PaletteExecutor(config.PALETTE_WORKERS, config.PALETTE_MAX_QUEUED)
+    turn_queue = TurnQueue(palette_executor, on_state_change=push_turn_status, merge_window=config.TURN_MERGE_WINDOW)
     
     # Register custom event for executing Python code in main thread
     custom_event = app.registerCustomEvent(CUSTOM_EVENT_ID)
     futil.add_handler(custom_event, custom_event_handler)
     futil.log(f'{CMD_NAME}: Registered custom event: {CUSTOM_EVENT_ID}')
     
+    # Keep the session token fresh in the background so chat turns never find it expired
+    if config.TOKEN_REFRESH_ENABLED:
+        auth.token_refresher.start(on_reauth_required=notify_reauth_required)
+    
     # Create a command Definition.
     cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
 
@@ -99,12 +403,37 @@ def start():
 def stop():
     global custom_event
     
+    # Stop the background token refresh and release the sign-in callback port first,
+    # so a sign-in waiting for the browser doesn't hold a palette worker through the shutdown
+    auth.token_refresher.stop()
+    auth.cancel_signin()
+    
+    # Cancel queued palette work and stop the running turn's remaining tool calls
+    if palette_executor:
+        turn_queue.cancel()
+        if not palette_executor.shutdown(timeout=config.PALETTE_SHUTDOWN_TIMEOUT):
+            futil.log(f'{CMD_NAME}: Palette workers still busy at shutdown: {palette_executor.stats()}', adsk.core.LogLevels.WarningLogLevel)
+    
+    # A streamed turn cut short may have left the design's compute deferred
+    end_stream_deferred_compute()
+    
     # Unregister custom event
     if custom_event:
         app.unregisterCustomEvent(CUSTOM_EVENT_ID)
         custom_event = None
         futil.log(f'{CMD_NAME}: Unregistered custom event: {CUSTOM_EVENT_ID}')
     
+    # Close pooled backend connections and the async client's loop
+    http_pool.close_all()
+    async_client.stop()
+    
+    # Write out queued telemetry events
+    telemetry.close()
+    
+    # Cached construction geometry and sandbox handles belong to documents that may be closed before the next start
+    construction_cache.clear()
+    exec_sandbox.reset()
+    
     # Get the various UI elements for this command
     workspace = ui.workspaces.itemById(WORKSPACE_ID)
     panel = workspace.toolbarPanels.itemById(PANEL_ID)
@@ -196,13 +525,15 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
     # General logging for debug.
     futil.log(f'{CMD_NAME}: Palette incoming event.')
 
-    message_data: dict = json.loads(html_args.data)
+    receive_start = time.perf_counter()
+    message_data: dict = message_codec.loads(html_args.data)
     message_action = html_args.action
 
-    log_msg = f"Event received from {html_args.firingEvent.sender.name}\n"
-    log_msg += f"Action: {message_action}\n"
-    log_msg += f"Data: {message_data}"
-    futil.log(log_msg, adsk.core.LogLevels.InfoLogLevel)
+    # Only the size of the payload is logged; it can carry whole chat messages
+    futil.log(lambda: f"Event received from {html_args.firingEvent.sender.name}\n"
+                      f"Action: {message_action}\n"
+                      f"Data: {len(html_args.data)} bytes, keys: {list(message_data)}",
+              adsk.core.LogLevels.InfoLogLevel)
 
     # Handle commands from the palette
     if message_action == 'commandFromPalette':
@@ -211,31 +542,52 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
         
         try:
             result = execute_command(command, params)
-            html_args.returnData = json.dumps({
-                'success': True,
-                'message': result
-            })
+            # Batch commands return a summary message with per-item results
+            response = result if isinstance(result, dict) else {'message': result}
+            html_args.returnData = message_codec.dumps({'success': True, **response})
         except Exception as e:
             futil.log(f'Error executing command: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
-            html_args.returnData = json.dumps({
+            html_args.returnData = message_codec.dumps({
                 'success': False,
                 'message': str(e)
             })
     elif message_action == 'chatMessage':
         message = message_data.get('message', '')
-        history = message_data.get('history', [])
         
-        # Return immediately to prevent UI blocking
-        html_args.returnData = json.dumps({
-            'success': True,
-            'response': 'Thinking...',
-            'status': 'processing'
-        })
+        turn_timer = futil.start_turn_timer()
+        turn_timer.add_span('palette_receive', (time.perf_counter() - receive_start) * 1000, start=receive_start)
+        
+        # The palette only sends the new message; the history is owned on this side
+        conversation = history.get_conversation()
+        submitted_at = time.perf_counter()
         
-        # Process the chat message asynchronously in a separate thread
-        def process_chat_async():
+        # Process the chat message on the palette worker pool, after earlier turns of this session
+        def process_chat_async(turn):
+            turn_timer.add_span('turn_queue_wait', (time.perf_counter() - submitted_at) * 1000, start=submitted_at)
+            
+            # Built when the turn starts so it includes the results of the turns queued before it
+            conversation.append('user', message)
+            compaction_start = time.perf_counter()
+            chat_history, history_bytes = build_chat_history(conversation)
+            turn_timer.add_span('history_compaction', (time.perf_counter() - compaction_start) * 1000,
+                                start=compaction_start, **history_bytes)
+            
+            with turn_timer.activate():
+                response = process_chat_turn(chat_history)
+            
+            timings = turn_timer.finish()
+            record_turn_telemetry(conversation, message, chat_history, response, timings, turn.cancel_requested, history_bytes)
+            
+            # Push the stage breakdown of this turn to the palette's debug section
+            send_response_to_ui({
+                'action': 'turnTimings',
+                'timings': timings
+            })
+        
+        def process_chat_turn(chat_history):
+            response = None
             try:
-                response = send_chat_message(message, history)
+                response = send_chat_message(message, chat_history)
                 
                 # Handle the new response format with tool calls
                 if isinstance(response, dict):
@@ -245,6 +597,8 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
                     tool_outputs = response.get('tool_outputs', [])
                     execution_results = response.get('execution_results', [])
                     
+                    conversation.record_turn_results(execution_results, main_response)
+                    
                     # Send the response back to the UI asynchronously
                     send_response_to_ui({
                         'success': True,
@@ -254,6 +608,7 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
                     })
                 else:
                     # Legacy format (fallback)
+                    conversation.record_turn_results([], str(response))
                     send_response_to_ui({
                         'success': True,
                         'response': response
@@ -265,17 +620,95 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
                     'success': False,
                     'error': str(e)
                 })
+            
+            return response
+        
+        try:
+            turn, merged = turn_queue.submit(conversation.session_id, message, process_chat_async)
+        except PaletteQueueFull as e:
+            futil.log(f'Chat message refused: {str(e)}', adsk.core.LogLevels.WarningLogLevel)
+            html_args.returnData = message_codec.dumps({
+                'success': False,
+                'error': 'Too many messages are waiting; please wait for the current ones to finish'
+            })
+        else:
+            if merged:
+                futil.log(f'Duplicate chat message merged into {turn.turn_id}', adsk.core.LogLevels.InfoLogLevel)
+            
+            # Return immediately to prevent UI blocking
+            html_args.returnData = message_codec.dumps({
+                'success': True,
+                'response': 'Thinking...',
+                'status': 'processing',
+                'turn_id': turn.turn_id,
+                'merged': merged,
+                'queue': turn_queue.snapshot()
+            })
+    elif message_action == 'cancelTurn':
+        # Drop queued turns (or just turn_id) before they reach the backend. A running turn
+        # that matches is flagged instead; its remaining tool calls are skipped and running
+        # code sees cadzero_is_cancelled()
+        turn_id = message_data.get('turn_id')
+        cancelled = turn_queue.cancel(turn_id=turn_id)
         
-        # Start the async processing in a separate thread
-        thread = threading.Thread(target=process_chat_async, daemon=True)
-        thread.start()
+        futil.log(f'Turn cancel from palette: {turn_id or "all"}, {len(cancelled)} queued turns dropped', adsk.core.LogLevels.InfoLogLevel)
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'message': 'Cancelling current turn',
+            'cancelled_turns': [turn.turn_id for turn in cancelled]
+        })
+    elif message_action == 'clearHistory':
+        # Start a fresh conversation session
+        conversation = history.reset_conversation()
+        futil.log(f'Started new conversation session: {conversation.session_id}', adsk.core.LogLevels.InfoLogLevel)
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'session_id': conversation.session_id
+        })
+    elif message_action == 'getExecutionStats':
+        # Return main-thread execution and code cache metrics
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'executions': execution_registry.stats(),
+            'code_cache': compiled_code_cache.stats(),
+            'construction_cache': construction_cache.stats(),
+            'sandbox': exec_sandbox.stats(),
+            'palette_queue': palette_executor.stats(),
+            'turn_queue': turn_queue.stats(),
+            'json_backend': message_codec.BACKEND
+        })
+    elif message_action == 'exportTimings':
+        # Return the recorded per-stage timings of recent turns as JSON
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'timings': futil.export_turn_timings()
+        })
+    elif message_action == 'clearCodeCache':
+        # Drop compiled tool code, returning the stats gathered so far
+        stats = compiled_code_cache.stats()
+        compiled_code_cache.clear()
+        futil.log(f'Cleared compiled code cache: {stats}', adsk.core.LogLevels.InfoLogLevel)
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'stats': stats
+        })
+    elif message_action == 'resetSandbox':
+        # Rebuild the tool code namespaces (cached handles and cadzero_state) on next use
+        stats = exec_sandbox.stats()
+        exec_sandbox.reset()
+        futil.log(f'Reset exec sandbox: {stats}', adsk.core.LogLevels.InfoLogLevel)
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'stats': stats
+        })
     elif message_action == 'switchEndpoint':
         endpoint_type = message_data.get('endpoint', 'local')
         
         if endpoint_type == 'staging':
             config.current_endpoint = config.STAGING_ENDPOINT
             futil.log(f'Switched to staging endpoint: {config.STAGING_ENDPOINT}', adsk.core.LogLevels.InfoLogLevel)
-            html_args.returnData = json.dumps({
+            check_backend_status()
+            html_args.returnData = message_codec.dumps({
                 'success': True,
                 'endpoint': 'staging',
                 'url': config.STAGING_ENDPOINT
@@ -283,15 +716,23 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
         else:
             config.current_endpoint = config.LOCAL_ENDPOINT
             futil.log(f'Switched to local endpoint: {config.LOCAL_ENDPOINT}', adsk.core.LogLevels.InfoLogLevel)
-            html_args.returnData = json.dumps({
+            check_backend_status()
+            html_args.returnData = message_codec.dumps({
                 'success': True,
                 'endpoint': 'local',
                 'url': config.LOCAL_ENDPOINT
             })
+    elif message_action == 'getBackendStatus':
+        # Health and auth checks run concurrently on the async client; the result is pushed as backendStatus
+        check_backend_status()
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'status': 'processing'
+        })
     elif message_action == 'getEndpoint':
         # Return the current endpoint
         is_staging = config.current_endpoint == config.STAGING_ENDPOINT
-        html_args.returnData = json.dumps({
+        html_args.returnData = message_codec.dumps({
             'success': True,
             'endpoint': 'staging' if is_staging else 'local',
             'url': config.current_endpoint
@@ -301,17 +742,23 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
         try:
             futil.log('Initiating sign-in flow...', adsk.core.LogLevels.InfoLogLevel)
             
+            # Binds the callback server and opens the browser; only waiting for the user happens in the thread
+            signin_server = auth.begin_clerk_signin()
+            
             # Return immediately to not block the UI
-            html_args.returnData = json.dumps({
+            html_args.returnData = message_codec.dumps({
                 'success': True,
                 'message': 'Opening browser for authentication...',
-                'status': 'processing'
+                'status': 'processing',
+                'auth_url': signin_server.auth_url
             })
             
-            # Start sign-in in a separate thread
+            # Wait for the callback in a separate thread
             def sign_in_async():
                 try:
-                    success = auth.initiate_clerk_signin()
+                    success = auth.complete_clerk_signin(signin_server)
+                    telemetry.record_event('auth', action='sign_in', success=bool(success), endpoint=config.current_endpoint,
+                                           cancelled=signin_server.cancelled)
                     
                     if success:
                         user = auth.get_current_user()
@@ -324,6 +771,14 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
                             'message': 'Successfully signed in',
                             'user': user
                         })
+                    elif signin_server.cancelled:
+                        futil.log('Sign-in cancelled', adsk.core.LogLevels.InfoLogLevel)
+                        send_response_to_ui({
+                            'action': 'authComplete',
+                            'success': False,
+                            'cancelled': True,
+                            'message': 'Sign-in was cancelled'
+                        })
                     else:
                         futil.log('Sign-in failed', adsk.core.LogLevels.WarningLogLevel)
                         
@@ -331,10 +786,11 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
                         send_response_to_ui({
                             'action': 'authComplete',
                             'success': False,
-                            'message': 'Sign-in failed or was cancelled'
+                            'message': 'Sign-in failed or timed out'
                         })
                 except Exception as e:
                     futil.log(f'Sign-in error: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
+                    telemetry.record_event('auth', action='sign_in', success=False, endpoint=config.current_endpoint, error=str(e))
                     
                     # Send error response back to UI
                     send_response_to_ui({
@@ -343,28 +799,38 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
                         'message': f'Sign-in error: {str(e)}'
                     })
             
-            # Start async thread
-            thread = threading.Thread(target=sign_in_async, daemon=True)
-            thread.start()
+            # Wait for the callback on the palette worker pool
+            palette_executor.submit(sign_in_async)
             
         except Exception as e:
             futil.log(f'Sign-in error: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
-            html_args.returnData = json.dumps({
+            html_args.returnData = message_codec.dumps({
                 'success': False,
                 'message': f'Sign-in error: {str(e)}'
             })
+    elif message_action == 'cancelSignIn':
+        # Stop waiting for the browser callback; the sign-in thread reports the cancellation
+        cancelled = auth.cancel_signin()
+        futil.log(f'Cancel sign-in requested (in progress: {cancelled})', adsk.core.LogLevels.InfoLogLevel)
+        html_args.returnData = message_codec.dumps({
+            'success': True,
+            'cancelled': cancelled
+        })
     elif message_action == 'signOut':
         # Handle sign-out request
         try:
             auth.sign_out()
-            html_args.returnData = json.dumps({
+            turn_queue.cancel()
+            history.reset_conversation()
+            telemetry.record_event('auth', action='sign_out', success=True, endpoint=config.current_endpoint)
+            html_args.returnData = message_codec.dumps({
                 'success': True,
                 'message': 'Successfully signed out'
             })
             futil.log('User signed out', adsk.core.LogLevels.InfoLogLevel)
         except Exception as e:
             futil.log(f'Sign-out error: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
-            html_args.returnData = json.dumps({
+            html_args.returnData = message_codec.dumps({
                 'success': False,
                 'message': f'Sign-out error: {str(e)}'
             })
@@ -372,13 +838,13 @@ def palette_incoming(html_args: adsk.core.HTMLEventArgs):
         # Return current authentication status
         try:
             user = auth.get_current_user()
-            html_args.returnData = json.dumps({
+            html_args.returnData = message_codec.dumps({
                 'success': True,
                 'user': user
             })
         except Exception as e:
             futil.log(f'Error getting auth status: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
-            html_args.returnData = json.dumps({
+            html_args.returnData = message_codec.dumps({
                 'success': False,
                 'message': f'Error: {str(e)}'
             })
@@ -400,11 +866,9 @@ def send_response_to_ui(response_data):
             # Extract action from response data, default to chatResponse for backward compatibility
             action = response_data.get('action', 'chatResponse')
             
-            # Create a copy of the data without the action key
-            data_to_send = {k: v for k, v in response_data.items() if k != 'action'}
-            
-            # Send the response data to the UI
-            palette.sendInfoToHTML(action, json.dumps(data_to_send))
+            # Send the response data to the UI as is; the palette ignores the extra action key
+            with futil.current_turn_timer().span('ui_push', action=action):
+                palette.sendInfoToHTML(action, message_codec.dumps(response_data))
             futil.log(f'Sent {action} to UI', adsk.core.LogLevels.InfoLogLevel)
         else:
             futil.log('Palette not found, cannot send response to UI', adsk.core.LogLevels.ErrorLogLevel)
@@ -413,9 +877,46 @@ def send_response_to_ui(response_data):
         futil.log(f'Error sending response to UI: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
 
 
+def check_backend_status():
+    """Check endpoint health and token acceptance in the background and push the result to the palette."""
+    def on_status(status, error):
+        if error is not None:
+            futil.log(f'Backend status check failed: {str(error)}', adsk.core.LogLevels.WarningLogLevel)
+            status = {'endpoint': config.current_endpoint, 'error': str(error)}
+        send_response_to_ui(dict(status, action='backendStatus'))
+    
+    async_client.submit(async_client.client.backend_status(), callback=on_status)
+
+
+def push_turn_status(turn, queue):
+    """Tell the palette a chat turn changed state (queued / sending / executing / done / cancelled)."""
+    send_response_to_ui(dict(turn.to_dict(), action='turnStatus', queue=queue))
+
+
+def mark_turn_executing():
+    """Move the current chat turn to the executing state once its tool calls start."""
+    if turn_queue:
+        turn_queue.mark_executing()
+
+
+def is_turn_cancelled():
+    """Whether the running chat turn was cancelled from the palette (or the add-in is stopping)."""
+    turn = turn_queue.running_turn() if turn_queue else None
+    return turn is not None and turn.cancel_requested
+
+
+def notify_reauth_required(reason):
+    """Tell the palette the session can't be refreshed and the user has to sign in again."""
+    futil.log(f'Re-authentication required: {reason}', adsk.core.LogLevels.WarningLogLevel)
+    send_response_to_ui({
+        'action': 'authExpired',
+        'message': reason
+    })
+
+
 def execute_command(command, params):
     """Execute a command from the palette"""
-    futil.log(f'Executing command: {command} with params: {params}')
+    futil.log(lambda: f'Executing command: {command} with params: {params}')
     
     # Get the active design and root component
     des = app.activeProduct
@@ -426,6 +927,10 @@ def execute_command(command, params):
     if not root:
         return "No root component"
     
+    # mode 'direct' builds plain B-Rep bodies instead of sketches and features
+    if params.get('mode') == 'direct' and command in PRIMITIVE_COMMANDS:
+        return create_primitives_direct_command(root, command, params)
+    
     # Execute based on command type
     if command == 'createBox':
         return create_box(root, params)
@@ -435,10 +940,22 @@ def execute_command(command, params):
         return create_sphere(root, params)
     elif command == 'createCone':
         return create_cone(root, params)
+    elif command == 'createPrimitives':
+        return create_primitives(root, params)
     else:
         return f"Unknown command: {command}"
 
 
+def create_primitives_direct_command(root, command, params):
+    """Run a primitive command in direct mode"""
+    if command == 'createPrimitives':
+        return create_primitives_direct(root, params)
+    
+    spec = dict(params, type=PRIMITIVE_COMMANDS[command])
+    result = create_primitives_direct(root, {'primitives': [spec]})['results'][0]
+    return result['message'] if result['success'] else result['error']
+
+
 def create_box(root, params):
     """Create a box primitive"""
     try:
@@ -507,33 +1024,8 @@ def create_sphere(root, params):
     try:
         radius = params.get('radius', 5)
         
-        # Create a sketch on the X-Y plane
-        sketch = root.sketches.add(root.xYConstructionPlane)
-        
-        # Create a circle
-        circles = sketch.sketchCurves.sketchCircles
-        circle = circles.addByCenterRadius(adsk.core.Point3D.create(0, 0, 0), radius)
-        
-        # Get the profile
-        prof = sketch.profiles.item(0)
-        
-        # Create revolve input
-        revolves = root.features.revolveFeatures
-        rev_input = revolves.createInput(
-            prof,
-            adsk.fusion.FeatureOperations.NewBodyFeatureOperation
-        )
-        
-        # Create an axis for the revolve (Y-axis)
-        axis = root.constructionAxes.createByTwoPoints(
-            adsk.core.Point3D.create(0, -radius, 0),
-            adsk.core.Point3D.create(0, radius, 0)
-        )
-        rev_input.setAngleExtent(False, adsk.core.ValueInput.createByString('360 deg'))
-        rev_input.participantBodies = [axis]
-        
-        # Create the revolved body
-        revolves.add(rev_input)
+        # Revolve a half disk about the Y axis
+        revolve_about_y_axis(root, {'type': 'sphere', 'x': 0, 'y': 0, 'radius': radius})
         
         return f"Created sphere: r={radius}"
     except Exception as e:
@@ -547,242 +1039,1172 @@ def create_cone(root, params):
         bottom_radius = params.get('bottomRadius', 5)
         height = params.get('height', 10)
         
-        # Create a sketch on the X-Y plane
-        sketch = root.sketches.add(root.xYConstructionPlane)
+        # Revolve the half profile (base, slanted side, top) about the Y axis
+        revolve_about_y_axis(root, {
+            'type': 'cone', 'x': 0, 'y': 0,
+            'topRadius': top_radius, 'bottomRadius': bottom_radius, 'height': height
+        })
+        
+        return f"Created cone: top_r={top_radius}, bottom_r={bottom_radius}, h={height}"
+    except Exception as e:
+        return f"Error creating cone: {str(e)}"
+
+
+def revolve_about_y_axis(root, item):
+    """Sketch a primitive's half profile against the Y axis and revolve it about the component's own Y axis.
+
+    Only the sketch and the revolve are added; no construction geometry is created.
+    """
+    sketch = root.sketches.add(root.xYConstructionPlane)
+    draw_primitive_profile(sketch, item)
+    
+    revolves = root.features.revolveFeatures
+    rev_input = revolves.createInput(
+        sketch.profiles.item(0),
+        root.yConstructionAxis,
+        adsk.fusion.FeatureOperations.NewBodyFeatureOperation
+    )
+    rev_input.setAngleExtent(False, adsk.core.ValueInput.createByString('360 deg'))
+    
+    return revolves.add(rev_input)
+
+
+# Defaults for createPrimitives specs; the same as the single-primitive commands
+PRIMITIVE_DEFAULTS = {
+    'box': {'length': 10, 'width': 10, 'height': 10},
+    'cylinder': {'radius': 5, 'height': 10},
+    'sphere': {'radius': 5},
+    'cone': {'topRadius': 2, 'bottomRadius': 5, 'height': 10}
+}
+
+# Palette commands that create primitives -> primitive type ('createPrimitives' takes a list)
+PRIMITIVE_COMMANDS = {
+    'createBox': 'box',
+    'createCylinder': 'cylinder',
+    'createSphere': 'sphere',
+    'createCone': 'cone',
+    'createPrimitives': None
+}
+
+# Kinds made by extruding their sketch profile; the others are revolved
+EXTRUDED_PRIMITIVES = ('box', 'cylinder')
+
+
+def create_primitives(root, params):
+    """Create many primitives with as few sketches and features as possible.
+
+    params['primitives'] is a list of specs such as
+    {'type': 'cylinder', 'position': [x, y, z], 'radius': 0.3, 'height': 1}.
+    Positions are the box corner, the cylinder base center, the sphere center and
+    the cone base center (cones point along +Y, like createCone).
+
+    Profiles of one kind at the same Z share a sketch (overlapping ones move to
+    another sketch), boxes and cylinders of the same height become one
+    multi-profile extrude, and spheres and cones are revolved about their own
+    axis line. Returns a summary and one result per spec, in order.
+    With mode 'direct', execute_command uses create_primitives_direct instead.
+    """
+    specs = params.get('primitives') or []
+    results = [None] * len(specs)
+    groups = OrderedDict()  # (kind, z) -> [(index, spec)]
+    
+    for index, spec in enumerate(specs):
+        try:
+            item = normalize_primitive_spec(spec)
+        except (TypeError, ValueError) as e:
+            kind = spec.get('type') if isinstance(spec, dict) else None
+            results[index] = {'index': index, 'type': kind, 'success': False, 'error': str(e)}
+            continue
+        groups.setdefault((item['type'], item['z']), []).append((index, item))
+    
+    planes = {}  # z -> sketch plane
+    sketch_count = 0
+    feature_count = 0
+    
+    for (kind, z), items in groups.items():
+        for sketch_items in split_overlapping_primitives(items):
+            try:
+                if z not in planes:
+                    planes[z] = get_offset_xy_plane(root, z)
+                sketch = root.sketches.add(planes[z])
+                sketch_count += 1
+                
+                # Draw every profile before the sketch solves them
+                sketch.isComputeDeferred = True
+                try:
+                    axes = {index: draw_primitive_profile(sketch, item) for index, item in sketch_items}
+                finally:
+                    sketch.isComputeDeferred = False
+                
+                profiles = match_primitive_profiles(sketch, sketch_items)
+            except Exception as e:
+                for index, item in sketch_items:
+                    results[index] = primitive_result(index, item, error=f'Error sketching {kind}: {str(e)}')
+                continue
+            
+            if kind in EXTRUDED_PRIMITIVES:
+                feature_count += extrude_primitive_group(root, sketch_items, profiles, results)
+            else:
+                feature_count += revolve_primitive_group(root, sketch_items, profiles, axes, results)
+    
+    created = sum(1 for result in results if result and result['success'])
+    futil.log(f'createPrimitives: {created}/{len(specs)} created with {feature_count} features in {sketch_count} sketches',
+              adsk.core.LogLevels.InfoLogLevel)
+    
+    return {
+        'message': f'Created {created} of {len(specs)} primitives ({feature_count} features, {sketch_count} sketches)',
+        'results': results,
+        'features': feature_count,
+        'sketches': sketch_count
+    }
+
+
+def normalize_primitive_spec(spec):
+    """Validate a createPrimitives spec and fill in defaults. Raises ValueError for bad specs."""
+    if not isinstance(spec, dict):
+        raise ValueError('Primitive spec must be an object')
+    
+    kind = str(spec.get('type', '')).lower()
+    if kind not in PRIMITIVE_DEFAULTS:
+        raise ValueError(f"Unknown primitive type: {spec.get('type')}")
+    
+    position = spec.get('position') or [0, 0, 0]
+    if isinstance(position, dict):
+        position = [position.get('x', 0), position.get('y', 0), position.get('z', 0)]
+    x, y, z = (list(position) + [0, 0, 0])[:3]
+    
+    item = {'type': kind, 'x': float(x), 'y': float(y), 'z': float(z)}
+    for name, default in PRIMITIVE_DEFAULTS[kind].items():
+        value = float(spec.get(name, default))
+        # A cone may come to a point
+        if value < 0 or (value == 0 and name != 'topRadius'):
+            raise ValueError(f'{kind} {name} must be positive, got {value}')
+        item[name] = value
+    
+    return item
+
+
+def primitive_footprint(item):
+    """Get the (min_x, min_y, max_x, max_y) area a primitive's profile covers in its sketch"""
+    x, y = item['x'], item['y']
+    kind = item['type']
+    
+    if kind == 'box':
+        return x, y, x + item['length'], y + item['width']
+    if kind == 'cylinder':
+        r = item['radius']
+        return x - r, y - r, x + r, y + r
+    if kind == 'sphere':
+        # Half disk right of the revolve axis
+        r = item['radius']
+        return x, y - r, x + r, y + r
+    # Cone: half profile right of the revolve axis
+    return x, y, x + max(item['bottomRadius'], item['topRadius']), y + item['height']
+
+
+def split_overlapping_primitives(items):
+    """Split items into groups whose profiles don't touch, so each sketch profile belongs to one item"""
+    groups = []  # [(items, footprints)]
+    
+    for index, item in items:
+        footprint = primitive_footprint(item)
+        for group_items, footprints in groups:
+            if not any(footprints_touch(footprint, other) for other in footprints):
+                group_items.append((index, item))
+                footprints.append(footprint)
+                break
+        else:
+            groups.append(([(index, item)], [footprint]))
+    
+    return [group_items for group_items, _ in groups]
+
+
+def footprints_touch(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def get_offset_xy_plane(root, z):
+    """Get the X-Y construction plane, or a construction plane offset from it by z (created once per component)"""
+    if z == 0:
+        return root.xYConstructionPlane
+    
+    def create_plane():
+        planes = root.constructionPlanes
+        plane_input = planes.createInput()
+        plane_input.setByOffset(root.xYConstructionPlane, adsk.core.ValueInput.createByReal(z))
+        return planes.add(plane_input)
+    
+    return construction_cache.get(root, ('offset_xy_plane', z), create_plane)
+
+
+def draw_primitive_profile(sketch, item):
+    """Draw a primitive's profile in the sketch. Returns the revolve axis line, if the kind has one"""
+    x, y = item['x'], item['y']
+    kind = item['type']
+    lines = sketch.sketchCurves.sketchLines
+    point = adsk.core.Point3D.create
+    
+    if kind == 'box':
+        lines.addTwoPointRectangle(point(x, y, 0), point(x + item['length'], y + item['width'], 0))
+        return None
+    
+    if kind == 'cylinder':
+        sketch.sketchCurves.sketchCircles.addByCenterRadius(point(x, y, 0), item['radius'])
+        return None
+    
+    if kind == 'sphere':
+        r = item['radius']
+        sketch.sketchCurves.sketchArcs.addByThreePoints(point(x, y - r, 0), point(x + r, y, 0), point(x, y + r, 0))
+        return lines.addByTwoPoints(point(x, y + r, 0), point(x, y - r, 0))
+    
+    # Cone
+    h = item['height']
+    bottom_radius, top_radius = item['bottomRadius'], item['topRadius']
+    lines.addByTwoPoints(point(x, y, 0), point(x + bottom_radius, y, 0))
+    if top_radius > 0:
+        lines.addByTwoPoints(point(x + bottom_radius, y, 0), point(x + top_radius, y + h, 0))
+        lines.addByTwoPoints(point(x + top_radius, y + h, 0), point(x, y + h, 0))
+    else:
+        lines.addByTwoPoints(point(x + bottom_radius, y, 0), point(x, y + h, 0))
+    return lines.addByTwoPoints(point(x, y + h, 0), point(x, y, 0))
+
+
+def match_primitive_profiles(sketch, items):
+    """Map item index -> its sketch profile, by which footprint contains the profile's center"""
+    footprints = [(index, primitive_footprint(item)) for index, item in items]
+    profiles = {}
+    
+    for profile in sketch.profiles:
+        box = profile.boundingBox
+        cx = (box.minPoint.x + box.maxPoint.x) / 2
+        cy = (box.minPoint.y + box.maxPoint.y) / 2
+        for index, (min_x, min_y, max_x, max_y) in footprints:
+            if min_x < cx < max_x and min_y < cy < max_y:
+                profiles[index] = profile
+                break
+    
+    return profiles
+
+
+def create_primitives_direct(root, params):
+    """Create primitives as plain B-Rep bodies, without sketches or parametric features.
+
+    Takes the same specs as create_primitives. The bodies are built with the
+    TemporaryBRepManager and added in a single base feature edit (or directly in
+    a direct-modeling design), so the timeline grows by at most one entry and
+    there is no sketch/feature history to recompute later.
+    """
+    specs = params.get('primitives') or []
+    results = [None] * len(specs)
+    bodies = []  # (index, item, temporary body)
+    brep = adsk.fusion.TemporaryBRepManager.get()
+    
+    for index, spec in enumerate(specs):
+        try:
+            item = normalize_primitive_spec(spec)
+        except (TypeError, ValueError) as e:
+            kind = spec.get('type') if isinstance(spec, dict) else None
+            results[index] = {'index': index, 'type': kind, 'success': False, 'error': str(e)}
+            continue
+        
+        try:
+            bodies.append((index, item, build_temporary_primitive(brep, item)))
+        except Exception as e:
+            results[index] = primitive_result(index, item, error=f"Error creating {item['type']}: {str(e)}")
+    
+    base_feature = None
+    if bodies and root.parentDesign.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        # Bodies can only be added to a parametric design inside a base feature
+        base_feature = root.features.baseFeatures.add()
+        base_feature.startEdit()
+    
+    try:
+        for index, item, body in bodies:
+            try:
+                if base_feature:
+                    root.bRepBodies.add(body, base_feature)
+                else:
+                    root.bRepBodies.add(body)
+                results[index] = primitive_result(index, item, base_feature)
+            except Exception as e:
+                results[index] = primitive_result(index, item, error=f"Error adding {item['type']}: {str(e)}")
+    finally:
+        if base_feature:
+            base_feature.finishEdit()
+    
+    created = sum(1 for result in results if result and result['success'])
+    futil.log(f'createPrimitives (direct): {created}/{len(specs)} bodies created', adsk.core.LogLevels.InfoLogLevel)
+    
+    return {
+        'message': f'Created {created} of {len(specs)} primitives as direct bodies',
+        'results': results,
+        'features': 1 if base_feature else 0,
+        'sketches': 0
+    }
+
+
+def build_temporary_primitive(brep, item):
+    """Build a primitive as a temporary B-Rep body, placed like create_primitives places it"""
+    x, y, z = item['x'], item['y'], item['z']
+    kind = item['type']
+    point = adsk.core.Point3D.create
+    
+    if kind == 'box':
+        length, width, height = item['length'], item['width'], item['height']
+        box = adsk.core.OrientedBoundingBox3D.create(
+            point(x + length / 2, y + width / 2, z + height / 2),
+            adsk.core.Vector3D.create(1, 0, 0),
+            adsk.core.Vector3D.create(0, 1, 0),
+            length, width, height
+        )
+        return brep.createBox(box)
+    
+    if kind == 'cylinder':
+        radius = item['radius']
+        return brep.createCylinderOrCone(point(x, y, z), radius, point(x, y, z + item['height']), radius)
+    
+    if kind == 'sphere':
+        return brep.createSphere(point(x, y, z), item['radius'])
+    
+    # Cone, pointing along +Y like createCone
+    return brep.createCylinderOrCone(point(x, y, z), item['bottomRadius'], point(x, y + item['height'], z), item['topRadius'])
+
+
+def primitive_result(index, item, feature=None, error=None):
+    """Per-item result of createPrimitives"""
+    if error:
+        return {'index': index, 'type': item['type'], 'success': False, 'error': error}
+    
+    kind = item['type']
+    if kind == 'box':
+        message = f"Created box: {item['length']}x{item['width']}x{item['height']}"
+    elif kind == 'cylinder':
+        message = f"Created cylinder: r={item['radius']}, h={item['height']}"
+    elif kind == 'sphere':
+        message = f"Created sphere: r={item['radius']}"
+    else:
+        message = f"Created cone: top_r={item['topRadius']}, bottom_r={item['bottomRadius']}, h={item['height']}"
+    
+    return {'index': index, 'type': kind, 'success': True, 'message': message, 'feature': feature.name if feature else None}
+
+
+def extrude_primitive_group(root, items, profiles, results):
+    """Extrude all profiles of the same height with one feature. Returns the number of features created."""
+    by_height = OrderedDict()
+    for index, item in items:
+        if index in profiles:
+            by_height.setdefault(item['height'], []).append((index, item))
+        else:
+            results[index] = primitive_result(index, item, error='Profile not found in sketch')
+    
+    extrudes = root.features.extrudeFeatures
+    feature_count = 0
+    
+    for height, height_items in by_height.items():
+        try:
+            collection = adsk.core.ObjectCollection.create()
+            for index, _ in height_items:
+                collection.add(profiles[index])
+            
+            ext_input = extrudes.createInput(collection, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+            ext_input.setDistanceExtent(False, adsk.core.ValueInput.createByReal(height))
+            feature = extrudes.add(ext_input)
+            feature_count += 1
+            
+            for index, item in height_items:
+                results[index] = primitive_result(index, item, feature)
+        except Exception as e:
+            for index, item in height_items:
+                results[index] = primitive_result(index, item, error=f"Error creating {item['type']}: {str(e)}")
+    
+    return feature_count
+
+
+def revolve_primitive_group(root, items, profiles, axes, results):
+    """Revolve each profile about its own axis line. Returns the number of features created."""
+    revolves = root.features.revolveFeatures
+    feature_count = 0
+    
+    for index, item in items:
+        if index not in profiles:
+            results[index] = primitive_result(index, item, error='Profile not found in sketch')
+            continue
         
-        # Create the cone profile using sketch lines
-        lines = sketch.sketchCurves.sketchLines
-        point1 = adsk.core.Point3D.create(0, 0, 0)
-        point2 = adsk.core.Point3D.create(bottom_radius, 0, 0)
-        point3 = adsk.core.Point3D.create(top_radius, height, 0)
-        point4 = adsk.core.Point3D.create(0, height, 0)
+        try:
+            rev_input = revolves.createInput(profiles[index], axes[index], adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
+            rev_input.setAngleExtent(False, adsk.core.ValueInput.createByString('360 deg'))
+            feature = revolves.add(rev_input)
+            feature_count += 1
+            results[index] = primitive_result(index, item, feature)
+        except Exception as e:
+            results[index] = primitive_result(index, item, error=f"Error creating {item['type']}: {str(e)}")
+    
+    return feature_count
+
+
+def complete_python_execution(execution_id, result):
+    """Hand a main-thread execution result to the worker thread waiting on it."""
+    if not execution_registry.complete(execution_id, result):
+        # The waiting side already gave up (timeout), the result is dropped
+        futil.log(lambda: f'Dropping late result for execution (ID: {execution_id}): {execution_registry.stats()}', adsk.core.LogLevels.WarningLogLevel)
+
+
+def run_python_code(python_code, is_cancelled=lambda: False):
+    """Execute generated Python code in the main thread and capture its result.
+
+    Long-running generated code can poll cadzero_is_cancelled() or call
+    cadzero_check_cancelled() to stop early when its turn is cancelled or timed out.
+
+    Returns the per-execution result dict that is handed back to the worker thread.
+    """
+    def check_cancelled():
+        if is_cancelled():
+            raise ExecutionCancelled('Execution cancelled')
+    
+    # Prepare the execution environment from the active document's prebuilt namespace
+    exec_globals = exec_sandbox.namespace()
+    exec_globals.update({
+        '__cadzero_result__': None,  # Variable to capture result from Python code
+        'cadzero_is_cancelled': is_cancelled,
+        'cadzero_check_cancelled': check_cancelled
+    })
+    
+    started_at = time.perf_counter()
+    try:
+        exec(compiled_code_cache.get(python_code), exec_globals)
+    except ExecutionCancelled:
+        futil.log('Custom event handler: Python code stopped after cancellation', adsk.core.LogLevels.WarningLogLevel)
+        return dict(CANCELLED_RESULT)
+    except Exception as e:
+        error_details = traceback.format_exc()
+        futil.log(f'Custom event handler error: {error_details}', adsk.core.LogLevels.ErrorLogLevel)
         
-        line1 = lines.addByTwoPoints(point1, point2)
-        line2 = lines.addByTwoPoints(point2, point3)
-        line3 = lines.addByTwoPoints(point3, point4)
-        line4 = lines.addByTwoPoints(point4, point1)
+        error_message = f'Error executing Python code: {str(e)}\n\nDetails:\n{error_details}'
+        return {
+            'success': False,
+            'message': error_message,
+            'result': error_message,  # Include error as result so it shows in chat
+            'error': error_details,
+            'timings': {
+                'started_at': started_at,
+                'exec_ms': (time.perf_counter() - started_at) * 1000
+            }
+        }
+    
+    # Capture result from Python code if it was set
+    captured_result = exec_globals.get('__cadzero_result__')
+    
+    return {
+        'success': True,
+        'message': 'Python code executed successfully',
+        'result': captured_result if captured_result is not None else 'Execution completed',
+        'error': None,
+        'timings': {
+            'started_at': started_at,
+            'exec_ms': (time.perf_counter() - started_at) * 1000
+        }
+    }
+
+
+def run_python_batch(steps, do_events_every=0, is_cancelled=lambda: False, on_step_done=lambda result: None):
+    """Execute an ordered list of Python code steps back to back in the main thread.
+
+    Arguments:
+    steps -- List of dicts with 'python_code', 'tool_name' and optionally 'timeout' (seconds).
+    do_events_every -- Call adsk.doEvents() after every N steps. 0 only calls it once at the end.
+    is_cancelled -- Callable checked before each step; remaining steps are skipped once it returns True.
+    on_step_done -- Called with each step's result as soon as the step finishes.
+
+    A step still running when its own timeout passes sees cadzero_is_cancelled() and is
+    reported as timed out; the steps after it keep their own budgets.
+    """
+    step_results = []
+    
+    for index, step in enumerate(steps):
+        if is_cancelled():
+            step_result = dict(CANCELLED_RESULT)
+        elif not step.get('python_code', ''):
+            step_result = {
+                'success': False,
+                'message': 'No Python code provided',
+                'error': None
+            }
+        else:
+            futil.log(f'Custom event handler: Executing batch step {index+1}/{len(steps)}: {step.get("tool_name", "unknown")}', adsk.core.LogLevels.InfoLogLevel)
+            
+            timeout = step.get('timeout')
+            deadline = time.monotonic() + timeout if timeout else None
+            past_deadline = lambda: deadline is not None and time.monotonic() > deadline
+            step_result = run_python_code(step['python_code'], lambda: is_cancelled() or past_deadline())
+            if step_result.get('cancelled') and not is_cancelled():
+                step_result = dict(TIMED_OUT_RESULT, timings=step_result.get('timings', {}))
+            
+            if do_events_every and (index + 1) % do_events_every == 0 and index + 1 < len(steps):
+                adsk.doEvents()
         
-        # Get the profile
-        prof = sketch.profiles.item(0)
+        step_results.append(step_result)
+        on_step_done(step_result)
+    
+    return step_results
+
+
+class DeferredCompute:
+    """Context manager that defers compute of the active design while a batch of steps runs.
+
+    Sets Design.isComputeDeferred where the running Fusion API has it and puts the
+    previous value back on exit, also when a step raised. The design then computes
+    once, which is timed; every step but the last would otherwise have paid for a
+    compute of about the same cost, which gives the estimated time saved.
+    """
+    
+    # Set once the missing Design.isComputeDeferred of this Fusion build has been logged
+    unsupported_logged = False
+    
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.design = None
+        self.compute_ms = 0.0
+        self.steps = 0  # tool calls run under a streamed turn's deferral
+    
+    def __enter__(self):
+        if not self.enabled:
+            return self
         
-        # Create revolve input
-        revolves = root.features.revolveFeatures
-        rev_input = revolves.createInput(
-            prof,
-            adsk.fusion.FeatureOperations.NewBodyFeatureOperation
-        )
+        design = adsk.fusion.Design.cast(app.activeProduct)
+        if not design:
+            return self
         
-        # Create an axis for the revolve
-        axis = root.constructionAxes.createByTwoPoints(
-            point1,
-            point4
-        )
-        rev_input.setAngleExtent(False, adsk.core.ValueInput.createByString('360 deg'))
-        rev_input.participantBodies = [axis]
+        if not hasattr(design, 'isComputeDeferred'):
+            if not DeferredCompute.unsupported_logged:
+                DeferredCompute.unsupported_logged = True
+                futil.log('Design.isComputeDeferred is not available in this Fusion version; tool steps compute one by one',
+                          adsk.core.LogLevels.InfoLogLevel)
+            return self
         
-        # Create the revolved body
-        revolves.add(rev_input)
+        if not design.isComputeDeferred:
+            design.isComputeDeferred = True
+            self.design = design
+        return self
+    
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if self.design is None:
+            return False
         
-        return f"Created cone: top_r={top_radius}, bottom_r={bottom_radius}, h={height}"
-    except Exception as e:
-        return f"Error creating cone: {str(e)}"
+        compute_start = time.perf_counter()
+        try:
+            self.design.isComputeDeferred = False
+        except Exception as e:
+            futil.log(f'Failed to restore design compute: {str(e)}', adsk.core.LogLevels.ErrorLogLevel)
+        self.compute_ms = (time.perf_counter() - compute_start) * 1000
+        return False
+    
+    def report(self, steps):
+        """Get the deferral summary added to the batch timings"""
+        return {
+            'active': self.design is not None,
+            'steps': steps,
+            'compute_ms': self.compute_ms,
+            'estimated_saved_ms': self.compute_ms * max(steps - 1, 0) if self.design is not None else 0.0
+        }
+
+
+def begin_stream_deferred_compute():
+    """Defer compute for a streamed turn's tool calls until end_stream_deferred_compute() (main thread)."""
+    global stream_deferred_compute
+    if stream_deferred_compute is None:
+        stream_deferred_compute = DeferredCompute().__enter__()
+    stream_deferred_compute.steps += 1
+
+
+def end_stream_deferred_compute():
+    """Let the design compute after a streamed turn's tool calls (main thread). Returns the deferral report."""
+    global stream_deferred_compute
+    deferred_compute, stream_deferred_compute = stream_deferred_compute, None
+    if deferred_compute is None:
+        return DeferredCompute(enabled=False).report(0)
+    
+    deferred_compute.__exit__(None, None, None)
+    return deferred_compute.report(deferred_compute.steps)
 
 
 def custom_event_handler(args: adsk.core.CustomEventArgs):
     """Handle custom event to execute Python code in the main thread."""
-    global python_execution_results
+    execution_id = None
     
     try:
         # Parse the event data
-        event_data = json.loads(args.additionalInfo)
+        event_data = message_codec.loads(args.additionalInfo)
         execution_id = event_data.get('execution_id')
+        steps = event_data.get('steps')
         python_code = event_data.get('python_code', '')
         
-        futil.log(f'Custom event handler: Executing Python code (ID: {execution_id})', adsk.core.LogLevels.InfoLogLevel)
+        if event_data.get('end_deferred_compute'):
+            # Always runs, also for a cancelled or timed-out turn, so the design isn't left deferred
+            deferred_compute = end_stream_deferred_compute()
+            do_events_start = time.perf_counter()
+            adsk.doEvents()
+            complete_python_execution(execution_id, {
+                'success': True,
+                'message': 'Deferred compute ended',
+                'error': None,
+                'timings': {
+                    'do_events_ms': (time.perf_counter() - do_events_start) * 1000,
+                    'deferred_compute': deferred_compute
+                }
+            })
+            return
         
-        if not python_code:
-            python_execution_results[execution_id] = {
+        if steps is None and not python_code:
+            complete_python_execution(execution_id, {
                 'success': False,
                 'message': 'No Python code provided',
                 'error': None
-            }
+            })
+            return
+        
+        # Cancelled by the palette, or the waiter already timed out: don't start
+        cancel_event = execution_registry.get_cancel_event(execution_id)
+        is_cancelled = lambda: cancel_event.is_set() or is_turn_cancelled()
+        if is_cancelled():
+            futil.log(f'Custom event handler: Skipping cancelled execution (ID: {execution_id})', adsk.core.LogLevels.WarningLogLevel)
+            complete_python_execution(execution_id, dict(CANCELLED_RESULT))
             return
         
         # Make sure a command isn't running before changes are made (per Fusion docs)
         if ui.activeCommand != 'SelectCommand':
             ui.commandDefinitions.itemById('SelectCommand').execute()
         
-        # Prepare the execution environment
-        exec_globals = {
-            'adsk': adsk,
-            'app': app,
-            'ui': ui,
-            '__name__': '__main__',
-            '__cadzero_result__': None  # Variable to capture result from Python code
-        }
+        if steps is not None:
+            futil.log(f'Custom event handler: Executing batch of {len(steps)} steps (ID: {execution_id})', adsk.core.LogLevels.InfoLogLevel)
+            
+            # The design computes once when the batch ends (or fails) instead of after every step
+            with DeferredCompute(event_data.get('defer_compute', False)) as deferred_compute:
+                step_results = run_python_batch(
+                    steps, event_data.get('do_events_every', 0), is_cancelled,
+                    lambda step_result: execution_registry.record_progress(execution_id, step_result)
+                )
+            
+            # Allow Fusion to process messages and update display once for the whole batch
+            do_events_start = time.perf_counter()
+            adsk.doEvents()
+            
+            complete_python_execution(execution_id, {
+                'success': True,
+                'message': 'Python batch executed',
+                'steps': step_results,
+                'error': None,
+                'timings': {
+                    'do_events_ms': (time.perf_counter() - do_events_start) * 1000,
+                    'deferred_compute': deferred_compute.report(len(steps))
+                }
+            })
+            
+            futil.log(f'Custom event handler: Python batch executed (ID: {execution_id})', adsk.core.LogLevels.InfoLogLevel)
+            return
+        
+        futil.log(f'Custom event handler: Executing Python code (ID: {execution_id})', adsk.core.LogLevels.InfoLogLevel)
+        
+        # A streamed turn's tool calls arrive one by one; the design computes once after the last
+        if event_data.get('defer_compute'):
+            begin_stream_deferred_compute()
         
         # Execute the Python code in the main thread
-        exec(python_code, exec_globals)
+        result = run_python_code(python_code, is_cancelled)
         
         # Allow Fusion to process messages and update display
+        do_events_start = time.perf_counter()
         adsk.doEvents()
+        result.setdefault('timings', {})['do_events_ms'] = (time.perf_counter() - do_events_start) * 1000
         
-        # Capture result from Python code if it was set
-        captured_result = exec_globals.get('__cadzero_result__')
+        complete_python_execution(execution_id, result)
         
-        # Mark as successful with captured result
-        python_execution_results[execution_id] = {
-            'success': True,
-            'message': 'Python code executed successfully',
-            'result': captured_result if captured_result is not None else 'Execution completed',
-            'error': None
-        }
-        
-        futil.log(f'Custom event handler: Python code executed successfully (ID: {execution_id})', adsk.core.LogLevels.InfoLogLevel)
+        if result['success']:
+            futil.log(f'Custom event handler: Python code executed successfully (ID: {execution_id})', adsk.core.LogLevels.InfoLogLevel)
         
     except Exception as e:
-        import traceback
         error_details = traceback.format_exc()
         futil.log(f'Custom event handler error: {error_details}', adsk.core.LogLevels.ErrorLogLevel)
         
-        execution_id = None
-        try:
-            event_data = json.loads(args.additionalInfo)
-            execution_id = event_data.get('execution_id')
-        except:
-            pass
-        
         if execution_id:
             error_message = f'Error executing Python code: {str(e)}\n\nDetails:\n{error_details}'
-            python_execution_results[execution_id] = {
+            complete_python_execution(execution_id, {
                 'success': False,
                 'message': error_message,
                 'result': error_message,  # Include error as result so it shows in chat
                 'error': error_details
+            })
+
+
+def dispatch_to_main_thread(event_data, timeout):
+    """Fire the custom event and block until custom_event_handler completes it.
+
+    Returns the result dict, or None if the main thread did not answer in time.
+    """
+    # Register the execution; custom_event_handler completes it directly
+    execution_id, future = execution_registry.register()
+    event_data = dict(event_data, execution_id=execution_id)
+    
+    # Fire custom event to execute in main thread
+    dispatch_time = time.perf_counter()
+    app.fireCustomEvent(CUSTOM_EVENT_ID, message_codec.dumps(event_data))
+    
+    # Block until the main thread hands back the result (with timeout)
+    result = execution_registry.wait(execution_id, future, timeout)
+    if result is None and 'steps' in event_data:
+        # The batch ran out of time; the steps that finished before that keep their results
+        completed_steps = execution_registry.take_progress(execution_id)
+        if completed_steps:
+            result = {
+                'success': True,
+                'message': 'Python batch timed out',
+                'steps': completed_steps,
+                'error': None,
+                'timed_out': True
             }
+    
+    if result is not None:
+        latency_ms = (time.perf_counter() - dispatch_time) * 1000
+        futil.log(f'Execution {execution_id} result received {latency_ms:.1f} ms after dispatch', adsk.core.LogLevels.InfoLogLevel)
+        record_execution_timings(event_data, result, dispatch_time)
+    
+    return result
+
+
+def record_execution_timings(event_data, result, dispatch_time):
+    """Add queue wait, exec and doEvents spans reported by the main thread to the current turn timer."""
+    timer = futil.current_turn_timer()
+    
+    if 'steps' in event_data:
+        steps = list(zip(event_data['steps'], result.get('steps', [])))
+    else:
+        steps = [(event_data, result)]
+    
+    queue_wait_recorded = False
+    for step, step_result in steps:
+        step_timings = step_result.get('timings', {})
+        if 'started_at' not in step_timings:
+            continue
+        
+        tool_name = step.get('tool_name', 'unknown')
+        if not queue_wait_recorded:
+            # Only the first executed step waits in Fusion's event queue
+            timer.add_span('tool_queue_wait', (step_timings['started_at'] - dispatch_time) * 1000, start=dispatch_time, tool_name=tool_name)
+            queue_wait_recorded = True
+        timer.add_span('tool_exec', step_timings['exec_ms'], start=step_timings['started_at'], tool_name=tool_name)
+    
+    do_events_ms = result.get('timings', {}).get('do_events_ms')
+    if do_events_ms is not None:
+        timer.add_span('do_events', do_events_ms)
+    
+    deferred_compute = result.get('timings', {}).get('deferred_compute')
+    if deferred_compute and deferred_compute['active']:
+        timer.add_span('deferred_compute', deferred_compute['compute_ms'],
+                       steps=deferred_compute['steps'], estimated_saved_ms=deferred_compute['estimated_saved_ms'])
+        futil.log(lambda: f"Deferred compute for {deferred_compute['steps']} steps: {deferred_compute['compute_ms']:.1f} ms, "
+                          f"~{deferred_compute['estimated_saved_ms']:.1f} ms saved", adsk.core.LogLevels.InfoLogLevel)
+
+
+def get_tool_timeout(tool_name, tool_output_data):
+    """Get the time budget in seconds for a tool call.
+
+    A 'timeout' in the tool output payload wins, then config.TOOL_TIMEOUTS for the
+    tool name, then config.TOOL_EXECUTION_TIMEOUT.
+    """
+    timeout = tool_output_data.get('timeout')
+    if isinstance(timeout, (int, float)) and timeout > 0:
+        return timeout
+    return config.TOOL_TIMEOUTS.get(tool_name, config.TOOL_EXECUTION_TIMEOUT)
+
+
+def record_tool_telemetry(tool_name, status, python_code=None, result=None, batched=False):
+    """Record a 'tool' telemetry event for one tool call.
+
+    status is 'success', 'error', 'timeout' or 'cancelled'. batched tells whether the
+    call went through execute_tool_calls_batched rather than its own dispatch.
+    """
+    result = result or {}
+    captured_result = result.get('result')
+    telemetry.record_event(
+        'tool',
+        session_id=history.get_conversation().session_id,
+        endpoint=config.current_endpoint,
+        tool_name=tool_name,
+        status=status,
+        success=status == 'success',
+        exec_ms=result.get('timings', {}).get('exec_ms'),
+        code_bytes=len(python_code) if python_code else 0,
+        result_bytes=len(str(captured_result)) if captured_result is not None else 0,
+        batched=batched
+    )
+
+
+def build_cancelled_result(tool_call, python_code, batched=False):
+    """Build the execution_results entry for a tool call skipped because the turn was cancelled."""
+    record_tool_telemetry(tool_call.get('name', 'unknown'), 'cancelled', python_code, batched=batched)
+    return {
+        'tool_name': tool_call.get('name', 'unknown'),
+        'success': False,
+        'message': 'Execution cancelled',
+        'python_code': python_code
+    }
+
+
+def build_execution_result(index, tool_call, tool_output_data, python_code, result, batched=False):
+    """Convert a main-thread result into the execution_results entry sent to the palette."""
+    tool_name = tool_call.get('name', 'unknown')
+    
+    if result is None or result.get('timed_out'):
+        # Timeout
+        futil.log(f'Tool call {index+1} execution timed out', adsk.core.LogLevels.ErrorLogLevel)
+        record_tool_telemetry(tool_name, 'timeout', python_code, result, batched)
+        return {
+            'tool_name': tool_name,
+            'success': False,
+            'message': 'Execution timed out',
+            'python_code': python_code
+        }
+    
+    if result.get('success', False):
+        # Success - include captured result if available
+        captured_result = result.get('result')
+        success_message = tool_output_data.get('message', result.get('message', f'Tool {tool_name} executed successfully'))
+        
+        # If we have a captured result, use it as the message
+        if captured_result:
+            success_message = captured_result
+        
+        # Generated code may set __cadzero_result__ to any value, e.g. a dict
+        futil.log(lambda: f'Tool call {index+1} executed successfully: {str(success_message)[:100]}...', adsk.core.LogLevels.InfoLogLevel)
+        record_tool_telemetry(tool_name, 'success', python_code, result, batched)
+        return {
+            'tool_name': tool_name,
+            'success': True,
+            'message': success_message,
+            'result': captured_result,  # Include raw result
+            'python_code': python_code
+        }
+    
+    # Error
+    error_msg = result.get('message', 'Unknown error')
+    futil.log(f'Tool call {index+1} execution failed: {error_msg}', adsk.core.LogLevels.ErrorLogLevel)
+    record_tool_telemetry(tool_name, 'cancelled' if result.get('cancelled') else 'error', python_code, result, batched)
+    return {
+        'tool_name': tool_name,
+        'success': False,
+        'message': error_msg,
+        'python_code': python_code
+    }
+
+
+def build_no_code_result(index, tool_call, tool_output_data):
+    """Build the execution_results entry for a tool call that carries no Python code."""
+    tool_message = tool_output_data.get('message', 'Tool executed (no code)')
+    futil.log(f'Tool call {index+1} completed (no code): {tool_message}', adsk.core.LogLevels.InfoLogLevel)
+    return {
+        'tool_name': tool_call.get('name', 'unknown'),
+        'success': True,
+        'message': tool_message,
+        'python_code': None
+    }
+
+
+def build_missing_output_result(index, tool_call):
+    """Build the execution_results entry for a streamed tool call whose output never arrived."""
+    futil.log(f'No tool output received for tool call {index+1}', adsk.core.LogLevels.WarningLogLevel)
+    record_tool_telemetry(tool_call.get('name', 'unknown'), 'error')
+    return {
+        'tool_name': tool_call.get('name', 'unknown'),
+        'success': False,
+        'message': 'No tool output received',
+        'error': 'No tool output received',
+        'python_code': None
+    }
+
+
+def build_error_result(index, tool_call, error, batched=False):
+    """Build the execution_results entry for a tool call that failed before execution."""
+    error_details = traceback.format_exc()
+    futil.log(f'Error executing tool call {index+1}: {error_details}', adsk.core.LogLevels.ErrorLogLevel)
+    record_tool_telemetry(tool_call.get('name', 'unknown'), 'error', batched=batched)
+    return {
+        'tool_name': tool_call.get('name', 'unknown'),
+        'success': False,
+        'message': f'Error: {str(error)}',
+        'python_code': None
+    }
+
+
+def execute_tool_call(index, tool_call, tool_output, total=None, defer_compute=False):
+    """Execute a single tool call in Fusion 360 using a custom event and return its execution result.
+
+    With defer_compute the design's compute stays deferred after the call, until the
+    caller dispatches an 'end_deferred_compute' event.
+    """
+    try:
+        futil.log(f'Executing tool call {index+1}/{total or index+1}: {tool_call.get("name", "unknown")}', adsk.core.LogLevels.InfoLogLevel)
+        
+        # Parse the tool output to extract Python code
+        tool_output_data = message_codec.decode_tool_output(tool_output)
+        python_code = tool_output_data.get('python_code', '')
+        
+        if not python_code:
+            # No Python code, just log the tool output
+            return build_no_code_result(index, tool_call, tool_output_data)
+        
+        if is_turn_cancelled():
+            futil.log(f'Skipping tool call {index+1}: turn cancelled', adsk.core.LogLevels.WarningLogLevel)
+            return build_cancelled_result(tool_call, python_code)
+        
+        futil.log(f'Found Python code for tool call {index+1}, executing via custom event...', adsk.core.LogLevels.InfoLogLevel)
+        
+        tool_name = tool_call.get('name', 'unknown')
+        result = dispatch_to_main_thread({
+            'python_code': python_code,
+            'tool_name': tool_name,
+            'defer_compute': defer_compute
+        }, get_tool_timeout(tool_name, tool_output_data))
+        return build_execution_result(index, tool_call, tool_output_data, python_code, result)
+        
+    except Exception as e:
+        return build_error_result(index, tool_call, e)
 
 
 def execute_tool_calls_sequentially(tool_calls, tool_outputs):
     """Execute tool calls sequentially in Fusion 360 using custom events."""
-    global python_execution_counter, python_execution_results
-    
-    execution_results = []
+    mark_turn_executing()
+    if config.BATCH_TOOL_EXECUTION:
+        return execute_tool_calls_batched(tool_calls, tool_outputs)
     
     futil.log(f'Executing {len(tool_calls)} tool calls sequentially using custom events', adsk.core.LogLevels.InfoLogLevel)
     
+    execution_results = [
+        execute_tool_call(i, tool_call, tool_output, len(tool_calls))
+        for i, (tool_call, tool_output) in enumerate(zip(tool_calls, tool_outputs))
+    ]
+    
+    futil.log(f'Completed executing {len(tool_calls)} tool calls', adsk.core.LogLevels.InfoLogLevel)
+    return execution_results
+
+
+def execute_tool_calls_batched(tool_calls, tool_outputs):
+    """Execute all tool calls of a turn in a single custom event dispatch.
+
+    The main thread runs every Python payload back to back and only calls
+    adsk.doEvents() at the end (or every config.BATCH_DO_EVENTS_EVERY steps).
+    Returns results in the same shape as the sequential path.
+    """
+    execution_results = [None] * min(len(tool_calls), len(tool_outputs))
+    batch_steps = []  # (index, tool_call, tool_output_data, python_code)
+    
+    futil.log(f'Executing {len(tool_calls)} tool calls in a single batch', adsk.core.LogLevels.InfoLogLevel)
+    
     for i, (tool_call, tool_output) in enumerate(zip(tool_calls, tool_outputs)):
         try:
-            futil.log(f'Executing tool call {i+1}/{len(tool_calls)}: {tool_call.get("name", "unknown")}', adsk.core.LogLevels.InfoLogLevel)
-            
             # Parse the tool output to extract Python code
-            tool_output_data = json.loads(tool_output.get('output', '{}'))
+            tool_output_data = message_codec.decode_tool_output(tool_output)
             python_code = tool_output_data.get('python_code', '')
             
             if python_code:
-                futil.log(f'Found Python code for tool call {i+1}, executing via custom event...', adsk.core.LogLevels.InfoLogLevel)
-                
-                # Generate unique execution ID
-                python_execution_counter += 1
-                execution_id = f'exec_{python_execution_counter}_{int(time.time())}'
-                
-                # Prepare event data
-                event_data = {
-                    'execution_id': execution_id,
-                    'python_code': python_code,
-                    'tool_name': tool_call.get('name', 'unknown')
-                }
-                
-                # Initialize result slot
-                with python_execution_lock:
-                    python_execution_results[execution_id] = None
-                
-                # Fire custom event to execute in main thread
-                app.fireCustomEvent(CUSTOM_EVENT_ID, json.dumps(event_data))
-                
-                # Wait for execution to complete (with timeout)
-                timeout = 30  # seconds
-                start_time = time.time()
-                result = None
-                
-                while time.time() - start_time < timeout:
-                    with python_execution_lock:
-                        result = python_execution_results.get(execution_id)
-                    
-                    if result is not None:
-                        break
-                    
-                    time.sleep(0.1)  # Small delay to avoid busy waiting
-                
-                # Clean up result
-                with python_execution_lock:
-                    if execution_id in python_execution_results:
-                        del python_execution_results[execution_id]
-                
-                if result is None:
-                    # Timeout
-                    futil.log(f'Tool call {i+1} execution timed out', adsk.core.LogLevels.ErrorLogLevel)
-                    execution_results.append({
-                        'tool_name': tool_call.get('name', 'unknown'),
-                        'success': False,
-                        'message': 'Execution timed out',
-                        'python_code': python_code
-                    })
-                elif result.get('success', False):
-                    # Success - include captured result if available
-                    captured_result = result.get('result')
-                    success_message = tool_output_data.get('message', result.get('message', f'Tool {tool_call.get("name", "unknown")} executed successfully'))
-                    
-                    # If we have a captured result, use it as the message
-                    if captured_result:
-                        success_message = captured_result
-                    
-                    execution_results.append({
-                        'tool_name': tool_call.get('name', 'unknown'),
-                        'success': True,
-                        'message': success_message,
-                        'result': captured_result,  # Include raw result
-                        'python_code': python_code
-                    })
-                    futil.log(f'Tool call {i+1} executed successfully: {success_message[:100]}...', adsk.core.LogLevels.InfoLogLevel)
-                else:
-                    # Error
-                    error_msg = result.get('message', 'Unknown error')
-                    execution_results.append({
-                        'tool_name': tool_call.get('name', 'unknown'),
-                        'success': False,
-                        'message': error_msg,
-                        'python_code': python_code
-                    })
-                    futil.log(f'Tool call {i+1} execution failed: {error_msg}', adsk.core.LogLevels.ErrorLogLevel)
-                
+                batch_steps.append((i, tool_call, tool_output_data, python_code))
             else:
                 # No Python code, just log the tool output
-                tool_message = tool_output_data.get('message', 'Tool executed (no code)')
-                execution_results.append({
-                    'tool_name': tool_call.get('name', 'unknown'),
-                    'success': True,
-                    'message': tool_message,
-                    'python_code': None
-                })
-                
-                futil.log(f'Tool call {i+1} completed (no code): {tool_message}', adsk.core.LogLevels.InfoLogLevel)
+                execution_results[i] = build_no_code_result(i, tool_call, tool_output_data)
                 
         except Exception as e:
-            import traceback
-            error_details = traceback.format_exc()
-            futil.log(f'Error executing tool call {i+1}: {error_details}', adsk.core.LogLevels.ErrorLogLevel)
-            
-            execution_results.append({
+            execution_results[i] = build_error_result(i, tool_call, e, batched=True)
+    
+    if batch_steps and is_turn_cancelled():
+        futil.log('Skipping tool call batch: turn cancelled', adsk.core.LogLevels.WarningLogLevel)
+        for i, tool_call, _, python_code in batch_steps:
+            execution_results[i] = build_cancelled_result(tool_call, python_code, batched=True)
+    elif batch_steps:
+        # Every step runs against its own time budget on the main thread; the batch as a
+        # whole is given up on once the sum of the budgets has passed
+        steps = [
+            {
+                'python_code': python_code,
                 'tool_name': tool_call.get('name', 'unknown'),
-                'success': False,
-                'message': f'Error: {str(e)}',
-                'python_code': None
-            })
+                'timeout': get_tool_timeout(tool_call.get('name', 'unknown'), tool_output_data)
+            }
+            for _, tool_call, tool_output_data, python_code in batch_steps
+        ]
+        result = dispatch_to_main_thread({
+            'steps': steps,
+            'do_events_every': config.BATCH_DO_EVENTS_EVERY,
+            'defer_compute': 0 < config.DEFERRED_COMPUTE_MIN_STEPS <= len(batch_steps)
+        }, sum(step['timeout'] for step in steps))
+        
+        if result is not None and not result.get('success', False):
+            # The batch itself failed before producing per-step results
+            step_results = [result] * len(batch_steps)
+        else:
+            step_results = result.get('steps', []) if result else []
+        
+        for position, (i, tool_call, tool_output_data, python_code) in enumerate(batch_steps):
+            # One step's result failing to convert must not lose the other steps' results
+            try:
+                if position > len(step_results):
+                    # Behind the step that ran out of time; skipped once the batch was given up on
+                    execution_results[i] = build_cancelled_result(tool_call, python_code, batched=True)
+                else:
+                    step_result = step_results[position] if position < len(step_results) else None
+                    execution_results[i] = build_execution_result(i, tool_call, tool_output_data, python_code, step_result, batched=True)
+            except Exception as e:
+                execution_results[i] = build_error_result(i, tool_call, e, batched=True)
     
     futil.log(f'Completed executing {len(tool_calls)} tool calls', adsk.core.LogLevels.InfoLogLevel)
     return execution_results
 
 
+def consume_chat_stream(events):
+    """Consume streamed chat events, pushing text to the palette and executing tools as they arrive.
+
+    Tool calls are handed to a single worker as soon as their output is complete, so
+    they run in order on the main thread while the rest of the stream is still being
+    read. Returns the same dict as the non-streaming path of send_chat_message.
+    """
+    text_parts = []
+    tool_calls = []
+    tool_outputs = []
+    result_futures = []
+    missing_outputs = set()  # indexes of tool calls whose output never arrived
+    final_event = {}
+    error_msg = None
+    
+    timer = futil.current_turn_timer()
+    
+    # The step count isn't known up front, so deferral starts with the first tool call
+    defer_compute = config.DEFERRED_COMPUTE_MIN_STEPS > 0
+    
+    def execute_tool_call_timed(index, tool_call, tool_output):
+        with timer.activate():
+            return execute_tool_call(index, tool_call, tool_output, defer_compute=defer_compute)
+    
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='cadzero-stream-tools') as tool_executor:
+        def submit_ready_tool_calls():
+            # Keep execution order: never run a tool call ahead of one still waiting for output
+            while len(result_futures) < len(tool_calls) and tool_outputs[len(result_futures)] is not None:
+                index = len(result_futures)
+                if index in missing_outputs:
+                    # Never ran; keeps its place in the results without going through the executor
+                    future = Future()
+                    future.set_result(build_missing_output_result(index, tool_calls[index]))
+                    result_futures.append(future)
+                    continue
+                mark_turn_executing()
+                result_futures.append(tool_executor.submit(execute_tool_call_timed, index, tool_calls[index], tool_outputs[index]))
+        
+        try:
+            for event in events:
+                event_type = event.get('type')
+                
+                if event_type == 'text_delta':
+                    delta = event.get('delta', '')
+                    if delta:
+                        text_parts.append(delta)
+                        send_response_to_ui({
+                            'action': 'chatDelta',
+                            'delta': delta
+                        })
+                elif event_type == 'tool_call':
+                    tool_calls.append(event.get('tool_call', {}))
+                    tool_outputs.append(event.get('tool_output'))
+                    submit_ready_tool_calls()
+                elif event_type == 'tool_output':
+                    if None in tool_outputs:
+                        tool_outputs[tool_outputs.index(None)] = event.get('tool_output', {})
+                        submit_ready_tool_calls()
+                    else:
+                        futil.log('Received tool output without a pending tool call', adsk.core.LogLevels.WarningLogLevel)
+                elif event_type == 'done':
+                    final_event = event
+                elif event_type == 'error':
+                    error_msg = event.get('error', 'Unknown error')
+        except Exception as e:
+            # Dropped connection or a malformed event; the tool calls that already ran still report their results
+            error_msg = f'Chat stream interrupted: {str(e)}'
+        
+        # Tool calls that never got an output produce a failed result entry
+        for index, tool_output in enumerate(tool_outputs):
+            if tool_output is None:
+                missing_outputs.add(index)
+                tool_outputs[index] = {}
+        submit_ready_tool_calls()
+        
+        execution_results = [future.result() for future in result_futures]
+    
+    if defer_compute and len(result_futures) > len(missing_outputs):
+        # The design computes once for all of the turn's tool calls
+        dispatch_to_main_thread({'end_deferred_compute': True}, config.TOOL_EXECUTION_TIMEOUT)
+    
+    if error_msg is None and final_event.get('success') is False:
+        error_msg = final_event.get('error', 'Unknown error')
+    
+    if error_msg is not None:
+        futil.log(f'Utilities API stream error: {error_msg}', adsk.core.LogLevels.ErrorLogLevel)
+        main_response = f"Error: {error_msg}"
+    else:
+        main_response = final_event.get('response') or ''.join(text_parts)
+    
+    futil.log(f'Chat stream completed with {len(tool_calls)} tool calls', adsk.core.LogLevels.InfoLogLevel)
+    return {
+        'response': main_response,
+        'tool_calls': tool_calls,
+        'tool_outputs': tool_outputs,
+        'execution_results': execution_results
+    }
+
+
+def build_chat_history(conversation):
+    """Compact the conversation into the history sent with the next chat request.
+
+    Returns (chat_history, history_bytes), where history_bytes holds the encoded size of
+    the history before and after compaction for the turn's span and telemetry event.
+    """
+    full_history = [{'role': m['role'], 'content': m['content']} for m in conversation.messages()]
+    chat_history = conversation.compacted(
+        config.HISTORY_TOKEN_BUDGET,
+        config.HISTORY_KEEP_RECENT_TURNS,
+        config.HISTORY_SUMMARY_CHARS
+    )
+    
+    history_bytes = {
+        'history_bytes_before': len(message_codec.dumps_bytes(full_history)),
+        'history_bytes_after': len(message_codec.dumps_bytes(chat_history))
+    }
+    futil.log(lambda: f'History compacted: {len(full_history)} -> {len(chat_history)} messages, '
+                      f"{history_bytes['history_bytes_before']} -> {history_bytes['history_bytes_after']} bytes",
+              adsk.core.LogLevels.InfoLogLevel)
+    
+    return chat_history, history_bytes
+
+
+def record_turn_telemetry(conversation, message, chat_history, response, timings, cancelled=False, history_bytes=None):
+    """Record a 'turn' telemetry event with the size, outcome and stage timings of a chat turn."""
+    response = response if isinstance(response, dict) else {}
+    execution_results = response.get('execution_results') or []
+    
+    # Total time per stage; stages such as tool_exec can occur several times per turn
+    stages = {}
+    for span in (timings or {}).get('spans', []):
+        stages[span['stage']] = round(stages.get(span['stage'], 0) + span['duration_ms'], 3)
+    
+    telemetry.record_event(
+        'turn',
+        session_id=conversation.session_id,
+        endpoint=config.current_endpoint,
+        success=bool(response) and not str(response.get('response', '')).startswith(('Error', 'HTTP Error', 'URL Error')),
+        total_ms=(timings or {}).get('total_ms'),
+        stages=stages,
+        message_bytes=len(message),
+        history_messages=len(chat_history),
+        **(history_bytes or {}),
+        tool_names=[result.get('tool_name') for result in execution_results],
+        tools_failed=sum(1 for result in execution_results if not result.get('success')),
+        cancelled=cancelled
+    )
+
+
 def send_chat_message(message, history=None):
     """Send a message to the utilities tool calling API."""
     try:
@@ -800,20 +2222,27 @@ def send_chat_message(message, history=None):
         # Add history if provided
         if history:
             data['history'] = history
+        
+        # Ask for an incremental response; servers without streaming reply with plain JSON
+        if config.STREAM_CHAT_RESPONSES:
+            data['stream'] = True
             
-        json_data = json.dumps(data).encode('utf-8')
-
-        # Create a request object
-        req = urllib.request.Request(chat_endpoint, data=json_data, method='POST')
-        req.add_header('Content-Type', 'application/json')
-        req.add_header('Accept', 'application/json')
+        timer = futil.current_turn_timer()
+        with timer.span('history_serialization'):
+            json_data = message_codec.dumps_bytes(data)
+
+        # Prepare the request headers
+        headers = {
+            'Content-Type': 'application/json',
+            'Accept': chat_stream.STREAM_ACCEPT_HEADER if config.STREAM_CHAT_RESPONSES else 'application/json'
+        }
         
         # Add authentication headers if user is authenticated
         auth_headers = auth.get_auth_headers()
         if auth_headers:
             futil.log(f'Adding auth headers to request: {list(auth_headers.keys())}', adsk.core.LogLevels.InfoLogLevel)
             for header_name, header_value in auth_headers.items():
-                req.add_header(header_name, header_value)
+                headers[header_name] = header_value
                 # Log token preview (first 20 chars)
                 if header_name == 'Authorization':
                     token_preview = header_value[:30] + '...' if len(header_value) > 30 else header_value
@@ -821,15 +2250,29 @@ def send_chat_message(message, history=None):
         else:
             futil.log('No auth headers available - user may not be authenticated', adsk.core.LogLevels.WarningLogLevel)
 
-        # Send the request
-        with urllib.request.urlopen(req) as response:
-            response_data = response.read().decode('utf-8')
-            futil.log(f'Chat message sent to utilities API: {response_data}', adsk.core.LogLevels.InfoLogLevel)
+        # Send the request over a pooled keep-alive connection, gzipped if the endpoint accepts it
+        with http_pool.request('POST', chat_endpoint, body=json_data, headers=headers, compress=config.HTTP_COMPRESSION_ENABLED) as response:
+            timer.add_span('http_connect', response.timings['connect_ms'], reused=response.timings['reused'])
+            timer.add_span('time_to_first_byte', response.timings['ttfb_ms'],
+                           request_bytes=response.timings['request_bytes'], sent_bytes=response.timings['sent_bytes'])
+            
+            stream_format = chat_stream.get_stream_format(response.headers.get('Content-Type'))
+            if stream_format:
+                futil.log(f'Consuming {stream_format} chat stream', adsk.core.LogLevels.InfoLogLevel)
+                with timer.span('stream_read', format=stream_format):
+                    return consume_chat_stream(chat_stream.iter_stream_events(response, stream_format))
+            
+            with timer.span('body_read'):
+                response_data = response.read()
+            futil.log(lambda: f'Chat message sent to utilities API: {len(response_data)} bytes received', adsk.core.LogLevels.InfoLogLevel)
             
             # Parse the response JSON
             try:
-                parsed_response = json.loads(response_data)
-                futil.log(f'Parsed utilities API response: {parsed_response}', adsk.core.LogLevels.InfoLogLevel)
+                with timer.span('json_parse', bytes=len(response_data)):
+                    # Decoded straight from the body bytes
+                    parsed_response = message_codec.loads(response_data)
+                futil.log(lambda: f'Parsed utilities API response: success={parsed_response.get("success")}, '
+                                  f'{len(parsed_response.get("tool_calls") or [])} tool calls', adsk.core.LogLevels.InfoLogLevel)
                 
                 # Handle the new tool calling response format
                 if parsed_response.get('success', False):
@@ -870,7 +2313,7 @@ def send_chat_message(message, history=None):
             except json.JSONDecodeError:
                 # If response is not JSON, return as is
                 return {
-                    'response': response_data,
+                    'response': response_data.decode('utf-8', errors='replace'),
                     'tool_calls': [],
                     'tool_outputs': [],
                     'execution_results': []
@@ -1,11 +1,10 @@
 // Fusion Command Palette JavaScript - Professional Chat Interface
 
-// Conversation history management
-let conversationHistory = [];
 let debugData = {
     toolCalls: [],
     executionLog: [],
-    rawData: []
+    rawData: [],
+    turnTimings: []
 };
 
 // Settings management
@@ -212,8 +211,13 @@ function clearChat() {
         const thinkingBox = document.getElementById('thinkingBox');
         if (thinkingBox) thinkingBox.classList.add('hidden');
         
-        conversationHistory = [];
-        debugData = { toolCalls: [], executionLog: [], rawData: [] };
+        streamingMessageDiv = null;
+        
+        // Start a fresh conversation session on the Python side
+        if (typeof adsk !== 'undefined' && typeof adsk.fusionSendData !== 'undefined') {
+            adsk.fusionSendData('clearHistory', JSON.stringify({}));
+        }
+        debugData = { toolCalls: [], executionLog: [], rawData: [], turnTimings: [] };
         updateDebugSections();
     }
 }
@@ -254,6 +258,13 @@ function updateDebugSections() {
         ).join('') || '<div>No execution log yet</div>';
     }
     
+    // Update turn timings (most recent turn first)
+    const turnTimingsContent = document.getElementById('turnTimingsContent');
+    if (turnTimingsContent) {
+        turnTimingsContent.innerHTML = debugData.turnTimings.slice().reverse().map(formatTurnTimings)
+            .join('<hr>') || '<div>No turn timings yet</div>';
+    }
+    
     // Update raw data
     const rawDataContent = document.getElementById('rawDataContent');
     if (rawDataContent) {
@@ -263,6 +274,43 @@ function updateDebugSections() {
     }
 }
 
+// Format one turn's stage breakdown, summing spans of the same stage
+function formatTurnTimings(turn) {
+    const totals = {};
+    (turn.spans || []).forEach((span) => {
+        const label = span.tool_name ? `${span.stage} (${span.tool_name})` : span.stage;
+        totals[label] = (totals[label] || 0) + span.duration_ms;
+    });
+    
+    const time = new Date(turn.started_at * 1000).toLocaleTimeString();
+    const rows = Object.entries(totals)
+        .map(([label, ms]) => `<div>&nbsp;&nbsp;${label}: ${ms.toFixed(1)} ms</div>`)
+        .join('');
+    return `<div>[${time}] total ${turn.total_ms.toFixed(1)} ms</div>${rows}`;
+}
+
+// Download the recorded turn timings as JSON
+function exportTimings() {
+    if (typeof adsk === 'undefined' || typeof adsk.fusionSendData === 'undefined') {
+        return;
+    }
+    
+    adsk.fusionSendData('exportTimings', JSON.stringify({}))
+        .then((result) => {
+            const response = JSON.parse(result);
+            const blob = new Blob([response.timings], { type: 'application/json' });
+            const url = URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `cadzero-timings-${new Date().toISOString().split('T')[0]}.json`;
+            a.click();
+            URL.revokeObjectURL(url);
+        })
+        .catch((error) => {
+            addDebugLog(`Export timings error: ${error}`);
+        });
+}
+
 // Add debug log entry
 function addDebugLog(message, type = 'executionLog') {
     debugData[type].push({
@@ -361,23 +409,17 @@ function submit() {
         submitBtn.disabled = true;
     }
     
-    // Add user message to conversation history
-    conversationHistory.push({
-        role: 'user',
-        content: message
-    });
-    
     // Add debug log
     addDebugLog(`User message: ${message}`);
     
     // Show loading indicator
     showLoadingMessage();
     
-    // Send chat message to backend via Fusion (non-blocking)
+    // Send chat message to backend via Fusion (non-blocking).
+    // Only the new message is sent; Python keeps the conversation history.
     const chatData = {
         action: 'chatMessage',
         message: message,
-        history: conversationHistory,
         timestamp: new Date().toISOString()
     };
     
@@ -403,7 +445,6 @@ function submit() {
     
     adsk.fusionSendData('chatMessage', JSON.stringify(chatData))
         .then((result) => {
-            hideLoadingMessage();
             console.log('Raw result:', result);
             
             try {
@@ -419,16 +460,21 @@ function submit() {
                 updateDebugSections();
                 
                 if (response.success && response.status === 'processing') {
-                    // Keep showing thinking box
+                    // Keep showing thinking box until the chatResponse arrives
+                    if (response.merged) {
+                        addDebugLog(`Duplicate message merged into ${response.turn_id}`);
+                    }
                 } else if (response.success) {
                     displayChatResponse(response);
                 } else {
+                    hideLoadingMessage();
                     const errorMsg = response.error || 'Unknown error';
                     console.log('Error:', errorMsg);
                     addMessage(`❌ Error: ${errorMsg}`, false);
                     addDebugLog(`Error: ${errorMsg}`, 'executionLog');
                 }
             } catch (e) {
+                hideLoadingMessage();
                 console.log('Parse error, showing raw result:', e);
                 addMessage(`AI: ${result}`, false);
                 addDebugLog(`Parse error: ${e.message}`, 'executionLog');
@@ -448,6 +494,55 @@ function submit() {
         });
 }
 
+// Cancel the turn in progress: queued tool calls are skipped and running code is asked to stop
+function cancelTurn() {
+    if (typeof adsk === 'undefined' || typeof adsk.fusionSendData === 'undefined') {
+        return;
+    }
+    
+    adsk.fusionSendData('cancelTurn', JSON.stringify({}))
+        .then(() => {
+            const thinkingText = document.querySelector('#thinkingBox .thinking-text');
+            if (thinkingText) {
+                thinkingText.textContent = 'Cancelling...';
+            }
+            addDebugLog('Turn cancellation requested');
+        })
+        .catch((error) => {
+            addDebugLog(`Cancel error: ${error}`);
+        });
+}
+
+// Reflect the Python-side turn queue in the thinking box
+function updateTurnStatus(status) {
+    const queue = status.queue || [];
+    const waiting = queue.filter(turn => turn.state === 'queued').length;
+    addDebugLog(`Turn ${status.turn_id}: ${status.state}${waiting ? ` (${waiting} queued)` : ''}`);
+    
+    if (status.state === 'cancelled' && queue.length === 0) {
+        // Nothing left to wait for; cancelled turns never send a chatResponse
+        hideLoadingMessage();
+        return;
+    }
+    
+    const thinkingText = document.querySelector('#thinkingBox .thinking-text');
+    if (!thinkingText || queue.length === 0) {
+        return;
+    }
+    
+    if (!statusStartTime) {
+        // A queued turn started after the previous response closed the thinking box
+        showLoadingMessage();
+    }
+    
+    const running = queue.find(turn => turn.state === 'sending' || turn.state === 'executing');
+    let text = running && running.state === 'executing' ? 'Running tools...' : 'Thinking...';
+    if (waiting) {
+        text += ` (${waiting} queued)`;
+    }
+    thinkingText.textContent = text;
+}
+
 // Show user prompt section (deprecated - now handled in chat)
 function showUserPrompt(message) {
     // No longer used - user prompt is now part of chat history
@@ -509,7 +604,40 @@ function hideLoadingMessage() {
     statusStartTime = null;
 }
 
+// Streamed text shown while a turn is still in progress
+let streamingMessageDiv = null;
+
+function appendStreamingText(delta) {
+    const chatMessages = document.getElementById('chatMessages');
+    const contentArea = document.getElementById('contentArea');
+    
+    if (!streamingMessageDiv) {
+        streamingMessageDiv = document.createElement('div');
+        streamingMessageDiv.className = 'message assistant streaming';
+        
+        const messageContent = document.createElement('div');
+        messageContent.className = 'message-content';
+        streamingMessageDiv.appendChild(messageContent);
+        
+        chatMessages.appendChild(streamingMessageDiv);
+    }
+    
+    const messageContent = streamingMessageDiv.querySelector('.message-content');
+    messageContent.textContent += delta;
+    scrollToBottom(contentArea);
+}
+
+function clearStreamingText() {
+    // The final chatResponse re-renders the full text with action buttons
+    if (streamingMessageDiv) {
+        streamingMessageDiv.remove();
+        streamingMessageDiv = null;
+    }
+}
+
 function displayChatResponse(response) {
+    clearStreamingText();
+    
     if (response.success) {
         let aiResponse = response.response;
         
@@ -541,33 +669,16 @@ function displayChatResponse(response) {
             addToolExecutionResults(response.execution_results);
             
             // Then, extract and render component results as separate messages
-            // IMPORTANT: Add component results to conversation history BEFORE AI response
-            // so the LLM has context for follow-up questions
+            // (Python records them in the conversation history)
             response.execution_results.forEach((result) => {
-                if (result.result) {
+                if (result.result && typeof result.result === 'string' && result.result.trim().startsWith('{')) {
                     try {
-                        const resultText = result.result;
-                        if (resultText.trim().startsWith('{')) {
-                            const componentData = JSON.parse(resultText);
-                            if (componentData && componentData.type) {
-                                // Render as separate component message (also adds to history)
-                                addComponentMessage(componentData);
-                            }
-                        } else {
-                            // Plain text result - add to history
-                            conversationHistory.push({
-                                role: 'assistant',
-                                content: resultText
-                            });
+                        const componentData = JSON.parse(result.result);
+                        if (componentData && componentData.type) {
+                            addComponentMessage(componentData);
                         }
                     } catch (e) {
-                        // Not JSON, add as plain text to history
-                        if (result.result) {
-                            conversationHistory.push({
-                                role: 'assistant',
-                                content: result.result
-                            });
-                        }
+                        // Not a component, nothing to render
                     }
                 }
             });
@@ -576,12 +687,6 @@ function displayChatResponse(response) {
         // Add the main AI response with action buttons
         if (aiResponse) {
             addMessage(aiResponse, false, null, true);
-            
-            // Add assistant response to conversation history
-            conversationHistory.push({
-                role: 'assistant',
-                content: aiResponse
-            });
         }
         
         updateDebugSections();
@@ -591,6 +696,9 @@ function displayChatResponse(response) {
         addMessage(`❌ Error: ${errorMsg}`, false);
         addDebugLog(`Error: ${errorMsg}`, 'executionLog');
     }
+    
+    // The turn is over; stop the thinking indicator (and its Stop button)
+    hideLoadingMessage();
 }
 
 // Render component based on type
@@ -713,62 +821,6 @@ function renderTextComponent(container, componentData) {
     container.appendChild(textDiv);
 }
 
-// Convert component data to text format for LLM context
-function componentDataToText(componentData) {
-    if (!componentData || !componentData.type) {
-        return '';
-    }
-    
-    switch (componentData.type) {
-        case 'table':
-            let text = componentData.title ? `${componentData.title}\n\n` : '';
-            
-            if (componentData.columns && componentData.columns.length > 0) {
-                // Build header
-                const headers = componentData.columns.map(col => col.label || col.key).join(' | ');
-                text += headers + '\n';
-                text += componentData.columns.map(() => '---').join(' | ') + '\n';
-                
-                // Build rows
-                if (componentData.data && componentData.data.length > 0) {
-                    componentData.data.forEach((row) => {
-                        const values = componentData.columns.map(col => {
-                            const value = row[col.key];
-                            return value !== undefined && value !== null ? String(value) : '-';
-                        }).join(' | ');
-                        text += values + '\n';
-                    });
-                }
-            } else if (componentData.data && componentData.data.length > 0) {
-                // Auto-generate from data
-                const keys = Object.keys(componentData.data[0]);
-                const headers = keys.map(k => k.charAt(0).toUpperCase() + k.slice(1).replace(/_/g, ' ')).join(' | ');
-                text += headers + '\n';
-                text += keys.map(() => '---').join(' | ') + '\n';
-                
-                componentData.data.forEach((row) => {
-                    const values = keys.map(key => {
-                        const value = row[key];
-                        return value !== undefined && value !== null ? String(value) : '-';
-                    }).join(' | ');
-                    text += values + '\n';
-                });
-            }
-            
-            if (componentData.summary) {
-                text += `\n${componentData.summary}`;
-            }
-            
-            return text;
-            
-        case 'text':
-            return componentData.content || '';
-            
-        default:
-            return JSON.stringify(componentData);
-    }
-}
-
 // Add component as a separate chat message
 function addComponentMessage(componentData) {
     const chatMessages = document.getElementById('chatMessages');
@@ -797,15 +849,6 @@ function addComponentMessage(componentData) {
     messageDiv.appendChild(messageContent);
     chatMessages.appendChild(messageDiv);
     
-    // Add component data to conversation history as assistant message
-    const componentText = componentDataToText(componentData);
-    if (componentText) {
-        conversationHistory.push({
-            role: 'assistant',
-            content: componentText
-        });
-    }
-    
     scrollToBottom(contentArea);
 }
 
@@ -1091,8 +1134,11 @@ function openSettings() {
     const toolCallsSection = document.getElementById('toolCallsSection');
     const executionLogSection = document.getElementById('executionLogSection');
     
+    const turnTimingsSection = document.getElementById('turnTimingsSection');
+    
     if (toolCallsSection) toolCallsSection.classList.toggle('hidden');
     if (executionLogSection) executionLogSection.classList.toggle('hidden');
+    if (turnTimingsSection) turnTimingsSection.classList.toggle('hidden');
 }
 
 function executeCurrentPrompt() {
@@ -1116,18 +1162,11 @@ let authUrl = '';
 function showAuthModal() {
     console.log('Showing auth modal...');
     
-    // Get auth URL from config
-    // Format: http://localhost:5173/sign-in?redirect_url=http://localhost:8765/
-    const callbackUrl = 'http://localhost:8765/';
-    const baseUrl = 'http://localhost:5173/sign-in'; // TODO: Get from backend based on endpoint
-    authUrl = `${baseUrl}?redirect_url=${encodeURIComponent(callbackUrl)}`;
-    
-    console.log('Auth URL:', authUrl);
-    
-    // Update modal with URL
+    // The real auth URL (endpoint and callback port) comes back from the signIn call
+    authUrl = '';
     const authModalLink = document.getElementById('authModalLink');
     if (authModalLink) {
-        authModalLink.textContent = authUrl;
+        authModalLink.textContent = 'Starting sign-in...';
     }
     
     // Show modal
@@ -1147,6 +1186,17 @@ function closeAuthModal() {
     }
 }
 
+function cancelSignIn() {
+    closeAuthModal();
+    
+    // Shut down the callback server; the pending sign-in reports back via authComplete
+    if (typeof adsk !== 'undefined' && typeof adsk.fusionSendData !== 'undefined') {
+        adsk.fusionSendData('cancelSignIn', JSON.stringify({}))
+            .then(() => addDebugLog('Sign-in cancelled'))
+            .catch((error) => addDebugLog('Error cancelling sign-in: ' + error));
+    }
+}
+
 function openAuthInBrowser() {
     console.log('Opening auth URL in browser:', authUrl);
     
@@ -1208,6 +1258,15 @@ function startAuthCallback() {
                 if (response.success && response.status === 'processing') {
                     console.log('Backend is waiting for auth callback...');
                     addDebugLog('Waiting for authentication callback');
+                    
+                    // Show the URL the callback server is actually listening for
+                    authUrl = response.auth_url || '';
+                    const authModalLink = document.getElementById('authModalLink');
+                    if (authModalLink) {
+                        authModalLink.textContent = authUrl;
+                    }
+                } else if (!response.success) {
+                    addDebugLog('Sign-in could not start: ' + (response.message || 'Unknown error'));
                 }
             })
             .catch((error) => {
@@ -1231,6 +1290,12 @@ window.addEventListener('load', function() {
     // Check authentication status
     checkAuthStatus();
     
+    // Check the backend in the background; the result arrives as backendStatus
+    if (typeof adsk !== 'undefined' && typeof adsk.fusionSendData !== 'undefined') {
+        adsk.fusionSendData('getBackendStatus', JSON.stringify({}))
+            .catch((error) => addDebugLog(`Backend status error: ${error}`));
+    }
+    
     // Setup auto-scroll for chat messages
     setupAutoScroll();
     
@@ -1459,7 +1524,6 @@ async function handleSignOut() {
             // Clear chat and reset UI
             const chatMessages = document.getElementById('chatMessages');
             if (chatMessages) chatMessages.innerHTML = '';
-            conversationHistory = [];
             
             updateAuthUI();
             addDebugLog('User signed out');
@@ -1555,6 +1619,33 @@ window.fusionJavaScriptHandler = {
                 console.log('Received chatResponse:', data);
                 const response = JSON.parse(data);
                 displayChatResponse(response);
+            } else if (action === "turnTimings") {
+                // Keep the stage breakdown of recent turns for the debug section
+                const response = JSON.parse(data);
+                if (response.timings) {
+                    debugData.turnTimings.push(response.timings);
+                    debugData.turnTimings = debugData.turnTimings.slice(-20);
+                    updateDebugSections();
+                }
+            } else if (action === "backendStatus") {
+                // Result of the background health / auth check of the current endpoint
+                const response = JSON.parse(data);
+                const health = response.health || {};
+                const authStatus = response.auth || {};
+                if (response.error) {
+                    addDebugLog(`Backend status check failed: ${response.error}`);
+                } else {
+                    addDebugLog(`Backend ${response.endpoint}: ${health.ok ? 'reachable' : 'unreachable'}` +
+                        ` (${health.latency_ms} ms), token ${authStatus.authenticated ? 'accepted' : 'not accepted'}`);
+                }
+            } else if (action === "turnStatus") {
+                // A chat turn moved through queued / sending / executing / done / cancelled
+                const response = JSON.parse(data);
+                updateTurnStatus(response);
+            } else if (action === "chatDelta") {
+                // Handle a streamed text fragment of the current chat response
+                const response = JSON.parse(data);
+                appendStreamingText(response.delta || '');
             } else if (action === "authComplete") {
                 // Handle authentication completion from async sign-in flow
                 console.log('Received authComplete:', data);
@@ -1574,12 +1665,22 @@ window.fusionJavaScriptHandler = {
                     
                     // Show success message briefly
                     // alert('✅ Successfully signed in as ' + (response.user.user_email || 'user'));
+                } else if (response.cancelled) {
+                    // Cancelled from the auth modal; nothing to report
+                    addDebugLog('Sign-in cancelled');
                 } else {
                     // Sign-in failed
                     addDebugLog('Sign-in failed: ' + (response.message || 'Unknown error'));
                     console.error('Auth complete - sign-in failed:', response.message);
                     alert('❌ Sign-in failed: ' + (response.message || 'Unknown error'));
                 }
+            } else if (action === "authExpired") {
+                // The session could not be refreshed in the background; ask the user to sign in again
+                const response = JSON.parse(data);
+                authState.isAuthenticated = false;
+                authState.user = null;
+                updateAuthUI();
+                addDebugLog('Session expired: ' + (response.message || 'please sign in again'));
             } else if (action === "debugger") {
                 debugger;
             } else {
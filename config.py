@@ -8,7 +8,7 @@ import os
 # more information is written to the Text Command window. Generally, it's useful
 # to set this to True while developing an add-in and set it to False when you
 # are ready to distribute it.
-DEBUG = True
+DEBUG = False
 
 # Gets the name of the add-in from the name of the folder the py file is in.
 # This is used when defining unique internal names for various UI elements 
@@ -35,10 +35,10 @@ CLERK_SIGN_IN_URL_LOCAL = 'http://localhost:5173/sign-in'  # Your local frontend
 CLERK_SIGN_IN_URL_STAGING = 'https://staging.cadzero.xyz/sign-in'  # Staging frontend sign-in URL
 CLERK_SIGN_IN_URL_PRODUCTION = 'https://www.cadzero.xyz/sign-in'  # Production frontend sign-in URL
 
-def get_auth_url():
+def get_auth_url(callback_port=None):
     """Get the appropriate authentication URL based on current endpoint"""
     # Add callback URL parameter for local callback server
-    callback_url = 'http://localhost:8765/'
+    callback_url = f'http://localhost:{callback_port or AUTH_CALLBACK_PORT}/'
     
     if current_endpoint == PRODUCTION_ENDPOINT:
         base_url = CLERK_SIGN_IN_URL_PRODUCTION
@@ -47,4 +47,89 @@ def get_auth_url():
     else:
         base_url = CLERK_SIGN_IN_URL_LOCAL
     
-    return f"{base_url}?redirect_url={callback_url}"
\ No newline at end of file
+    return f"{base_url}?redirect_url={callback_url}"
+
+# Tool Execution
+# Seconds to wait for a single tool call to finish on Fusion's main thread.
+# A 'timeout' in the tool output payload overrides these.
+TOOL_EXECUTION_TIMEOUT = 30
+
+# Per-tool time budgets in seconds, by tool name (falls back to TOOL_EXECUTION_TIMEOUT).
+TOOL_TIMEOUTS = {}
+
+# Run all tool calls of a chat turn in one custom event dispatch instead of
+# one round trip per tool call.
+BATCH_TOOL_EXECUTION = True
+
+# When batching, call adsk.doEvents() after every N steps (0 = once at the end).
+BATCH_DO_EVENTS_EVERY = 0
+
+# Defer design compute while a batch of at least this many tool steps runs, so
+# Fusion recomputes once at the end instead of after every feature (0 = never).
+# Streamed turns don't know their step count up front; they defer from their
+# first tool call unless this is 0.
+DEFERRED_COMPUTE_MIN_STEPS = 2
+
+# Number of compiled tool code objects kept in the LRU cache.
+COMPILED_CODE_CACHE_SIZE = 64
+
+# Request a streamed (NDJSON / SSE) chat response so text and tool calls are
+# handled as they arrive. Falls back to the single JSON response automatically.
+STREAM_CHAT_RESPONSES = True
+
+# Backend HTTP connection pool
+HTTP_REQUEST_TIMEOUT = 300  # seconds; chat turns can take a while
+HTTP_POOL_MAX_IDLE_PER_HOST = 2
+HTTP_POOL_IDLE_TIMEOUT = 60  # seconds an idle keep-alive connection is kept
+HTTP_COMPRESSION_ENABLED = True  # gzip chat request bodies; endpoints that reject it get plain JSON
+HTTP_COMPRESS_MIN_BYTES = 1024  # smaller bodies aren't worth compressing
+
+# Conversation history compaction for each chat turn.
+HISTORY_TOKEN_BUDGET = 8000  # approximate tokens of history sent with a request
+HISTORY_KEEP_RECENT_TURNS = 3  # most recent turns always sent verbatim
+HISTORY_SUMMARY_CHARS = 200  # older tool results longer than this are summarized
+
+# Main-thread execution registry limits
+EXECUTION_MAX_PENDING = 100  # executions waiting for a result before the oldest are given up on
+EXECUTION_LATE_RESULT_TTL = 300  # seconds a timed-out execution is remembered to drop its late result
+
+# Structured telemetry: one JSON line per chat turn, tool execution and auth event.
+# Analyse with scripts/analyze_telemetry.py.
+TELEMETRY_ENABLED = True
+TELEMETRY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'telemetry', 'events.jsonl')
+TELEMETRY_MAX_BYTES = 5 * 1024 * 1024  # rotate the file when it would grow past this
+TELEMETRY_BACKUP_COUNT = 3  # rotated files kept (events.jsonl.1, .2, ...)
+
+# Proactive session token refresh. The token is renewed in the background
+# TOKEN_REFRESH_LEAD_TIME seconds before it expires, using the stored session ID.
+TOKEN_REFRESH_ENABLED = True
+TOKEN_REFRESH_PATH = '/auth/refresh'
+TOKEN_REFRESH_LEAD_TIME = 120  # seconds before expiry
+TOKEN_REFRESH_RETRY_BASE = 5  # first retry delay in seconds, doubled on each failure
+TOKEN_REFRESH_RETRY_MAX = 300  # longest retry delay in seconds
+
+
+def get_token_refresh_url():
+    """Get the token refresh URL for the current endpoint"""
+    return f"{current_endpoint}{TOKEN_REFRESH_PATH}"
+
+# Sign-in callback server. Falls back to an ephemeral port if this one is busy.
+AUTH_CALLBACK_PORT = 8765
+AUTH_SIGNIN_TIMEOUT = 300  # seconds to wait for the user to finish signing in
+
+# Worker pool for palette requests (chat turns, sign-in). All chat turns share
+# one serial lane, so they run one at a time in order, whatever their session.
+PALETTE_WORKERS = 4
+PALETTE_MAX_QUEUED = 20  # tasks waiting to start before new ones are refused
+PALETTE_SHUTDOWN_TIMEOUT = 2  # seconds stop() waits for running work
+TURN_MERGE_WINDOW = 2.0  # seconds in which an identical chat message is merged into the pending turn
+
+# Asyncio client for auxiliary backend requests (health, auth status), run
+# concurrently on a background event loop.
+ASYNC_CLIENT_TIMEOUT = 30  # seconds
+HEALTH_PATH = '/health'
+AUTH_STATUS_PATH = '/auth/status'
+
+# JSON codec for palette, custom event and backend messages. orjson is used when
+# it is installed (and this is on); otherwise the standard json module.
+FAST_JSON_ENABLED = True
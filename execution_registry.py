@@ -0,0 +1,167 @@
+"""
+Registry of Python executions dispatched to Fusion's main thread.
+Tracks pending executions, delivers their results to the waiting worker thread
+and keeps memory bounded when executions time out or results arrive late.
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
+
+
+class ExecutionCancelled(Exception):
+    """Raised by generated code (via cadzero_check_cancelled) when its execution was cancelled"""
+
+
+class ExecutionRegistry:
+    """
+    Thread-safe registry of main-thread executions.
+
+    Each execution gets an ID from an atomic counter, a Future that the main thread
+    completes and a cancel Event that generated code can poll. When the waiter times out,
+    the cancel Event is set and the ID is remembered for late_result_ttl seconds so a late
+    result can be recognised and dropped instead of being stored.
+    """
+
+    def __init__(self, max_pending=100, late_result_ttl=300, max_abandoned=1000):
+        self.max_pending = max_pending
+        self.late_result_ttl = late_result_ttl
+        self.max_abandoned = max_abandoned
+        self._counter = itertools.count(1)
+        self._pending = OrderedDict()  # execution_id -> (Future, cancel Event)
+        self._progress = {}  # execution_id -> results of the batch steps finished so far
+        self._abandoned = OrderedDict()  # execution_id -> expiry (time.monotonic)
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.registered = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.evicted = 0
+        self.late_results = 0
+        self.unknown_results = 0
+
+    def register(self):
+        """Create a new pending execution. Returns (execution_id, future)"""
+        future = Future()
+
+        with self._lock:
+            execution_id = f'exec_{next(self._counter)}_{int(time.time())}'
+            self._pending[execution_id] = (future, threading.Event())
+            self.registered += 1
+
+            # Bound the number of pending executions; the oldest are given up on
+            while len(self._pending) > self.max_pending:
+                evicted_id, (evicted_future, evicted_cancel) = self._pending.popitem(last=False)
+                evicted_future.cancel()
+                evicted_cancel.set()
+                self._progress.pop(evicted_id, None)
+                self._abandon(evicted_id)
+                self.evicted += 1
+
+            self._prune()
+
+        return execution_id, future
+
+    def complete(self, execution_id, result):
+        """
+        Deliver the result of an execution. Returns False if nobody is waiting for it
+        any more (timed out, evicted or unknown), in which case the result is dropped.
+        """
+        with self._lock:
+            future, _ = self._pending.pop(execution_id, (None, None))
+            self._progress.pop(execution_id, None)
+
+            if future is None:
+                if self._abandoned.pop(execution_id, None) is not None:
+                    self.late_results += 1
+                else:
+                    self.unknown_results += 1
+                self._prune()
+                return False
+
+            self.completed += 1
+            if not future.done():
+                future.set_result(result)
+
+        return True
+
+    def record_progress(self, execution_id, step_result):
+        """
+        Record the result of one finished step of a batch execution, so it isn't lost
+        if the waiter times out before the whole batch completes. Dropped once nobody waits.
+        """
+        with self._lock:
+            if execution_id in self._pending:
+                self._progress.setdefault(execution_id, []).append(step_result)
+
+    def take_progress(self, execution_id):
+        """Get (and forget) the step results recorded for an execution that timed out"""
+        with self._lock:
+            return self._progress.pop(execution_id, [])
+
+    def wait(self, execution_id, future, timeout):
+        """Wait for an execution's result. Returns None if it did not complete in time"""
+        try:
+            return future.result(timeout=timeout)
+        except (FutureTimeoutError, CancelledError):
+            pass
+
+        with self._lock:
+            pending = self._pending.pop(execution_id, None)
+            if pending is not None:
+                # Let the still-running code notice it has been given up on
+                pending[1].set()
+                self._abandon(execution_id)
+                self.timed_out += 1
+                return None
+
+        # Completed between the timeout and taking the lock
+        return future.result() if future.done() and not future.cancelled() else None
+
+    def get_cancel_event(self, execution_id):
+        """
+        Get the cancel Event of an execution. Executions nobody waits for any more
+        get an already-set Event, so the main thread can skip them.
+        """
+        with self._lock:
+            pending = self._pending.get(execution_id)
+
+        if pending is not None:
+            return pending[1]
+
+        cancelled = threading.Event()
+        cancelled.set()
+        return cancelled
+
+    def _abandon(self, execution_id):
+        """Remember a given-up execution so its late result can be recognised. Lock must be held"""
+        self._abandoned[execution_id] = time.monotonic() + self.late_result_ttl
+        while len(self._abandoned) > self.max_abandoned:
+            self._abandoned.popitem(last=False)
+
+    def _prune(self):
+        """Forget abandoned executions whose TTL has passed. Lock must be held"""
+        now = time.monotonic()
+        while self._abandoned:
+            execution_id, expiry = next(iter(self._abandoned.items()))
+            if expiry > now:
+                break
+            del self._abandoned[execution_id]
+
+    def stats(self):
+        """Get registry sizes and counters"""
+        with self._lock:
+            self._prune()
+            return {
+                'pending': len(self._pending),
+                'abandoned': len(self._abandoned),
+                'registered': self.registered,
+                'completed': self.completed,
+                'timed_out': self.timed_out,
+                'evicted': self.evicted,
+                'late_results': self.late_results,
+                'unknown_results': self.unknown_results
+            }
@@ -0,0 +1,203 @@
+"""
+Conversation history for CADZERO chat.
+The Python side owns the history so the palette only sends new messages
+and each backend request carries a compacted, token-budgeted history
+instead of the whole session.
+"""
+
+import json
+import threading
+import uuid
+
+
+def estimate_tokens(text):
+    """Rough token estimate (~4 characters per token) used for history budgeting"""
+    return len(text) // 4 + 1
+
+
+def component_to_text(component_data):
+    """Convert palette component data (table / text) to plain text for LLM context"""
+    component_type = component_data.get('type')
+
+    if component_type == 'text':
+        return component_data.get('content') or ''
+
+    if component_type != 'table':
+        return json.dumps(component_data)
+
+    text = f"{component_data['title']}\n\n" if component_data.get('title') else ''
+    columns = component_data.get('columns') or []
+    rows = component_data.get('data') or []
+
+    if columns:
+        keys = [col.get('key') for col in columns]
+        headers = [col.get('label') or col.get('key') for col in columns]
+    elif rows:
+        keys = list(rows[0].keys())
+        headers = [key[:1].upper() + key[1:].replace('_', ' ') for key in keys]
+    else:
+        keys = headers = []
+
+    if headers:
+        text += ' | '.join(headers) + '\n'
+        text += ' | '.join('---' for _ in headers) + '\n'
+        for row in rows:
+            values = [str(row[key]) if row.get(key) is not None else '-' for key in keys]
+            text += ' | '.join(values) + '\n'
+
+    if component_data.get('summary'):
+        text += f"\n{component_data['summary']}"
+
+    return text
+
+
+def result_to_text(result):
+    """Convert a captured tool result to the text stored in history"""
+    if not isinstance(result, str):
+        return json.dumps(result)
+
+    if result.strip().startswith('{'):
+        try:
+            component_data = json.loads(result)
+        except ValueError:
+            return result
+        if isinstance(component_data, dict) and component_data.get('type'):
+            return component_to_text(component_data)
+        # JSON that isn't a palette component carries no useful context
+        return ''
+
+    return result
+
+
+def summarize_content(content, max_chars):
+    """Collapse long content to its first line plus a note of what was omitted"""
+    if len(content) <= max_chars:
+        return content
+
+    lines = content.splitlines()
+    first_line = lines[0] if lines else ''
+    if len(first_line) > max_chars:
+        first_line = first_line[:max_chars] + '...'
+
+    return f'{first_line}\n[{len(lines) - 1} more lines omitted from history ({len(content)} chars total)]'
+
+
+def compact_history(messages, token_budget, keep_recent_turns=3, summary_chars=200):
+    """
+    Compact a list of history messages to fit a token budget. Deterministic: the same
+    input always gives the same output.
+
+    - The last keep_recent_turns turns (a turn starts at a user message) are kept verbatim.
+    - Older tool results are collapsed to short summaries.
+    - Older assistant text repeated later is dropped, keeping only its latest occurrence.
+    - If still over budget, the oldest messages are dropped (the latest is always kept).
+
+    Returns messages in the {'role', 'content'} shape the backend expects.
+    """
+    user_indexes = [i for i, message in enumerate(messages) if message['role'] == 'user']
+    if keep_recent_turns <= 0:
+        recent_start = len(messages)
+    elif len(user_indexes) >= keep_recent_turns:
+        recent_start = user_indexes[-keep_recent_turns]
+    else:
+        recent_start = 0
+
+    compacted = []
+    seen_assistant_text = set()
+
+    # Walk newest to oldest so the latest copy of duplicated text is the one kept
+    for index in range(len(messages) - 1, -1, -1):
+        message = messages[index]
+        content = message['content']
+
+        if message['role'] == 'assistant':
+            # Recent turns stay verbatim and paired with their replies, even if a reply repeats
+            if index < recent_start and content in seen_assistant_text:
+                continue
+            seen_assistant_text.add(content)
+
+            if index < recent_start and message.get('kind') == 'tool_result':
+                content = summarize_content(content, summary_chars)
+
+        compacted.append({'role': message['role'], 'content': content})
+
+    # Enforce the budget from the newest message backwards
+    window = []
+    used_tokens = 0
+    for message in compacted:
+        tokens = estimate_tokens(message['content'])
+        if window and used_tokens + tokens > token_budget:
+            break
+        used_tokens += tokens
+        window.append(message)
+
+    window.reverse()
+    return window
+
+
+class ConversationSession:
+    """Stores the messages of one chat session, each with a sequential message ID"""
+
+    def __init__(self):
+        self.session_id = uuid.uuid4().hex
+        self._messages = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def append(self, role, content, kind='message'):
+        """
+        Add a message to the session and return its message ID.
+        kind is 'message', 'tool_result' or 'response' and drives history compaction.
+        """
+        with self._lock:
+            message_id = self._next_id
+            self._next_id += 1
+            self._messages.append({
+                'id': message_id,
+                'role': role,
+                'content': content,
+                'kind': kind
+            })
+            return message_id
+
+    def record_turn_results(self, execution_results, response_text):
+        """
+        Add the assistant side of a completed turn: tool results first (so the LLM has
+        context for follow-up questions), then the main response.
+        """
+        for result in execution_results or []:
+            text = result_to_text(result['result']) if result.get('result') else ''
+            if text:
+                self.append('assistant', text, kind='tool_result')
+
+        if response_text:
+            self.append('assistant', response_text, kind='response')
+
+    def messages(self):
+        """Get a copy of all messages in the session"""
+        with self._lock:
+            return [dict(message) for message in self._messages]
+
+    def compacted(self, token_budget, keep_recent_turns=3, summary_chars=200):
+        """Get the session history compacted to fit token_budget (see compact_history)"""
+        return compact_history(self.messages(), token_budget, keep_recent_turns, summary_chars)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._messages)
+
+
+# Global conversation session for the palette
+conversation = ConversationSession()
+
+
+def reset_conversation():
+    """Start a new, empty conversation session"""
+    global conversation
+    conversation = ConversationSession()
+    return conversation
+
+
+def get_conversation():
+    """Get the current conversation session"""
+    return conversation
@@ -0,0 +1,384 @@
+"""
+Pooled HTTP client for CADZERO backend calls.
+Keeps persistent keep-alive connections per endpoint so chat turns don't pay
+a fresh TCP/TLS handshake every time, and gzips large request bodies and
+responses where the endpoint supports it.
+"""
+
+import http.client
+import io
+import threading
+import time
+import urllib.error
+import urllib.parse
+import zlib
+from . import config
+
+
+# zlib window bits for the gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# A 400 answer to a gzipped body only counts as a rejection of the encoding when
+# its body mentions one of these (a 415 always does)
+COMPRESSION_ERROR_MARKERS = (b'encoding', b'gzip', b'compress')
+
+# Encoding-related 400s before an endpoint is taken not to accept gzipped bodies
+COMPRESSION_REJECTIONS_TO_DISABLE = 2
+
+
+# Errors that mean a reused keep-alive socket was closed by the server while idle
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+
+
+def gzip_compress(data, level=6):
+    """Compress bytes into a gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def is_compression_rejection(error):
+    """Whether an HTTPError answering a gzipped body says the server couldn't decode the body"""
+    if error.code == 415:
+        return True
+    if error.code != 400:
+        return False
+
+    # RFC 7694: a server names the encodings it does accept in Accept-Encoding
+    if error.headers is not None and error.headers.get('Accept-Encoding') is not None:
+        return True
+    body = error.fp.getvalue() if isinstance(error.fp, io.BytesIO) else b''
+    return any(marker in body.lower() for marker in COMPRESSION_ERROR_MARKERS)
+
+
+class PooledResponse:
+    """
+    Wraps an http.client.HTTPResponse and hands its connection back to the pool
+    when closed, provided the body was fully read.
+
+    A gzip-encoded body is decompressed incrementally, so streamed responses can
+    still be read line by line as data arrives.
+    """
+
+    def __init__(self, pool, key, connection, response, timings=None):
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.msg
+        # connect_ms / ttfb_ms / reused / request_bytes / sent_bytes for this request
+        self.timings = timings or {}
+
+        self.content_encoding = (response.getheader('Content-Encoding') or '').strip().lower()
+        self._decompressor = zlib.decompressobj(GZIP_WBITS) if self.content_encoding == 'gzip' else None
+        self._buffer = b''
+        self._eof = False
+        # Body bytes as received, before decompression
+        self.received_bytes = 0
+
+    def read(self, amt=None):
+        if self._decompressor is None:
+            data = self._response.read(amt)
+            self.received_bytes += len(data)
+            return data
+
+        if amt is None or amt < 0:
+            while self._fill():
+                pass
+            data, self._buffer = self._buffer, b''
+            return data
+
+        while len(self._buffer) < amt and self._fill():
+            pass
+        data, self._buffer = self._buffer[:amt], self._buffer[amt:]
+        return data
+
+    def readline(self, limit=-1):
+        if self._decompressor is None:
+            line = self._response.readline(limit)
+            self.received_bytes += len(line)
+            return line
+
+        while b'\n' not in self._buffer and (limit < 0 or len(self._buffer) < limit) and self._fill():
+            pass
+        end = self._buffer.find(b'\n') + 1 or len(self._buffer)
+        if limit >= 0:
+            end = min(end, limit)
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def __iter__(self):
+        if self._decompressor is None:
+            for line in self._response:
+                self.received_bytes += len(line)
+                yield line
+            return
+
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+    def _fill(self):
+        """Decompress the next chunk of the body into the buffer. Returns False at the end"""
+        if self._eof:
+            return False
+
+        # read1 returns as soon as some data is available, which keeps streams incremental
+        chunk = self._response.read1(16384)
+        self.received_bytes += len(chunk)
+        if chunk:
+            self._buffer += self._decompressor.decompress(chunk)
+        else:
+            # read1 doesn't mark a Content-Length body complete; read() does, so the connection can be reused
+            self._response.read()
+            self._buffer += self._decompressor.flush()
+            self._eof = True
+        return True
+
+    def close(self):
+        """Release the connection, reusing it only if the body was fully consumed"""
+        if self._connection is None:
+            return
+
+        reusable = self._response.isclosed() and not self._response.will_close
+        self._response.close()
+        self._pool._release(self._key, self._connection, reusable)
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ConnectionPool:
+    """Per-endpoint pool of persistent HTTP(S) connections with idle eviction"""
+
+    def __init__(self, max_idle_per_host=2, idle_timeout=60, timeout=None, compress_min_bytes=1024):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.compress_min_bytes = compress_min_bytes
+        self._idle = {}  # (scheme, host, port) -> list of (connection, last_used)
+        # (scheme, host, port) -> True/False once an endpoint accepted or rejected a gzipped body
+        self._gzip_requests = {}
+        # (scheme, host, port) -> encoding-related 400s since the last accepted gzipped body
+        self._gzip_rejections = {}
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.connections_opened = 0
+        self.requests = 0
+        self.reused = 0
+        self.stale_retries = 0
+        self.compressed_requests = 0
+        self.compression_fallbacks = 0
+        self.request_bytes = 0  # request bodies before compression
+        self.sent_bytes = 0  # request bodies as sent
+
+    def _acquire(self, key):
+        """Get an idle connection for key, or a new one. Returns (connection, reused)"""
+        now = time.monotonic()
+        expired = []
+        connection = None
+
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    connection = candidate
+                    break
+                expired.append(candidate)
+
+        for stale in expired:
+            stale.close()
+
+        if connection is not None:
+            return connection, True
+
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        connection = connection_class(host, port, timeout=self.timeout)
+
+        with self._lock:
+            self.connections_opened += 1
+
+        return connection, False
+
+    def _release(self, key, connection, reusable):
+        """Return a connection to the idle list, or close it"""
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append((connection, time.monotonic()))
+                    return
+        connection.close()
+
+    def request(self, method, url, body=None, headers=None, compress=False):
+        """
+        Send a request over a pooled connection and return a PooledResponse.
+
+        gzip responses are always accepted and decompressed transparently. With
+        compress=True a body of at least compress_min_bytes is sent gzipped, unless
+        the endpoint has rejected a gzipped body before. Until an endpoint has accepted
+        a gzipped body, a rejection of the encoding (415, or a 400 that names it) is
+        retried uncompressed. A 415 is remembered for the endpoint at once, a 400 only
+        after COMPRESSION_REJECTIONS_TO_DISABLE of them; other errors are
+        raised without resending.
+
+        Raises urllib.error.HTTPError for 4xx/5xx responses and urllib.error.URLError
+        for connection failures, matching urllib.request.urlopen.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme.lower()
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parsed.hostname, port)
+
+        path = parsed.path or '/'
+        if parsed.query:
+            path = f'{path}?{parsed.query}'
+
+        headers = dict(headers or {})
+        headers.setdefault('Accept-Encoding', 'gzip')
+
+        with self._lock:
+            self.requests += 1
+            gzip_supported = self._gzip_requests.get(key)
+
+        compressed = (
+            compress and body is not None and len(body) >= self.compress_min_bytes
+            and gzip_supported is not False and 'Content-Encoding' not in headers
+        )
+
+        if not compressed:
+            return self._send(key, url, method, path, body, headers)
+
+        try:
+            response = self._send(key, url, method, path, gzip_compress(body), dict(headers, **{'Content-Encoding': 'gzip'}), len(body))
+        except urllib.error.HTTPError as e:
+            if gzip_supported or not is_compression_rejection(e):
+                raise
+            # The endpoint couldn't decode the gzipped body; send this one plain
+            with self._lock:
+                rejections = self._gzip_rejections.get(key, 0) + 1
+                self._gzip_rejections[key] = rejections
+                if e.code == 415 or rejections >= COMPRESSION_REJECTIONS_TO_DISABLE:
+                    self._gzip_requests[key] = False
+                self.compression_fallbacks += 1
+            return self._send(key, url, method, path, body, headers)
+
+        with self._lock:
+            self._gzip_requests[key] = True
+            self._gzip_rejections.pop(key, None)
+            self.compressed_requests += 1
+        return response
+
+    def _send(self, key, url, method, path, body, headers, request_bytes=None):
+        """Send one request, retrying on connections the server closed while idle"""
+        sent_bytes = len(body) if body is not None else 0
+        request_bytes = sent_bytes if request_bytes is None else request_bytes
+
+        with self._lock:
+            self.request_bytes += request_bytes
+            self.sent_bytes += sent_bytes
+
+        while True:
+            connection, reused = self._acquire(key)
+            try:
+                connect_ms = 0.0
+                if not reused:
+                    connect_start = time.perf_counter()
+                    connection.connect()
+                    connect_ms = (time.perf_counter() - connect_start) * 1000
+
+                send_start = time.perf_counter()
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                ttfb_ms = (time.perf_counter() - send_start) * 1000
+                break
+            except STALE_CONNECTION_ERRORS as e:
+                connection.close()
+                if not reused:
+                    raise urllib.error.URLError(e)
+                # The server dropped an idle socket; retry once per stale connection
+                with self._lock:
+                    self.stale_retries += 1
+            except OSError as e:
+                connection.close()
+                raise urllib.error.URLError(e)
+
+        if reused:
+            with self._lock:
+                self.reused += 1
+
+        pooled_response = PooledResponse(self, key, connection, response, {
+            'connect_ms': connect_ms,
+            'ttfb_ms': ttfb_ms,
+            'reused': reused,
+            'request_bytes': request_bytes,
+            'sent_bytes': sent_bytes
+        })
+
+        if response.status >= 400:
+            # Read the error body so the connection can be reused; it stays readable on the error
+            error_body = pooled_response.read()
+            pooled_response.close()
+            raise urllib.error.HTTPError(url, response.status, response.reason, response.msg, io.BytesIO(error_body))
+
+        return pooled_response
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle_lists = list(self._idle.values())
+            self._idle = {}
+
+        for idle in idle_lists:
+            for connection, _ in idle:
+                connection.close()
+
+    def stats(self):
+        """Get connection and request counters"""
+        with self._lock:
+            return {
+                'connections_opened': self.connections_opened,
+                'requests': self.requests,
+                'reused': self.reused,
+                'stale_retries': self.stale_retries,
+                'idle': sum(len(idle) for idle in self._idle.values()),
+                'compressed_requests': self.compressed_requests,
+                'compression_fallbacks': self.compression_fallbacks,
+                'request_bytes': self.request_bytes,
+                'sent_bytes': self.sent_bytes
+            }
+
+
+# Global pool used for all backend calls
+default_pool = ConnectionPool(
+    max_idle_per_host=config.HTTP_POOL_MAX_IDLE_PER_HOST,
+    idle_timeout=config.HTTP_POOL_IDLE_TIMEOUT,
+    timeout=config.HTTP_REQUEST_TIMEOUT,
+    compress_min_bytes=config.HTTP_COMPRESS_MIN_BYTES
+)
+
+
+def request(method, url, body=None, headers=None, compress=False):
+    """Send a request to the backend over the shared connection pool"""
+    return default_pool.request(method, url, body=body, headers=headers, compress=compress)
+
+
+def close_all():
+    """Close all pooled connections (called when the add-in stops)"""
+    default_pool.close_all()
@@ -10,6 +10,10 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import os
+import queue
+import sys
+import threading
+import time
 import traceback
 import adsk.core
 
@@ -23,27 +27,141 @@ try:
 except:
     DEBUG = False
 
+# Messages longer than this are truncated before being written.
+MAX_LOG_MESSAGE_LENGTH = 2000
 
-def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
+# Per call site rate limit: at most LOG_RATE_LIMIT messages every LOG_RATE_INTERVAL seconds.
+# Errors are never rate limited.
+LOG_RATE_LIMIT = 20
+LOG_RATE_INTERVAL = 1.0
+
+_log_queue = queue.Queue()
+_log_writer = None
+_log_writer_lock = threading.Lock()
+_rate_limits = {}  # (filename, lineno) -> [window_start, count, suppressed]
+_rate_limits_lock = threading.Lock()
+
+
+def log(message, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
     """Utility function to easily handle logging in your app.
 
+    Messages are handed to a background writer so the caller never waits on print
+    or app.log. Non-error messages are dropped up front unless config.DEBUG is True
+    or force_console is set.
+
     Arguments:
-    message -- The message to log.
+    message -- The message to log, or a callable returning it. A callable is only
+               called when the message is actually written, so expensive formatting
+               (e.g. lambda: f'{big_dict}') costs nothing when the level is disabled.
     level -- The logging severity level.
     force_console -- Forces the message to be written to the Text Command window. 
     """    
-    # Always print to console, only seen through IDE.
-    print(message)  
-
-    # Log all errors to Fusion log file.
-    if level == adsk.core.LogLevels.ErrorLogLevel:
-        log_type = adsk.core.LogTypes.FileLogType
-        app.log(message, level, log_type)
-
-    # If config.DEBUG is True write all log messages to the console.
-    if DEBUG or force_console:
-        log_type = adsk.core.LogTypes.ConsoleLogType
-        app.log(message, level, log_type)
+    is_error = level == adsk.core.LogLevels.ErrorLogLevel
+    to_console = DEBUG or force_console
+
+    # Nothing would be written for this level
+    if not (is_error or to_console):
+        return
+
+    suppressed = 0
+    if not is_error:
+        caller = sys._getframe(1)
+        suppressed = _check_rate_limit((caller.f_code.co_filename, caller.f_lineno))
+        if suppressed is None:
+            return
+
+    if callable(message):
+        message = message()
+    message = truncate_log_message(str(message))
+
+    if suppressed:
+        message = f'{message}\n[{suppressed} earlier messages from this call site were suppressed]'
+
+    _ensure_log_writer()
+    _log_queue.put((message, level, is_error, to_console))
+
+
+def truncate_log_message(message: str, max_length: int = None) -> str:
+    """Shortens a log message to max_length characters (MAX_LOG_MESSAGE_LENGTH by default)."""
+    max_length = max_length or MAX_LOG_MESSAGE_LENGTH
+    if len(message) <= max_length:
+        return message
+    return f'{message[:max_length]}... [{len(message) - max_length} chars truncated]'
+
+
+def flush_log():
+    """Blocks until every queued log message has been written."""
+    if _log_writer is not None:
+        _log_queue.join()
+
+
+def stop_log_writer():
+    """Writes the remaining log messages and stops the background writer."""
+    global _log_writer
+
+    with _log_writer_lock:
+        writer = _log_writer
+        _log_writer = None
+
+    if writer is not None:
+        _log_queue.put(None)
+        writer.join(timeout=2)
+
+
+def _check_rate_limit(call_site):
+    """Returns None if the message should be dropped, else the number suppressed since the last one written."""
+    now = time.monotonic()
+
+    with _rate_limits_lock:
+        state = _rate_limits.get(call_site)
+        if state is None or now - state[0] >= LOG_RATE_INTERVAL:
+            suppressed = state[2] if state else 0
+            _rate_limits[call_site] = [now, 1, 0]
+            return suppressed
+
+        if state[1] >= LOG_RATE_LIMIT:
+            state[2] += 1
+            return None
+
+        state[1] += 1
+        return 0
+
+
+def _ensure_log_writer():
+    global _log_writer
+
+    if _log_writer is not None:
+        return
+
+    with _log_writer_lock:
+        if _log_writer is None:
+            _log_writer = threading.Thread(target=_write_log_entries, name='fusionAddInUtils-log', daemon=True)
+            _log_writer.start()
+
+
+def _write_log_entries():
+    while True:
+        entry = _log_queue.get()
+        try:
+            if entry is None:
+                return
+
+            message, level, is_error, to_console = entry
+
+            # Print to console, only seen through IDE.
+            print(message)
+
+            # Log all errors to Fusion log file.
+            if is_error:
+                app.log(message, level, adsk.core.LogTypes.FileLogType)
+
+            # If config.DEBUG is True write all log messages to the console.
+            if to_console:
+                app.log(message, level, adsk.core.LogTypes.ConsoleLogType)
+        except:
+            pass
+        finally:
+            _log_queue.task_done()
 
 
 def handle_error(name: str, show_message_box: bool = False):
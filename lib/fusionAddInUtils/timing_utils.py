@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+# Number of finished turns kept in the ring buffer.
+TURN_TIMINGS_SIZE = 50
+
+_turn_timings = deque(maxlen=TURN_TIMINGS_SIZE)
+_turn_timings_lock = threading.Lock()
+_active = threading.local()
+
+
+class TurnTimer:
+    """Records timing spans for the stages of one chat turn.
+
+    Spans can be added from any thread. A timer is made current for a thread with
+    activate(), so code deep in the call chain can reach it via current_turn_timer().
+    """
+
+    def __init__(self, name: str = 'chat_turn'):
+        self.name = name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, **attributes):
+        """Time the enclosed block as a span named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(stage, (time.perf_counter() - start) * 1000, start=start, **attributes)
+
+    def add_span(self, stage: str, duration_ms: float, start: float = None, **attributes):
+        """Record a span measured elsewhere.
+
+        Arguments:
+        stage -- Name of the stage, e.g. 'http_connect'.
+        duration_ms -- Duration of the stage in milliseconds.
+        start -- time.perf_counter() value at which the stage started. Defaults to now minus the duration.
+        attributes -- Extra values stored with the span, e.g. tool_name.
+        """
+        if start is None:
+            start = time.perf_counter() - duration_ms / 1000
+
+        record = {
+            'stage': stage,
+            'offset_ms': round((start - self._start) * 1000, 3),
+            'duration_ms': round(duration_ms, 3)
+        }
+        record.update(attributes)
+
+        with self._lock:
+            self._spans.append(record)
+
+    @contextmanager
+    def activate(self):
+        """Make this timer the current one for the calling thread."""
+        previous = getattr(_active, 'timer', None)
+        _active.timer = self
+        try:
+            yield self
+        finally:
+            _active.timer = previous
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = sorted(self._spans, key=lambda span: span['offset_ms'])
+
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'spans': spans
+        }
+
+    def finish(self) -> dict:
+        """Close the turn and store its timings in the ring buffer."""
+        record = self.to_dict()
+        with _turn_timings_lock:
+            _turn_timings.append(record)
+        return record
+
+
+class _NullTurnTimer:
+    """Stand-in used when no timer is active; records nothing."""
+
+    name = None
+
+    def span(self, stage: str, **attributes):
+        return nullcontext()
+
+    def add_span(self, stage: str, duration_ms: float, start: float = None, **attributes):
+        pass
+
+    def activate(self):
+        return nullcontext(self)
+
+    def to_dict(self):
+        return None
+
+    def finish(self):
+        return None
+
+
+_null_turn_timer = _NullTurnTimer()
+
+
+def start_turn_timer(name: str = 'chat_turn') -> TurnTimer:
+    """Creates a timer for a new turn. Call finish() on it when the turn is done."""
+    return TurnTimer(name)
+
+
+def current_turn_timer():
+    """Returns the timer made current on this thread with activate(), or a no-op timer."""
+    return getattr(_active, 'timer', None) or _null_turn_timer
+
+
+def get_turn_timings() -> list:
+    """Returns the timings of the most recent turns, oldest first."""
+    with _turn_timings_lock:
+        return list(_turn_timings)
+
+
+def export_turn_timings() -> str:
+    """Returns the timings of the most recent turns as a JSON string."""
+    return json.dumps(get_turn_timings(), indent=2)
+
+
+def clear_turn_timings():
+    """Clears the ring buffer of turn timings."""
+    with _turn_timings_lock:
+        _turn_timings.clear()
@@ -0,0 +1,69 @@
+"""
+JSON codec for CADZERO messages.
+One place to encode and decode palette messages, custom event payloads and
+backend requests/responses: compact output, tool outputs decoded once, and
+orjson instead of the standard library when it is installed.
+"""
+
+import json
+from . import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Key under which decode_tool_output keeps the decoded payload on a tool output
+DECODED_OUTPUT_KEY = '_output_data'
+
+_use_orjson = orjson is not None and config.FAST_JSON_ENABLED
+
+# Name of the JSON backend in use, for the debug stats
+BACKEND = 'orjson' if _use_orjson else 'json'
+
+
+def dumps(obj):
+    """Encode obj as compact JSON text"""
+    if _use_orjson:
+        try:
+            return orjson.dumps(obj).decode('utf-8')
+        except TypeError:
+            # e.g. non-string dict keys or integers orjson can't represent; let json decide
+            pass
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def dumps_bytes(obj):
+    """Encode obj as compact UTF-8 JSON bytes, e.g. for an HTTP request body"""
+    if _use_orjson:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def loads(data):
+    """Decode JSON text or UTF-8 bytes. Raises json.JSONDecodeError (a ValueError) for invalid JSON"""
+    if _use_orjson:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def decode_tool_output(tool_output):
+    """
+    Get the payload of a backend tool output. Its 'output' is a JSON string nested
+    inside the response; it is decoded on first use and cached on the tool output,
+    so batching, retries and timeouts don't parse it again.
+    """
+    if not tool_output:
+        return {}
+
+    decoded = tool_output.get(DECODED_OUTPUT_KEY)
+    if decoded is None:
+        output = tool_output.get('output') or '{}'
+        decoded = output if isinstance(output, dict) else loads(output)
+        tool_output[DECODED_OUTPUT_KEY] = decoded
+    return decoded
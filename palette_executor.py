@@ -0,0 +1,167 @@
+"""
+Managed worker pool for work started from the CADZERO palette.
+Replaces one-off threads per request with a bounded pool, runs chat turns of a
+session one at a time in submission order and can be shut down cleanly.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class PaletteQueueFull(Exception):
+    """Raised when more work is submitted than the executor is allowed to queue"""
+
+
+class PaletteExecutor:
+    """
+    Bounded thread pool with serial lanes.
+
+    submit() runs independent work (e.g. waiting for a sign-in callback) on any
+    free worker. submit_serial() runs work keyed by a lane (e.g. the chat turn lane),
+    so tasks of one lane never overlap and run in submission order, while
+    different lanes can still run side by side.
+    """
+
+    def __init__(self, max_workers=4, max_queued=20):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cadzero-palette')
+        self._lanes = {}  # lane key -> deque of (future, fn, args, kwargs, submitted_at)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._queued = 0
+        self._running = 0
+        self._closed = False
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.max_queue_depth = 0
+        self.total_queue_wait_ms = 0.0
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool. Returns a Future"""
+        # A lane of its own: runs on any free worker, but is still tracked for shutdown
+        return self.submit_serial(_AnonymousLane(), fn, *args, **kwargs)
+
+    def submit_serial(self, lane, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) after all earlier work submitted to the same lane. Returns a Future"""
+        future = Future()
+        with self._lock:
+            self._reserve()
+            queue = self._lanes.get(lane)
+            start_lane = queue is None
+            if start_lane:
+                queue = self._lanes[lane] = deque()
+            queue.append((future, fn, args, kwargs, time.perf_counter()))
+
+        # Only one drainer per lane; it picks up tasks appended while it runs
+        if start_lane:
+            self._executor.submit(self._drain_lane, lane)
+        return future
+
+    def queue_depth(self, lane=None):
+        """Number of tasks waiting to start, for one lane or overall"""
+        with self._lock:
+            if lane is None:
+                return self._queued
+            return len(self._lanes.get(lane, ()))
+
+    def stats(self):
+        """Get queue depths and counters"""
+        with self._lock:
+            return {
+                'queued': self._queued,
+                'running': self._running,
+                'lanes': {
+                    str(lane): len(queue) for lane, queue in self._lanes.items()
+                    if not isinstance(lane, _AnonymousLane)
+                },
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'max_queue_depth': self.max_queue_depth,
+                'avg_queue_wait_ms': round(self.total_queue_wait_ms / max(self.completed + self.failed, 1), 3)
+            }
+
+    def shutdown(self, timeout=2):
+        """
+        Stop accepting work, cancel everything that hasn't started and wait up to
+        timeout seconds for running tasks. Returns True if the pool went idle in time.
+        """
+        with self._lock:
+            self._closed = True
+            pending = [task[0] for queue in self._lanes.values() for task in queue]
+            for queue in self._lanes.values():
+                queue.clear()
+
+        for future in pending:
+            self._cancel(future)
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        with self._lock:
+            self._queued = 0
+            return self._idle.wait_for(lambda: self._running == 0, timeout)
+
+    def _reserve(self):
+        """Account for a newly submitted task. Lock must be held"""
+        if self._closed:
+            raise RuntimeError('Palette executor has been shut down')
+        if self._queued >= self.max_queued:
+            raise PaletteQueueFull(f'{self._queued} palette tasks already queued')
+        self._queued += 1
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queued)
+
+    def _cancel(self, future):
+        if future.cancel():
+            with self._lock:
+                self.cancelled += 1
+
+    def _drain_lane(self, lane):
+        while True:
+            with self._lock:
+                queue = self._lanes.get(lane)
+                if not queue:
+                    self._lanes.pop(lane, None)
+                    return
+                future, fn, args, kwargs, submitted_at = queue.popleft()
+            self._run(future, fn, args, kwargs, submitted_at)
+
+    def _run(self, future, fn, args, kwargs, submitted_at):
+        with self._lock:
+            self._queued = max(self._queued - 1, 0)
+            if not future.set_running_or_notify_cancel():
+                # Cancelled by its submitter while queued
+                self.cancelled += 1
+                return
+            self._running += 1
+            self.total_queue_wait_ms += (time.perf_counter() - submitted_at) * 1000
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            failed = True
+        else:
+            future.set_result(result)
+            failed = False
+
+        with self._lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.completed += 1
+            self._running -= 1
+            if self._running == 0:
+                self._idle.notify_all()
+
+
+class _AnonymousLane:
+    """Lane key for work submitted without a lane"""
+    __slots__ = ()
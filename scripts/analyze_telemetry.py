@@ -0,0 +1,114 @@
+"""
+Offline analyzer for CADZERO telemetry (telemetry/events.jsonl).
+Prints p50/p95/p99 latencies per tool name and per endpoint.
+
+Usage:
+    python scripts/analyze_telemetry.py [path/to/events.jsonl]
+
+Rotated files (events.jsonl.1, .2, ...) next to the given file are included.
+Runs outside Fusion 360 and only needs the standard library.
+"""
+
+import glob
+import json
+import os
+import sys
+from collections import defaultdict
+
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'telemetry', 'events.jsonl')
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a sorted list"""
+    if not values:
+        return None
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def read_events(path):
+    """Yield events from path and its rotated backups, oldest file first"""
+    backups = [name for name in glob.glob(f'{glob.escape(path)}.*') if name.rsplit('.', 1)[-1].isdigit()]
+    files = sorted(backups, key=lambda name: int(name.rsplit('.', 1)[-1]), reverse=True)
+    if os.path.exists(path):
+        files.append(path)
+
+    for name in files:
+        with open(name, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def format_ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+
+def print_table(title, rows):
+    """rows: {name: (count, failures, sorted latencies)}"""
+    print(title)
+    print(f'{"name":<40} {"count":>7} {"failed":>7} {"p50 ms":>10} {"p95 ms":>10} {"p99 ms":>10}')
+    ordered = sorted(rows.items(), key=lambda item: percentile(item[1][2], 95) or 0, reverse=True)
+    for name, (count, failures, latencies) in ordered:
+        print(f'{str(name)[:40]:<40} {count:>7} {failures:>7} '
+              f'{format_ms(percentile(latencies, 50)):>10} {format_ms(percentile(latencies, 95)):>10} {format_ms(percentile(latencies, 99)):>10}')
+    print()
+
+
+def summarize(events):
+    """Group tool exec latencies by tool name and turn latencies by endpoint"""
+    tools = defaultdict(lambda: [0, 0, []])
+    endpoints = defaultdict(lambda: [0, 0, []])
+    endpoint_ttfb = defaultdict(lambda: [0, 0, []])
+
+    for event in events:
+        if event.get('event') == 'tool':
+            row = tools[event.get('tool_name', 'unknown')]
+            row[0] += 1
+            row[1] += 0 if event.get('success') else 1
+            if event.get('exec_ms') is not None:
+                row[2].append(event['exec_ms'])
+        elif event.get('event') == 'turn':
+            endpoint = event.get('endpoint', 'unknown')
+            row = endpoints[endpoint]
+            row[0] += 1
+            row[1] += 0 if event.get('success') else 1
+            if event.get('total_ms') is not None:
+                row[2].append(event['total_ms'])
+
+            ttfb = (event.get('stages') or {}).get('time_to_first_byte')
+            if ttfb is not None:
+                endpoint_ttfb[endpoint][0] += 1
+                endpoint_ttfb[endpoint][2].append(ttfb)
+
+    for rows in (tools, endpoints, endpoint_ttfb):
+        for row in rows.values():
+            row[2].sort()
+
+    return tools, endpoints, endpoint_ttfb
+
+
+def main(argv):
+    path = argv[1] if len(argv) > 1 else DEFAULT_PATH
+    tools, endpoints, endpoint_ttfb = summarize(read_events(path))
+
+    if not tools and not endpoints:
+        print(f'No telemetry events found in {path}')
+        return 1
+
+    print_table('Tool execution time by tool name', tools)
+    print_table('Turn time by endpoint', endpoints)
+    print_table('Time to first byte by endpoint', endpoint_ttfb)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
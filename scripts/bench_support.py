@@ -0,0 +1,54 @@
+"""
+Shared setup for the CADZERO benchmark scripts and tests (tests/conftest.py).
+Imports the add-in as the package 'cadzero' outside Fusion 360. adsk only exists
+inside Fusion, so a mock stand-in is installed when it can't be imported; the
+benchmarks only measure the add-in's own Python code.
+"""
+
+import os
+import statistics
+import sys
+import types
+from unittest import mock
+
+ADDIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+def install_adsk_stub():
+    """Install a MagicMock based adsk package (adsk.core, adsk.fusion)"""
+    adsk = types.ModuleType('adsk')
+    adsk.core = mock.MagicMock(name='adsk.core')
+    adsk.core.LogLevels = _LogLevels
+    adsk.fusion = mock.MagicMock(name='adsk.fusion')
+    adsk.doEvents = mock.MagicMock(name='adsk.doEvents')
+    sys.modules['adsk'] = adsk
+    sys.modules['adsk.core'] = adsk.core
+    sys.modules['adsk.fusion'] = adsk.fusion
+    return adsk
+
+
+def load_addin():
+    """Make the add-in importable as 'cadzero' (e.g. cadzero.http_pool) and return the package"""
+    try:
+        import adsk.core  # noqa: F401
+    except ImportError:
+        install_adsk_stub()
+
+    if 'cadzero' not in sys.modules:
+        package = types.ModuleType('cadzero')
+        package.__path__ = [ADDIN_DIR]
+        sys.modules['cadzero'] = package
+    return sys.modules['cadzero']
+
+
+def percentiles(samples_ms):
+    """Format p50 / p95 of a list of millisecond samples"""
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f'p50 {statistics.median(ordered):.2f} ms, p95 {p95:.2f} ms'
@@ -0,0 +1,64 @@
+"""
+Benchmark: compiling generated tool code on every run vs the compiled code cache.
+
+Usage:
+    python scripts/benchmark_code_cache.py [runs]
+
+Runs payloads of 200, 800 and 2000 lines shaped like generated Fusion code,
+covering the range generated tools produce. adsk is stubbed when not running
+inside Fusion.
+"""
+
+import sys
+import time
+
+from bench_support import load_addin, percentiles
+
+load_addin()
+from cadzero.commands.paletteShow import entry  # noqa: E402
+
+# Payload sizes in lines
+PAYLOAD_LINES = (200, 800, 2000)
+
+
+def make_payload(lines):
+    """Generated-code-like source: sketches, circles and extrudes"""
+    body = [
+        'import adsk.core, adsk.fusion',
+        'design = adsk.fusion.Design.cast(app.activeProduct)',
+        'root = design.rootComponent'
+    ]
+    for index in range(lines // 3):
+        body.append(f'sketch_{index} = root.sketches.add(root.xYConstructionPlane)')
+        body.append(f'sketch_{index}.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create({index}, 0, 0), 0.5)')
+        body.append(f'values_{index} = [x * {index} for x in range(10) if x % 2]')
+    return '\n'.join(body[:lines])
+
+
+def measure(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 100
+    cache = entry.CompiledCodeCache()
+
+    for lines in PAYLOAD_LINES:
+        payload = make_payload(lines)
+        cache.get(payload)
+
+        print(f'{runs} runs of a {payload.count(chr(10)) + 1} line payload:')
+        print(f'  compile():  {percentiles(measure(lambda: compile(payload, "<cadzero_tool>", "exec"), runs))}')
+        print(f'  cache hit:  {percentiles(measure(lambda: cache.get(payload), runs))}')
+
+    print(f'cache stats: {cache.stats()}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
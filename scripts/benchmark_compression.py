@@ -0,0 +1,87 @@
+"""
+Benchmark: chat request body bytes with and without gzip over a simulated session.
+
+Usage:
+    python scripts/benchmark_compression.py [turns]
+
+Each turn adds a component table of all bodies and some generated code to the
+history, and the request body is built as send_chat_message does: history
+compacted with the config budget, encoded with message_codec and gzipped when it
+is at least HTTP_COMPRESS_MIN_BYTES. adsk is stubbed when not running inside Fusion.
+"""
+
+import json
+import random
+import sys
+
+from bench_support import load_addin
+
+load_addin()
+from cadzero import config, history, http_pool, message_codec  # noqa: E402
+
+GENERATED_CODE = (
+    'import adsk.core, adsk.fusion\n'
+    'app = adsk.core.Application.get()\n'
+    'design = adsk.fusion.Design.cast(app.activeProduct)\n'
+    'root = design.rootComponent\n'
+    + 'sketch = root.sketches.add(root.xYConstructionPlane)\n' * 5
+)
+
+
+def bodies_table(count, rng):
+    rows = [
+        {'name': f'Body{i}', 'volume': round(rng.random() * 1000, 3), 'material': 'Steel', 'visible': True}
+        for i in range(count)
+    ]
+    return json.dumps({
+        'type': 'table',
+        'title': 'Bodies',
+        'columns': [{'key': key, 'label': key.title()} for key in rows[0]],
+        'data': rows,
+        'summary': f'{len(rows)} bodies'
+    })
+
+
+def request_body(message, session):
+    data = {
+        'provider': 'openai',
+        'message': message,
+        'tool_choice': 'auto',
+        'max_tool_calls': 5,
+        'history': session.compacted(config.HISTORY_TOKEN_BUDGET, config.HISTORY_KEEP_RECENT_TURNS,
+                                     config.HISTORY_SUMMARY_CHARS),
+        'stream': True
+    }
+    return message_codec.dumps_bytes(data)
+
+
+def main(argv):
+    turns = int(argv[1]) if len(argv) > 1 else 50
+    rng = random.Random(1)
+    session = history.ConversationSession()
+    raw_bytes = sent_bytes = 0
+
+    for turn in range(turns):
+        shape = rng.choice(['box', 'cylinder', 'sphere'])
+        message = f'Create a {shape} of {rng.randint(5, 50)}mm and list all bodies in the design'
+        session.append('user', message)
+
+        body = request_body(message, session)
+        raw_bytes += len(body)
+        if len(body) >= config.HTTP_COMPRESS_MIN_BYTES:
+            sent_bytes += len(http_pool.gzip_compress(body))
+        else:
+            sent_bytes += len(body)
+
+        session.record_turn_results(
+            [{'result': bodies_table(turn + 3, rng)}, {'result': GENERATED_CODE}],
+            'Done. I created the body and listed all bodies in the design.'
+        )
+
+    print(f'{turns}-turn session ({message_codec.BACKEND}): {raw_bytes} bytes uncompressed, '
+          f'{sent_bytes} bytes gzipped ({100 * sent_bytes / raw_bytes:.1f}%)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
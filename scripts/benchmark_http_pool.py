@@ -0,0 +1,84 @@
+"""
+Benchmark: backend POSTs through urllib.request.urlopen vs the keep-alive connection pool.
+
+Usage:
+    python scripts/benchmark_http_pool.py [requests]
+
+Runs against a local keep-alive HTTP/1.1 server, so it measures connection
+setup and client overhead only. adsk is stubbed when not running inside Fusion.
+"""
+
+import json
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench_support import load_addin, percentiles
+
+load_addin()
+from cadzero import http_pool  # noqa: E402
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; don't let Nagle hold back the body
+    disable_nagle_algorithm = True
+    connections = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        ChatHandler.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'success': True, 'response': 'ok', 'tool_calls': []}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def measure(send, requests):
+    ChatHandler.connections = set()
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        send()
+        samples.append((time.perf_counter() - start) * 1000)
+    return len(ChatHandler.connections), samples
+
+
+def main(argv):
+    requests = int(argv[1]) if len(argv) > 1 else 300
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f'http://127.0.0.1:{server.server_port}/llm/chat-with-tools'
+    body = json.dumps({'message': 'hello', 'history': []}).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+
+    def send_urlopen():
+        with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers, method='POST')) as response:
+            response.read()
+
+    pool = http_pool.ConnectionPool(timeout=10)
+
+    def send_pooled():
+        with pool.request('POST', url, body=body, headers=headers) as response:
+            response.read()
+
+    print(f'{requests} POSTs to a local keep-alive server:')
+    for name, send in (('urlopen', send_urlopen), ('pool', send_pooled)):
+        connections, samples = measure(send, requests)
+        print(f'  {name:8s} {connections:4d} connections, {percentiles(samples)}')
+
+    pool.close_all()
+    server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
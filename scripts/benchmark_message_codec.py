@@ -0,0 +1,103 @@
+"""
+Benchmark: per-turn JSON work with the standard library vs message_codec.
+
+Usage:
+    python scripts/benchmark_message_codec.py [runs]
+
+A turn decodes a chat response with 5 tool outputs (each tool output's nested
+'output' string is looked up twice, as the batch and timeout paths do) and
+encodes the chatResponse push to the palette. The baseline is the old path:
+json.loads per lookup and json.dumps with default separators. The codec is
+timed with the json module and, when installed, with orjson. adsk is stubbed
+when not running inside Fusion.
+"""
+
+import json
+import random
+import sys
+import time
+
+from bench_support import load_addin, percentiles
+
+load_addin()
+from cadzero import message_codec  # noqa: E402
+
+GENERATED_CODE = (
+    'import adsk.core, adsk.fusion\n'
+    'app = adsk.core.Application.get()\n'
+    + 'sk = root.sketches.add(root.xYConstructionPlane)\n'
+      'sk.sketchCurves.sketchCircles.addByCenterRadius(adsk.core.Point3D.create(0, 0, 0), 2.5)\n' * 40
+)
+
+
+def make_turn():
+    """A captured-size turn: the backend response bytes and the palette push"""
+    rng = random.Random(0)
+    rows = [
+        {'name': f'Body{i}', 'volume': rng.random() * 1000, 'material': 'Steel', 'visible': True}
+        for i in range(300)
+    ]
+    tool_outputs = [
+        {'tool_call_id': f'call_{i}', 'output': json.dumps({'python_code': GENERATED_CODE, 'message': 'ok', 'timeout': 30})}
+        for i in range(5)
+    ]
+    response = json.dumps({
+        'success': True,
+        'response': 'Done ' * 200,
+        'tool_calls': [{'id': f'call_{i}', 'name': 'create_box', 'arguments': json.dumps({'w': 10})} for i in range(5)],
+        'tool_outputs': tool_outputs
+    }).encode('utf-8')
+    ui_message = {
+        'action': 'chatResponse',
+        'success': True,
+        'response': 'Done ' * 200,
+        'execution_results': [{'result': json.dumps({'type': 'table', 'data': rows}), 'python_code': GENERATED_CODE}] * 5
+    }
+    return response, ui_message
+
+
+def baseline_turn(response, ui_message):
+    data = json.loads(response.decode('utf-8'))
+    for tool_output in data['tool_outputs']:
+        json.loads(tool_output.get('output', '{}'))
+        json.loads(tool_output.get('output', '{}'))
+    return json.dumps({key: value for key, value in ui_message.items() if key != 'action'})
+
+
+def codec_turn(response, ui_message):
+    data = message_codec.loads(response)
+    for tool_output in data['tool_outputs']:
+        message_codec.decode_tool_output(tool_output)
+        message_codec.decode_tool_output(tool_output)
+    return message_codec.dumps(ui_message)
+
+
+def measure(fn, runs, *args):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv):
+    runs = int(argv[1]) if len(argv) > 1 else 300
+    response, ui_message = make_turn()
+    print(f'{runs} turns, {len(response)} byte response, {len(codec_turn(response, ui_message))} char palette push:')
+    print(f'  baseline:      {percentiles(measure(baseline_turn, runs, response, ui_message))}')
+
+    backends = [False, True] if message_codec.orjson is not None else [False]
+    use_orjson = message_codec._use_orjson
+    try:
+        for enabled in backends:
+            message_codec._use_orjson = enabled
+            name = 'orjson' if enabled else 'json'
+            print(f'  codec/{name + ":":8s} {percentiles(measure(codec_turn, runs, response, ui_message))}')
+    finally:
+        message_codec._use_orjson = use_orjson
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
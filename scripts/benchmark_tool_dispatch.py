@@ -0,0 +1,78 @@
+"""
+Benchmark: dispatch-to-result latency of a tool call on Fusion's main thread.
+Compares the old wait loop (poll a shared dict every 100 ms) with waiting on the
+execution registry's Future, which custom_event_handler completes directly.
+
+Usage:
+    python scripts/benchmark_tool_dispatch.py [calls]
+
+The main thread is simulated by a timer thread that runs custom_event_handler
+MAIN_THREAD_DELAY after each fired custom event; adsk is stubbed when not running inside Fusion.
+"""
+
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from bench_support import load_addin, percentiles
+
+load_addin()
+from cadzero.commands.paletteShow import entry  # noqa: E402
+
+# Time Fusion takes to get to a fired custom event on its main thread
+MAIN_THREAD_DELAY = 0.005
+
+
+def fire_on_main_thread(event_id, additional_info):
+    """Stand-in for app.fireCustomEvent: Fusion runs the handler later on its own thread"""
+    args = SimpleNamespace(additionalInfo=additional_info)
+    threading.Timer(MAIN_THREAD_DELAY, entry.custom_event_handler, args=(args,)).start()
+    return True
+
+
+def run_registry(calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        entry.dispatch_to_main_thread({'python_code': '__cadzero_result__ = 1', 'tool_name': 'bench'}, 5)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def run_polling(calls):
+    """The pre-registry wait loop: results written to a dict, polled every 100 ms"""
+    results = {}
+    lock = threading.Lock()
+
+    def handler(execution_id):
+        with lock:
+            results[execution_id] = entry.run_python_code('__cadzero_result__ = 1')
+
+    samples = []
+    for index in range(calls):
+        start = time.perf_counter()
+        threading.Timer(MAIN_THREAD_DELAY, handler, args=(index,)).start()
+        while True:
+            with lock:
+                result = results.pop(index, None)
+            if result is not None:
+                break
+            time.sleep(0.1)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main(argv):
+    calls = int(argv[1]) if len(argv) > 1 else 50
+    entry.app.fireCustomEvent.side_effect = fire_on_main_thread
+    entry.ui.activeCommand = 'SelectCommand'
+
+    print(f'{calls} tool calls, dispatch to result:')
+    print(f'  polling every 100 ms: {percentiles(run_polling(calls))}')
+    print(f'  registry Future:      {percentiles(run_registry(calls))}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
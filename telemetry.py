@@ -0,0 +1,171 @@
+"""
+Structured telemetry for CADZERO.
+Appends one JSON line per chat turn, tool execution and auth event to a
+size-rotated file, written by a background thread so callers never wait on disk.
+Analyse the file offline with scripts/analyze_telemetry.py.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from . import config
+
+
+class TelemetrySink:
+    """
+    Buffered JSONL writer with size-based rotation.
+
+    record() only puts the event on a queue. A background thread serializes
+    queued events and appends them in batches, rotating path -> path.1 -> path.2 ...
+    when the file would grow past max_bytes. Events are dropped (and counted)
+    if the queue is full rather than blocking the caller.
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backup_count=3, flush_interval=2.0, max_queue=10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # Metrics
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def record(self, event, **fields):
+        """Queue an event of the given type. fields must be JSON serializable"""
+        if self._closed:
+            return
+
+        entry = {'ts': round(time.time(), 3), 'event': event}
+        entry.update(fields)
+
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(entry)
+            self.recorded += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5):
+        """Block until every event queued so far is on disk"""
+        if self._writer is None:
+            return
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        flushed.wait(timeout)
+
+    def close(self, timeout=5):
+        """Write the remaining events and stop the writer thread. Recording again restarts it"""
+        with self._lock:
+            self._closed = True
+            writer = self._writer
+            self._writer = None
+
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+        # The add-in can be started again in the same Python session
+        self._closed = False
+
+    def stats(self):
+        """Get event counters"""
+        return {
+            'path': self.path,
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+            'queued': self._queue.qsize()
+        }
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+
+        with self._lock:
+            if self._writer is None and not self._closed:
+                self._writer = threading.Thread(target=self._run, name='cadzero-telemetry', daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        lines = []
+        while True:
+            try:
+                entry = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                entry = False
+
+            if isinstance(entry, dict):
+                try:
+                    lines.append(json.dumps(entry, separators=(',', ':'), default=str))
+                except (TypeError, ValueError):
+                    self.write_errors += 1
+                # Keep buffering while events are arriving in a burst
+                if len(lines) < 100:
+                    continue
+
+            if lines:
+                self._write(lines)
+                lines = []
+
+            if isinstance(entry, threading.Event):
+                entry.set()
+            elif entry is None:
+                return
+
+    def _write(self, lines):
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self.written += len(lines)
+        except OSError:
+            self.write_errors += 1
+
+    def _rotate(self):
+        """Shift path.N -> path.N+1 and path -> path.1, dropping the oldest backup"""
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        os.replace(self.path, f'{self.path}.1')
+
+
+# Global telemetry sink for the add-in
+sink = TelemetrySink(
+    config.TELEMETRY_FILE,
+    max_bytes=config.TELEMETRY_MAX_BYTES,
+    backup_count=config.TELEMETRY_BACKUP_COUNT
+)
+
+
+def record_event(event, **fields):
+    """Record a telemetry event ('turn', 'tool', 'auth', ...) if telemetry is enabled"""
+    if config.TELEMETRY_ENABLED:
+        sink.record(event, **fields)
+
+
+def flush():
+    """Write all queued telemetry events to disk"""
+    sink.flush()
+
+
+def close():
+    """Flush and stop the telemetry writer (called when the add-in stops)"""
+    sink.close()
@@ -0,0 +1,16 @@
+"""
+Test setup for CADZERO.
+The add-in is imported as the package 'cadzero' from the repository root, with
+the same adsk stand-in as the benchmarks (scripts/bench_support.py) when adsk
+can't be imported.
+"""
+
+import os
+import sys
+
+ADDIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, os.path.join(ADDIN_DIR, 'scripts'))
+from bench_support import load_addin  # noqa: E402
+
+load_addin()
@@ -0,0 +1,101 @@
+"""Tests for the asyncio backend client against a local stand-in server"""
+
+import asyncio
+import json
+import socket
+
+import pytest
+
+from cadzero import async_client
+from cadzero import auth
+from cadzero import config
+from cadzero import http_pool
+
+
+def http_response(body, status='200 OK', headers=None, content_length=None):
+    head = f'HTTP/1.1 {status}\r\nContent-Length: {len(body) if content_length is None else content_length}\r\n'
+    head += ''.join(f'{name}: {value}\r\n' for name, value in (headers or {}).items())
+    return (head + 'Connection: close\r\n\r\n').encode('latin-1') + body
+
+
+def run_against(reply, scenario):
+    """Serve every request with the raw bytes reply, then run scenario(client, url)"""
+    async def main():
+        async def handle(reader, writer):
+            while (await reader.readline()).strip():
+                pass
+            writer.write(reply)
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        url = f'http://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+        async with server:
+            return await scenario(async_client.AsyncBackendClient(timeout=5), url)
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def signed_in(monkeypatch):
+    monkeypatch.setattr(auth, 'get_auth_headers', lambda: {'Authorization': 'Bearer token'})
+
+
+def use_endpoint(monkeypatch, url):
+    monkeypatch.setattr(config, 'current_endpoint', url)
+
+
+def test_health_ok(monkeypatch):
+    async def scenario(client, url):
+        use_endpoint(monkeypatch, url)
+        return await client.health()
+
+    health = run_against(http_response(b'{"status": "ok"}'), scenario)
+
+    assert health['ok'] is True
+    assert health['status'] == 200
+
+
+def test_gzip_body_is_decoded():
+    payload = {'success': True, 'response': 'x' * 500}
+    body = http_pool.gzip_compress(json.dumps(payload).encode('utf-8'))
+
+    async def scenario(client, url):
+        return await client.get_json(f'{url}/llm/chat-with-tools')
+
+    assert run_against(http_response(body, headers={'Content-Encoding': 'gzip'}), scenario) == payload
+
+
+def test_truncated_body_is_reported_not_raised(monkeypatch):
+    async def scenario(client, url):
+        use_endpoint(monkeypatch, url)
+        return await client.health(), await client.auth_status()
+
+    health, auth_status = run_against(http_response(b'{"status"', content_length=100), scenario)
+
+    assert health['ok'] is False
+    assert 'expected' in health['error']
+    assert auth_status['authenticated'] is None
+
+
+def test_malformed_status_line_and_corrupt_gzip_are_reported(monkeypatch):
+    async def scenario(client, url):
+        use_endpoint(monkeypatch, url)
+        return await client.auth_status()
+
+    assert run_against(b'HTTP/1.1 OK\r\n\r\n', scenario)['authenticated'] is None
+    corrupt = http_response(b'not gzip', headers={'Content-Encoding': 'gzip'})
+    assert run_against(corrupt, scenario)['authenticated'] is None
+
+
+def test_connection_refused(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    use_endpoint(monkeypatch, f'http://127.0.0.1:{port}')
+
+    client = async_client.AsyncBackendClient(timeout=5)
+    status = asyncio.run(client.backend_status())
+
+    assert status['health']['ok'] is False
+    assert status['auth']['authenticated'] is None
@@ -0,0 +1,172 @@
+"""Tests for background token refresh against a local stand-in refresh server"""
+
+import http.server
+import json
+import threading
+import time
+
+import pytest
+
+from cadzero import auth
+from cadzero import config
+from cadzero import http_pool
+
+
+class RefreshHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        server = self.server
+        server.requests.append((time.monotonic(), json.loads(body)))
+
+        status, payload = server.responses.pop(0) if server.responses else (500, {})
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def refresh_server(monkeypatch):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RefreshHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.responses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(config, 'current_endpoint', f'http://127.0.0.1:{server.server_address[1]}')
+    monkeypatch.setattr(config, 'TELEMETRY_ENABLED', False)
+    yield server
+
+    http_pool.close_all()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def token(tmp_path):
+    auth_token = auth.AuthToken()
+    auth_token._token_file = str(tmp_path / '.auth_token.json')
+    return auth_token
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(token, **kwargs):
+        scheduler = auth.TokenRefreshScheduler(token, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.stop()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def sign_in(token, session_id, lifetime):
+    token.save_token('old-token', user_id='user', session_id=session_id, token_expiry=time.time() + lifetime)
+
+
+def test_refresh_stores_new_token(refresh_server, token, make_scheduler):
+    sign_in(token, 'session-1', lifetime=2)
+    refresh_server.responses.append((200, {'token': 'new-token', 'token_expiry': time.time() + 3600}))
+
+    scheduler = make_scheduler(token)
+    scheduler.start()
+
+    assert wait_for(lambda: scheduler.refreshes == 1)
+    assert refresh_server.requests[0][1] == {'session_id': 'session-1'}
+    assert token.get_auth_header() == {'Authorization': 'Bearer new-token'}
+    with open(token._token_file) as f:
+        assert json.load(f)['token'] == 'new-token'
+
+
+def test_refresh_backs_off_on_server_errors(refresh_server, token, make_scheduler):
+    sign_in(token, 'session-1', lifetime=2)
+    refresh_server.responses.extend([
+        (503, {}),
+        (502, {}),
+        (200, {'token': 'new-token', 'token_expiry': time.time() + 3600})
+    ])
+
+    scheduler = make_scheduler(token, retry_base=0.05)
+    scheduler.start()
+
+    assert wait_for(lambda: scheduler.refreshes == 1)
+    assert scheduler.failures == 2
+    times = [request_time for request_time, _ in refresh_server.requests]
+    assert times[1] - times[0] >= 0.05
+    assert times[2] - times[1] >= 0.1
+    assert token.token == 'new-token'
+
+
+def test_rejected_session_requires_reauth(refresh_server, token, make_scheduler):
+    sign_in(token, 'session-1', lifetime=1.5)
+    refresh_server.responses.append((401, {}))
+    reasons = []
+
+    scheduler = make_scheduler(token, retry_base=0.05)
+    scheduler.start(on_reauth_required=reasons.append)
+
+    assert wait_for(lambda: reasons)
+    assert 'HTTP 401' in reasons[0]
+    assert token.is_token_expired()
+    # No retries against a session the backend rejected
+    time.sleep(0.2)
+    assert len(refresh_server.requests) == 1
+
+
+def test_new_sign_in_reschedules_refresh(refresh_server, token, make_scheduler):
+    sign_in(token, 'session-1', lifetime=1.5)
+    refresh_server.responses.extend([
+        (401, {}),
+        (200, {'token': 'new-token', 'token_expiry': time.time() + 3600})
+    ])
+    reasons = []
+
+    scheduler = make_scheduler(token)
+    scheduler.start(on_reauth_required=reasons.append)
+    assert wait_for(lambda: reasons)
+
+    sign_in(token, 'session-2', lifetime=2)
+
+    assert wait_for(lambda: scheduler.refreshes == 1)
+    assert refresh_server.requests[-1][1] == {'session_id': 'session-2'}
+    assert token.token == 'new-token'
+    assert len(reasons) == 1
+
+
+def test_network_failure_after_expiry_keeps_retrying(refresh_server, token, make_scheduler):
+    sign_in(token, 'session-1', lifetime=0.2)
+    refresh_server.responses.extend([
+        (503, {}),
+        (503, {}),
+        (200, {'token': 'new-token', 'token_expiry': time.time() + 3600})
+    ])
+    reasons = []
+
+    scheduler = make_scheduler(token, retry_base=0.05)
+    scheduler.start(on_reauth_required=reasons.append)
+
+    assert wait_for(lambda: scheduler.refreshes == 1)
+    assert scheduler.failures == 2
+    assert token.token == 'new-token'
+    # Reported once when the expired token couldn't be refreshed, not on every retry
+    assert len(reasons) == 1
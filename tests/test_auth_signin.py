@@ -0,0 +1,47 @@
+"""Tests for the sign-in callback server"""
+
+import socket
+
+import pytest
+
+from cadzero import auth
+from cadzero import config
+
+
+@pytest.fixture
+def callback_port(monkeypatch):
+    with socket.socket() as probe:
+        probe.bind(('', 0))
+        port = probe.getsockname()[1]
+
+    monkeypatch.setattr(config, 'AUTH_CALLBACK_PORT', port)
+    monkeypatch.setattr(config, 'TELEMETRY_ENABLED', False)
+    monkeypatch.setattr(auth.webbrowser, 'open', lambda url: True)
+    yield port
+    auth.cancel_signin()
+
+
+def test_second_sign_in_reuses_the_callback_port(callback_port):
+    first = auth.begin_clerk_signin()
+    assert first.port == callback_port
+
+    second = auth.begin_clerk_signin()
+
+    assert first.cancelled
+    assert second.port == callback_port
+    assert not auth.complete_clerk_signin(first)
+    assert auth.cancel_signin()
+    assert not auth.complete_clerk_signin(second, timeout=1)
+
+
+def test_port_held_elsewhere_falls_back_to_an_ephemeral_port(callback_port):
+    with socket.socket() as other:
+        other.bind(('', callback_port))
+        other.listen()
+
+        server = auth.begin_clerk_signin()
+        try:
+            assert server.port != callback_port
+        finally:
+            auth.cancel_signin()
+            auth.complete_clerk_signin(server)
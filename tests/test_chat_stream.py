@@ -0,0 +1,281 @@
+"""Tests for parsing streamed chat responses"""
+
+import http.server
+import io
+import json
+import threading
+
+import pytest
+
+from cadzero import chat_stream
+from cadzero import http_pool
+from cadzero.commands.paletteShow import entry
+
+
+class ChunkedBody(io.RawIOBase):
+    """Raw body that hands out at most chunk_size bytes per read, like a slow network"""
+
+    def __init__(self, data, chunk_size=3):
+        self._data = data
+        self._chunk_size = chunk_size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk, self._data = self._data[:self._chunk_size], self._data[self._chunk_size:]
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
+    def read1(self, size=-1):
+        return self.read(min(size, self._chunk_size) if size > 0 else self._chunk_size)
+
+
+class FakeResponse:
+    """Just enough of http.client.HTTPResponse for PooledResponse"""
+
+    status = 200
+    reason = 'OK'
+    will_close = True
+
+    def __init__(self, body, headers):
+        self._body = ChunkedBody(body)
+        self._headers = headers
+        self.msg = headers
+
+    def getheader(self, name, default=None):
+        return self._headers.get(name, default)
+
+    def read1(self, size):
+        return self._body.read1(size)
+
+    def read(self, amt=None):
+        return self._body.read(amt if amt is not None else -1) or b''
+
+    def isclosed(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def ndjson(*events):
+    return b''.join(json.dumps(event).encode('utf-8') + b'\n' for event in events)
+
+
+def stream_of(data, chunk_size=3):
+    return io.BufferedReader(ChunkedBody(data, chunk_size))
+
+
+def test_ndjson_lines_split_across_reads():
+    data = ndjson({'type': 'text_delta', 'delta': 'Hel'}, {'type': 'text_delta', 'delta': 'lo'}) + b'\n'
+    data += ndjson({'type': 'done', 'success': True, 'response': 'Hello'})
+
+    events = list(chat_stream.iter_stream_events(stream_of(data), 'ndjson'))
+
+    assert [event['type'] for event in events] == ['text_delta', 'text_delta', 'done']
+    assert events[-1]['response'] == 'Hello'
+
+
+def test_ndjson_last_line_without_newline():
+    data = ndjson({'type': 'text_delta', 'delta': 'a'}) + b'{"type": "done", "success": true}'
+
+    events = list(chat_stream.iter_ndjson_events(stream_of(data)))
+
+    assert events[-1] == {'type': 'done', 'success': True}
+
+
+def test_gzipped_ndjson_through_pooled_response():
+    data = ndjson(*({'type': 'text_delta', 'delta': str(index)} for index in range(50)))
+    response = http_pool.PooledResponse(None, None, None, FakeResponse(http_pool.gzip_compress(data), {'Content-Encoding': 'gzip'}))
+
+    events = list(chat_stream.iter_ndjson_events(response))
+
+    assert [event['delta'] for event in events] == [str(index) for index in range(50)]
+
+
+def test_sse_multi_line_data_and_event_names():
+    data = (
+        b': keep-alive\n'
+        b'event: text_delta\n'
+        b'data: {"delta":\n'
+        b'data:  "Hi"}\n'
+        b'\n'
+        b'data: {"type": "tool_call", "tool_call": {"name": "box"}}\r\n'
+        b'\r\n'
+        b'data: [DONE]\n'
+        b'\n'
+        b'data: {"type": "text_delta", "delta": "after done"}\n'
+        b'\n'
+    )
+
+    events = list(chat_stream.iter_stream_events(stream_of(data, chunk_size=5), 'sse'))
+
+    assert events == [
+        {'delta': 'Hi', 'type': 'text_delta'},
+        {'type': 'tool_call', 'tool_call': {'name': 'box'}}
+    ]
+
+
+def test_sse_stream_ending_mid_event():
+    complete = b'event: done\ndata: {"success": true, "response": "ok"}\n'
+    assert list(chat_stream.iter_sse_events(stream_of(complete))) == [
+        {'success': True, 'response': 'ok', 'type': 'done'}
+    ]
+
+    # Cut off inside the JSON payload
+    truncated = b'data: {"type": "text_delta", "delta": "a"}\n\ndata: {"type": "done", "resp'
+    events = chat_stream.iter_sse_events(stream_of(truncated))
+    assert next(events) == {'type': 'text_delta', 'delta': 'a'}
+    with pytest.raises(ValueError):
+        next(events)
+
+
+def test_stream_format_from_content_type():
+    assert chat_stream.get_stream_format('application/x-ndjson; charset=utf-8') == 'ndjson'
+    assert chat_stream.get_stream_format('text/event-stream') == 'sse'
+    assert chat_stream.get_stream_format('application/json') is None
+    assert chat_stream.get_stream_format(None) is None
+
+
+class ChatHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every chat request with the server's canned (content_type, body, declared_length)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        content_type, body, declared_length = self.server.reply
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(declared_length or len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        if declared_length:
+            # Drop the connection before the promised body is complete
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def tool_event(name, with_output=True):
+    event = {'type': 'tool_call', 'tool_call': {'name': name}}
+    if with_output:
+        event['tool_output'] = {'output': json.dumps({'python_code': f'# {name}'})}
+    return event
+
+
+@pytest.fixture
+def chat_server(monkeypatch):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ChatHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    server.pushed = []
+    server.executed = []
+    server.dispatched = []
+
+    def dispatch(event_data, timeout):
+        server.dispatched.append(event_data)
+        if event_data.get('end_deferred_compute'):
+            return {'success': True, 'timings': {}}
+        steps = event_data['steps'] if 'steps' in event_data else [event_data]
+        results = []
+        for step in steps:
+            server.executed.append(step['tool_name'])
+            results.append({'success': True, 'result': f"ran {step['tool_name']}"})
+        return {'success': True, 'steps': results} if 'steps' in event_data else results[0]
+
+    monkeypatch.setattr(entry.config, 'current_endpoint', f'http://127.0.0.1:{server.server_address[1]}')
+    monkeypatch.setattr(entry.config, 'STREAM_CHAT_RESPONSES', True)
+    monkeypatch.setattr(entry.config, 'TELEMETRY_ENABLED', False)
+    monkeypatch.setattr(entry.auth, 'get_auth_headers', lambda: {})
+    monkeypatch.setattr(entry, 'dispatch_to_main_thread', dispatch)
+    monkeypatch.setattr(entry, 'send_response_to_ui', server.pushed.append)
+    yield server
+
+    http_pool.close_all()
+    server.shutdown()
+    server.server_close()
+
+
+def deltas(server):
+    return [message['delta'] for message in server.pushed if message.get('action') == 'chatDelta']
+
+
+def test_ndjson_stream_end_to_end(chat_server):
+    chat_server.reply = ('application/x-ndjson', ndjson(
+        {'type': 'text_delta', 'delta': 'Making '},
+        tool_event('box'),
+        {'type': 'text_delta', 'delta': 'two bodies'},
+        tool_event('cylinder', with_output=False),
+        {'type': 'tool_output', 'tool_output': {'output': json.dumps({'python_code': '# cylinder'})}},
+        {'type': 'done', 'success': True}
+    ), None)
+
+    response = entry.send_chat_message('make a box and a cylinder')
+
+    assert deltas(chat_server) == ['Making ', 'two bodies']
+    assert response['response'] == 'Making two bodies'
+    assert chat_server.executed == ['box', 'cylinder']
+    assert [result['message'] for result in response['execution_results']] == ['ran box', 'ran cylinder']
+    # Compute stays deferred over both tool calls and is let go once after them
+    assert [event.get('defer_compute') for event in chat_server.dispatched[:2]] == [True, True]
+    assert chat_server.dispatched[2] == {'end_deferred_compute': True}
+
+
+def test_sse_stream_end_to_end(chat_server):
+    events = [{'type': 'text_delta', 'delta': 'Done'}, tool_event('box'), {'type': 'done', 'success': True, 'response': 'Done.'}]
+    body = b''.join(b'data: ' + json.dumps(event).encode('utf-8') + b'\n\n' for event in events) + b'data: [DONE]\n\n'
+    chat_server.reply = ('text/event-stream', body, None)
+
+    response = entry.send_chat_message('make a box')
+
+    assert deltas(chat_server) == ['Done']
+    assert response['response'] == 'Done.'
+    assert response['execution_results'][0]['message'] == 'ran box'
+
+
+def test_plain_json_fallback(chat_server):
+    body = json.dumps({
+        'success': True,
+        'response': 'Made a box and a cone',
+        'tool_calls': [{'name': 'box'}, {'name': 'cone'}],
+        'tool_outputs': [tool_event('box')['tool_output'], tool_event('cone')['tool_output']]
+    }).encode('utf-8')
+    chat_server.reply = ('application/json', body, None)
+
+    response = entry.send_chat_message('make a box and a cone')
+
+    assert deltas(chat_server) == []
+    assert response['response'] == 'Made a box and a cone'
+    assert [result['message'] for result in response['execution_results']] == ['ran box', 'ran cone']
+
+
+def test_tool_call_without_output_is_reported_failed(chat_server):
+    chat_server.reply = ('application/x-ndjson', ndjson(
+        tool_event('box', with_output=False),
+        tool_event('cone'),
+        {'type': 'done', 'success': True, 'response': 'ok'}
+    ), None)
+
+    response = entry.send_chat_message('make a box and a cone')
+
+    results = response['execution_results']
+    assert chat_server.executed == ['cone']
+    assert results[0]['success'] is False
+    assert results[0]['error'] == 'No tool output received'
+    assert results[1]['message'] == 'ran cone'
+
+
+def test_stream_dropped_midway_keeps_results_of_tools_that_ran(chat_server):
+    body = ndjson({'type': 'text_delta', 'delta': 'Making a box'}, tool_event('box')) + b'{"type": "text_del'
+    chat_server.reply = ('application/x-ndjson', body, len(body) + 500)
+
+    response = entry.send_chat_message('make a box')
+
+    assert response['response'].startswith('Error: Chat stream interrupted')
+    assert chat_server.executed == ['box']
+    assert response['execution_results'][0]['message'] == 'ran box'
@@ -0,0 +1,77 @@
+"""Tests for the prebuilt exec namespaces of generated tool code"""
+
+from unittest import mock
+
+import pytest
+
+from cadzero.commands.paletteShow import entry
+
+
+class FakeFusion:
+    """Stands in for the active document and product seen by ExecSandbox"""
+
+    def __init__(self, monkeypatch):
+        self.document = mock.MagicMock(name='document')
+        self.document.creationId = 'document-1'
+        self.design = self.new_design()
+        monkeypatch.setattr(entry.app, 'activeDocument', self.document)
+        monkeypatch.setattr(entry.adsk.fusion.Design, 'cast', lambda product: self.design)
+
+    @staticmethod
+    def new_design():
+        design = mock.MagicMock(name='design')
+        design.isValid = True
+        return design
+
+
+@pytest.fixture
+def fusion(monkeypatch):
+    return FakeFusion(monkeypatch)
+
+
+@pytest.fixture
+def sandbox():
+    return entry.ExecSandbox()
+
+
+def test_namespace_is_reused_for_the_active_design(fusion, sandbox):
+    first = sandbox.namespace()
+    first['cadzero_state']['count'] = 1
+    second = sandbox.namespace()
+
+    assert second['design'] is fusion.design
+    assert second['root'] is fusion.design.rootComponent
+    assert second['cadzero_state'] == {'count': 1}
+    assert sandbox.stats() == {'documents': 1, 'builds': 1, 'hits': 1}
+
+
+def test_namespace_built_without_a_design_is_rebuilt(fusion, sandbox):
+    fusion.design = None
+    assert sandbox.namespace()['design'] is None
+
+    fusion.design = fusion.new_design()
+    namespace = sandbox.namespace()
+
+    assert namespace['design'] is fusion.design
+    assert namespace['cadzero'] is not None
+    assert sandbox.stats()['builds'] == 2
+
+
+def test_namespace_is_rebuilt_when_the_active_design_changes(fusion, sandbox):
+    sandbox.namespace()['cadzero_state']['count'] = 1
+
+    fusion.design = fusion.new_design()
+    namespace = sandbox.namespace()
+
+    assert namespace['design'] is fusion.design
+    assert namespace['cadzero_state'] == {}
+    assert sandbox.stats()['builds'] == 2
+
+
+def test_namespace_is_rebuilt_when_its_design_is_deleted(fusion, sandbox):
+    sandbox.namespace()
+    fusion.design.isValid = False
+
+    sandbox.namespace()
+
+    assert sandbox.stats() == {'documents': 1, 'builds': 2, 'hits': 0}
@@ -0,0 +1,72 @@
+"""Tests for conversation history compaction"""
+
+from cadzero import history
+
+
+def make_session(turns):
+    session = history.ConversationSession()
+    for user_text, replies in turns:
+        session.append('user', user_text)
+        for kind, text in replies:
+            session.append('assistant', text, kind=kind)
+    return session
+
+
+def roles_and_content(messages):
+    return [(message['role'], message['content']) for message in messages]
+
+
+def test_recent_turns_keep_repeated_replies():
+    session = make_session([
+        ('make a box', [('response', 'Done.')]),
+        ('make a cylinder', [('response', 'Done.')]),
+        ('make a sphere', [('response', 'Done.')])
+    ])
+
+    compacted = session.compacted(token_budget=10000, keep_recent_turns=3)
+
+    assert roles_and_content(compacted) == [
+        ('user', 'make a box'), ('assistant', 'Done.'),
+        ('user', 'make a cylinder'), ('assistant', 'Done.'),
+        ('user', 'make a sphere'), ('assistant', 'Done.')
+    ]
+
+
+def test_older_repeated_replies_are_dropped():
+    session = make_session([
+        ('make a box', [('response', 'Done.')]),
+        ('make a cylinder', [('response', 'Done.')]),
+        ('make a sphere', [('response', 'Done.')])
+    ])
+
+    compacted = session.compacted(token_budget=10000, keep_recent_turns=1)
+
+    assert roles_and_content(compacted) == [
+        ('user', 'make a box'),
+        ('user', 'make a cylinder'),
+        ('user', 'make a sphere'), ('assistant', 'Done.')
+    ]
+
+
+def test_older_tool_results_are_summarized():
+    long_result = 'Bodies\n' + '\n'.join(f'Body{i} | 1.0' for i in range(100))
+    session = make_session([
+        ('list bodies', [('tool_result', long_result), ('response', 'Here are the bodies.')]),
+        ('make a box', [('response', 'Created the box.')])
+    ])
+
+    compacted = session.compacted(token_budget=10000, keep_recent_turns=1, summary_chars=50)
+
+    assert compacted[1]['content'].startswith('Bodies\n[100 more lines omitted')
+    assert compacted[-1] == {'role': 'assistant', 'content': 'Created the box.'}
+
+
+def test_budget_drops_oldest_messages_first():
+    session = make_session([
+        ('a' * 400, [('response', 'b' * 400)]),
+        ('make a box', [('response', 'Done.')])
+    ])
+
+    compacted = session.compacted(token_budget=20, keep_recent_turns=1)
+
+    assert roles_and_content(compacted) == [('user', 'make a box'), ('assistant', 'Done.')]
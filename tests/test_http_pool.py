@@ -0,0 +1,132 @@
+"""Tests for pooled connections and gzipped request bodies against a local stand-in server"""
+
+import http.server
+import json
+import threading
+import time
+import urllib.error
+import zlib
+
+import pytest
+
+from cadzero import http_pool
+
+BODY = json.dumps({'message': 'make a box', 'history': ['x' * 2000]}).encode('utf-8')
+
+
+class ChatHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        server = self.server
+        encoding = self.headers.get('Content-Encoding')
+        server.requests.append(encoding)
+        server.client_ports.append(self.client_address[1])
+
+        status, payload = server.responses.pop(0) if server.responses else (200, {'success': True})
+        if status == 200 and encoding == 'gzip':
+            zlib.decompress(body, http_pool.GZIP_WBITS)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        if server.drop_idle:
+            # Close the keep-alive socket without telling the client, as an idle timeout would
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def chat_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ChatHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.responses = []
+    server.client_ports = []
+    server.drop_idle = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/llm/chat-with-tools'
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = http_pool.ConnectionPool(timeout=5)
+    yield pool
+    pool.close_all()
+
+
+def post(pool, url):
+    with pool.request('POST', url, body=BODY, headers={'Content-Type': 'application/json'}, compress=True) as response:
+        return response.read()
+
+
+def test_requests_reuse_one_connection(chat_server, pool):
+    for _ in range(3):
+        post(pool, chat_server.url)
+
+    assert len(set(chat_server.client_ports)) == 1
+    stats = pool.stats()
+    assert stats['connections_opened'] == 1
+    assert stats['reused'] == 2
+
+
+def test_request_succeeds_after_the_server_closed_an_idle_connection(chat_server, pool):
+    chat_server.drop_idle = True
+    post(pool, chat_server.url)
+    # Let the server close its end before the pooled socket is reused
+    time.sleep(0.2)
+
+    assert json.loads(post(pool, chat_server.url)) == {'success': True}
+
+    assert len(set(chat_server.client_ports)) == 2
+    stats = pool.stats()
+    assert stats['stale_retries'] == 1
+    assert stats['connections_opened'] == 2
+
+
+def test_validation_error_is_not_resent_and_keeps_gzip(chat_server, pool):
+    chat_server.responses.append((400, {'error': 'message is required'}))
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(pool, chat_server.url)
+
+    assert error.value.code == 400
+    assert b'message is required' in error.value.read()
+    assert chat_server.requests == ['gzip']
+
+    post(pool, chat_server.url)
+    assert chat_server.requests == ['gzip', 'gzip']
+    assert pool.stats()['compression_fallbacks'] == 0
+
+
+def test_unsupported_media_type_falls_back_for_good(chat_server, pool):
+    chat_server.responses.append((415, {'error': 'unsupported media type'}))
+
+    post(pool, chat_server.url)
+    post(pool, chat_server.url)
+
+    assert chat_server.requests == ['gzip', None, None]
+
+
+def test_encoding_400_is_retried_plain_but_only_remembered_when_repeated(chat_server, pool):
+    chat_server.responses.extend([
+        (400, {'error': 'could not decode gzip body'}),
+        (200, {'success': True}),
+        (400, {'error': 'could not decode gzip body'}),
+    ])
+
+    post(pool, chat_server.url)
+    post(pool, chat_server.url)
+    post(pool, chat_server.url)
+
+    assert chat_server.requests == ['gzip', None, 'gzip', None, None]
@@ -0,0 +1,52 @@
+"""Tests for the construction geometry created by the primitive commands"""
+
+from unittest import mock
+
+import pytest
+
+from cadzero.commands.paletteShow import entry
+
+
+@pytest.fixture
+def root():
+    entry.construction_cache.clear()
+    component = mock.MagicMock(name='rootComponent')
+    component.parentDesign.parentDocument.creationId = 'document-1'
+    component.entityToken = 'root'
+    component.constructionPlanes.add.side_effect = lambda plane_input: mock.MagicMock(name='constructionPlane')
+    yield component
+    entry.construction_cache.clear()
+
+
+def test_spheres_and_cones_create_no_construction_axes(root):
+    for _ in range(3):
+        assert entry.create_sphere(root, {'radius': 2}).startswith('Created sphere')
+        assert entry.create_cone(root, {'topRadius': 0}).startswith('Created cone')
+
+    assert root.constructionAxes.createByTwoPoints.call_count == 0
+    assert root.constructionAxes.add.call_count == 0
+    revolve_axes = [call.args[1] for call in root.features.revolveFeatures.createInput.call_args_list]
+    assert len(revolve_axes) == 6
+    assert all(axis is root.yConstructionAxis for axis in revolve_axes)
+
+
+def test_offset_planes_are_created_once_per_z(root):
+    for _ in range(3):
+        first = entry.get_offset_xy_plane(root, 2.0)
+        second = entry.get_offset_xy_plane(root, 3.0)
+        assert entry.get_offset_xy_plane(root, 0) is root.xYConstructionPlane
+
+    assert root.constructionPlanes.add.call_count == 2
+    assert first is not second
+    assert entry.get_offset_xy_plane(root, 2.0) is first
+    assert entry.get_offset_xy_plane(root, 3.0) is second
+
+
+def test_deleted_offset_plane_is_created_again(root):
+    plane = entry.get_offset_xy_plane(root, 2.0)
+    plane.isValid = False
+
+    replacement = entry.get_offset_xy_plane(root, 2.0)
+
+    assert replacement is not plane
+    assert root.constructionPlanes.add.call_count == 2
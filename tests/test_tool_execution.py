@@ -0,0 +1,140 @@
+"""Tests for turning main-thread tool results into palette execution results"""
+
+import types
+from unittest import mock
+
+import pytest
+
+from cadzero.commands.paletteShow import entry
+from cadzero.lib.fusionAddInUtils import general_utils
+
+
+@pytest.fixture(autouse=True)
+def debug_logging(monkeypatch):
+    # Format every log message, as with DEBUG on, so formatting errors surface
+    monkeypatch.setattr(general_utils, 'DEBUG', True)
+    monkeypatch.setattr(entry.config, 'TELEMETRY_ENABLED', False)
+
+
+def test_non_string_result_is_reported_as_success():
+    result = entry.build_execution_result(
+        0, {'name': 'measure'}, {}, 'x = 1',
+        {'success': True, 'result': {'volume': 3}, 'timings': {}}
+    )
+
+    assert result['success'] is True
+    assert result['result'] == {'volume': 3}
+
+
+def test_batch_keeps_other_steps_when_one_result_fails(monkeypatch):
+    def dispatch(event_data, timeout):
+        return {
+            'success': True,
+            'steps': [
+                {'success': True, 'result': {'volume': 3}},
+                {'success': True, 'result': 'ok'}
+            ]
+        }
+
+    original = entry.build_execution_result
+
+    def build(index, *args, **kwargs):
+        if index == 0:
+            raise ValueError('bad step')
+        return original(index, *args, **kwargs)
+
+    monkeypatch.setattr(entry, 'dispatch_to_main_thread', dispatch)
+    monkeypatch.setattr(entry, 'build_execution_result', build)
+
+    tool_calls = [{'name': 'first'}, {'name': 'second'}]
+    tool_outputs = [{'output': '{"python_code": "a = 1"}'}, {'output': '{"python_code": "b = 2"}'}]
+    results = entry.execute_tool_calls_batched(tool_calls, tool_outputs)
+
+    assert results[0]['success'] is False
+    assert 'bad step' in results[0]['message']
+    assert results[1] == {
+        'tool_name': 'second',
+        'success': True,
+        'message': 'ok',
+        'result': 'ok',
+        'python_code': 'b = 2'
+    }
+
+
+def test_batch_step_is_stopped_at_its_own_timeout():
+    runaway = 'while True:\n    cadzero_check_cancelled()'
+    done = []
+
+    step_results = entry.run_python_batch([
+        {'python_code': runaway, 'tool_name': 'runaway', 'timeout': 0.05},
+        {'python_code': '__cadzero_result__ = "ok"', 'tool_name': 'next', 'timeout': 0.05}
+    ], on_step_done=done.append)
+
+    assert step_results[0]['timed_out'] is True
+    assert step_results[1]['success'] is True
+    assert step_results[1]['result'] == 'ok'
+    assert done == step_results
+
+
+def test_batch_timeout_keeps_results_of_finished_steps(monkeypatch):
+    def dispatch(event_data, timeout):
+        assert [step['timeout'] for step in event_data['steps']] == [30, 30, 30]
+        return {
+            'success': True,
+            'steps': [{'success': True, 'result': 'made a box'}],
+            'timed_out': True
+        }
+
+    monkeypatch.setattr(entry, 'dispatch_to_main_thread', dispatch)
+
+    tool_calls = [{'name': 'box'}, {'name': 'runaway'}, {'name': 'fillet'}]
+    tool_outputs = [{'output': '{"python_code": "a = 1"}'}] * 3
+    results = entry.execute_tool_calls_batched(tool_calls, tool_outputs)
+
+    assert results[0]['success'] is True
+    assert results[0]['message'] == 'made a box'
+    assert results[1]['message'] == 'Execution timed out'
+    assert results[2]['message'] == 'Execution cancelled'
+
+
+def test_tool_telemetry_tells_batched_from_single_dispatch(monkeypatch):
+    events = []
+    monkeypatch.setattr(entry.telemetry, 'record_event', lambda event, **fields: events.append(fields))
+    monkeypatch.setattr(entry.config, 'BATCH_TOOL_EXECUTION', True)
+    monkeypatch.setattr(entry, 'dispatch_to_main_thread', lambda event_data, timeout: {'success': True, 'result': 'ok'})
+
+    entry.execute_tool_call(0, {'name': 'streamed'}, {'output': '{"python_code": "a = 1"}'})
+
+    assert events[-1]['tool_name'] == 'streamed'
+    assert events[-1]['batched'] is False
+
+
+def test_streamed_tool_calls_share_one_deferred_compute(monkeypatch):
+    design = mock.MagicMock(name='design')
+    design.isComputeDeferred = False
+    monkeypatch.setattr(entry.adsk.fusion.Design, 'cast', lambda product: design)
+
+    entry.begin_stream_deferred_compute()
+    entry.begin_stream_deferred_compute()
+    assert design.isComputeDeferred is True
+
+    report = entry.end_stream_deferred_compute()
+
+    assert design.isComputeDeferred is False
+    assert report['active'] is True
+    assert report['steps'] == 2
+    assert entry.end_stream_deferred_compute()['active'] is False
+
+
+def test_missing_compute_deferral_is_logged_once(monkeypatch):
+    logged = []
+    monkeypatch.setattr(entry.adsk.fusion.Design, 'cast', lambda product: types.SimpleNamespace())
+    monkeypatch.setattr(entry.futil, 'log', lambda message, *args, **kwargs: logged.append(message))
+    monkeypatch.setattr(entry.DeferredCompute, 'unsupported_logged', False)
+
+    for _ in range(2):
+        with entry.DeferredCompute() as deferred_compute:
+            pass
+
+    assert deferred_compute.report(3)['active'] is False
+    assert len([message for message in logged if 'isComputeDeferred' in message]) == 1
@@ -0,0 +1,73 @@
+"""Tests for the chat turn queue"""
+
+import threading
+
+from cadzero.palette_executor import PaletteExecutor
+from cadzero.turn_queue import TurnQueue
+
+
+def test_turns_of_a_new_session_wait_for_the_running_turn():
+    executor = PaletteExecutor(max_workers=4)
+    queue = TurnQueue(executor)
+    release_first = threading.Event()
+    first_started = threading.Event()
+    second_done = threading.Event()
+    order = []
+
+    def first(turn):
+        first_started.set()
+        release_first.wait(5)
+        order.append('first')
+
+    def second(turn):
+        order.append('second')
+        second_done.set()
+
+    try:
+        queue.submit('session-1', 'make a box', first)
+        assert first_started.wait(5)
+        # e.g. the history was cleared while the first turn was still running
+        queue.submit('session-2', 'make a box', second)
+        assert order == []
+
+        release_first.set()
+        assert second_done.wait(5)
+    finally:
+        release_first.set()
+        executor.shutdown(timeout=5)
+
+    assert order == ['first', 'second']
+
+
+def test_cancelling_a_finished_turn_leaves_the_running_turn_alone():
+    executor = PaletteExecutor(max_workers=2)
+    queue = TurnQueue(executor)
+    first_done = threading.Event()
+    release_second = threading.Event()
+    second_started = threading.Event()
+
+    def first(turn):
+        first_done.set()
+
+    def second(turn):
+        second_started.set()
+        release_second.wait(5)
+
+    try:
+        finished, _ = queue.submit('session-1', 'make a box', first)
+        assert first_done.wait(5)
+        running, _ = queue.submit('session-1', 'make a cone', second)
+        assert second_started.wait(5)
+        assert queue.running_turn() is running
+
+        assert queue.cancel(turn_id=finished.turn_id) == []
+        assert not running.cancel_requested
+
+        # Stop without a turn id flags the running turn
+        queue.cancel()
+        assert queue.running_turn().cancel_requested
+    finally:
+        release_second.set()
+        executor.shutdown(timeout=5)
+
+    assert queue.running_turn() is None
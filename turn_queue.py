@@ -0,0 +1,187 @@
+"""
+Chat turn queue for the CADZERO palette.
+Tracks every submitted chat turn through explicit states, merges identical
+messages submitted in quick succession and lets queued turns be cancelled
+before they reach the backend.
+"""
+
+import itertools
+import threading
+import time
+
+
+# Turn states, in the order a turn normally goes through them
+QUEUED = 'queued'
+SENDING = 'sending'
+EXECUTING = 'executing'
+DONE = 'done'
+CANCELLED = 'cancelled'
+
+
+class Turn:
+    """One chat message submitted from the palette"""
+
+    def __init__(self, turn_id, session_id, message):
+        self.turn_id = turn_id
+        self.session_id = session_id
+        self.message = message
+        self.state = QUEUED
+        self.submitted_at = time.monotonic()
+        self.merged = 0  # duplicate submissions folded into this turn
+        self.cancel_requested = False
+
+    def to_dict(self):
+        return {
+            'turn_id': self.turn_id,
+            'state': self.state,
+            'message': self.message[:80],
+            'merged': self.merged
+        }
+
+
+class TurnQueue:
+    """
+    Runs chat turns one at a time through a single PaletteExecutor serial lane.
+
+    All sessions share the lane, so a turn from a new session (after the history is
+    cleared or the user signs in again) waits for the previous session's turn to finish
+    instead of running next to it. Merging and cancellation are still per session.
+
+    on_state_change(turn, queue_snapshot) is called on every state change so the
+    palette can show what is queued, sending or executing. A message identical to
+    one submitted less than merge_window seconds ago that hasn't finished is merged
+    into it instead of being sent to the backend again.
+    """
+
+    # PaletteExecutor lane every chat turn is submitted to
+    LANE = 'chat'
+
+    def __init__(self, executor, on_state_change=None, merge_window=2.0):
+        self.executor = executor
+        self.on_state_change = on_state_change
+        self.merge_window = merge_window
+        self._counter = itertools.count(1)
+        self._turns = {}  # turn_id -> Turn, for turns that haven't finished
+        self._lock = threading.Lock()
+        self._current = threading.local()
+        self._running = None  # the turn the lane is running, seen from any thread
+
+        # Metrics
+        self.submitted = 0
+        self.merged = 0
+        self.cancelled = 0
+
+    def submit(self, session_id, message, run):
+        """
+        Queue run(turn) as a chat turn for message. Returns (turn, merged); when merged
+        is True the message was folded into an earlier pending turn and run is not called.
+        Raises PaletteQueueFull if the executor can't take more work.
+        """
+        key = message.strip()
+        now = time.monotonic()
+
+        with self._lock:
+            for turn in self._turns.values():
+                if (turn.session_id == session_id and turn.message.strip() == key
+                        and not turn.cancel_requested and now - turn.submitted_at < self.merge_window):
+                    turn.merged += 1
+                    self.merged += 1
+                    return turn, True
+
+            turn = Turn(f'turn_{next(self._counter)}', session_id, message)
+            self._turns[turn.turn_id] = turn
+            self.submitted += 1
+
+        # Announce the turn before a worker can move it on to 'sending'
+        self._notify(turn)
+        try:
+            self.executor.submit_serial(self.LANE, self._run_turn, turn, run)
+        except Exception:
+            with self._lock:
+                self._turns.pop(turn.turn_id, None)
+            self._set_state(turn, CANCELLED)
+            raise
+
+        return turn, False
+
+    def cancel(self, session_id=None, turn_id=None):
+        """
+        Cancel queued turns (all, one session's or a single one). Returns the cancelled
+        turns. Running turns are only flagged; stopping their tool calls is up to the caller.
+        """
+        with self._lock:
+            turns = [
+                turn for turn in self._turns.values()
+                if (turn_id is None or turn.turn_id == turn_id)
+                and (session_id is None or turn.session_id == session_id)
+            ]
+            queued = []
+            for turn in turns:
+                turn.cancel_requested = True
+                if turn.state == QUEUED:
+                    turn.state = CANCELLED
+                    del self._turns[turn.turn_id]
+                    self.cancelled += 1
+                    queued.append(turn)
+
+        for turn in queued:
+            self._notify(turn)
+        return queued
+
+    def mark_executing(self):
+        """Move the turn running on this thread to the executing state (its tool calls have started)"""
+        turn = self.current_turn()
+        if turn is not None and turn.state == SENDING:
+            self._set_state(turn, EXECUTING)
+
+    def current_turn(self):
+        """The turn being run on this thread, if any"""
+        return getattr(self._current, 'turn', None)
+
+    def running_turn(self):
+        """The turn the lane is running right now, if any (from any thread, e.g. Fusion's main thread)"""
+        with self._lock:
+            return self._running
+
+    def snapshot(self):
+        """List the turns that haven't finished, oldest first"""
+        with self._lock:
+            return [turn.to_dict() for turn in self._turns.values()]
+
+    def stats(self):
+        """Get queue counters"""
+        with self._lock:
+            return {
+                'pending': len(self._turns),
+                'submitted': self.submitted,
+                'merged': self.merged,
+                'cancelled': self.cancelled
+            }
+
+    def _run_turn(self, turn, run):
+        with self._lock:
+            if turn.state == CANCELLED:
+                return None
+            turn.state = SENDING
+            self._running = turn
+        self._notify(turn)
+
+        self._current.turn = turn
+        try:
+            return run(turn)
+        finally:
+            self._current.turn = None
+            with self._lock:
+                self._turns.pop(turn.turn_id, None)
+                if self._running is turn:
+                    self._running = None
+            self._set_state(turn, CANCELLED if turn.cancel_requested else DONE)
+
+    def _set_state(self, turn, state):
+        with self._lock:
+            turn.state = state
+        self._notify(turn)
+
+    def _notify(self, turn):
+        if self.on_state_change:
+            self.on_state_change(turn, self.snapshot())